@@ -0,0 +1,213 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Crypto trades every day of the year
+PERIODS_PER_YEAR = 365
+
+DEFAULT_FAST_WINDOWS = (1, 5, 10, 20)      # 1 = the price itself, as in the report's 50-day MA signal
+DEFAULT_SLOW_WINDOWS = (20, 50, 100, 200)
+DEFAULT_RSI_WINDOWS = (7, 14, 21)
+DEFAULT_RSI_LOWER = (20, 25, 30, 35)
+DEFAULT_RSI_UPPER = (65, 70, 75, 80)
+
+# Parameter sets evaluated together as one 2-D array operation per pool task
+_TASK_SIZE = 64
+
+# Precomputed series shared by every parameter set; set once per worker process
+_shared = None
+
+
+def precompute(close):
+    """Prefix sums and returns that every parameter set reuses.
+
+    Any moving average or RSI average over any window is then a difference of
+    two prefix-sum entries.
+    """
+    close = np.asarray(close, dtype=float)
+    delta = np.diff(close, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    returns = np.zeros_like(close)
+    returns[1:] = close[1:] / close[:-1] - 1
+    return {
+        'close': close,
+        'returns': returns,
+        'close_sum': np.concatenate([[0.0], np.cumsum(close)]),
+        'gain_sum': np.concatenate([[0.0], np.cumsum(gain)]),
+        'loss_sum': np.concatenate([[0.0], np.cumsum(loss)]),
+    }
+
+
+def _rolling_means(prefix, windows):
+    """(len(windows), n) rolling means from a prefix-sum array; incomplete windows are NaN"""
+    n = len(prefix) - 1
+    windows = np.asarray(windows)[:, None]
+    end = np.arange(1, n + 1)[None, :]
+    start = end - windows
+    means = (prefix[end] - prefix[np.clip(start, 0, None)]) / windows
+    return np.where(start >= 0, means, np.nan)
+
+
+def ma_crossover_positions(shared, fast, slow):
+    """Long (1) while the fast moving average is above the slow one, flat (0) otherwise"""
+    fast_ma = _rolling_means(shared['close_sum'], fast)
+    slow_ma = _rolling_means(shared['close_sum'], slow)
+    with np.errstate(invalid='ignore'):
+        return (fast_ma > slow_ma).astype(float)
+
+
+def rsi_positions(shared, windows, lower, upper):
+    """Buy when RSI drops below `lower`, sell when it rises above `upper`, hold in between"""
+    avg_gain = _rolling_means(shared['gain_sum'], windows)
+    avg_loss = _rolling_means(shared['loss_sum'], windows)
+    avg_loss[avg_loss == 0] = 0.00001
+    rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    lower = np.asarray(lower, dtype=float)[:, None]
+    upper = np.asarray(upper, dtype=float)[:, None]
+    with np.errstate(invalid='ignore'):
+        signal = np.where(rsi < lower, 1.0, np.where(rsi > upper, 0.0, np.nan))
+
+    # Hold the last signal until the next one (forward fill along time without a Python loop)
+    n = signal.shape[1]
+    has_signal = ~np.isnan(signal)
+    last_signal = np.maximum.accumulate(np.where(has_signal, np.arange(n), -1), axis=1)
+    rows = np.arange(signal.shape[0])[:, None]
+    return np.where(last_signal >= 0, signal[rows, np.maximum(last_signal, 0)], 0.0)
+
+
+def evaluate_positions(positions, returns):
+    """Performance metrics for each row of a (configs, bars) position matrix.
+
+    A position decided on a bar's close earns the next bar's return.
+    """
+    n_configs, n = positions.shape
+    strategy = positions[:, :-1] * returns[None, 1:]
+    log_equity = np.concatenate([np.zeros((n_configs, 1)), np.cumsum(np.log1p(strategy), axis=1)], axis=1)
+    equity = np.exp(log_equity)
+
+    total_return = equity[:, -1] - 1
+    years = max(n - 1, 1) / PERIODS_PER_YEAR
+    annual_return = equity[:, -1] ** (1 / years) - 1
+    drawdown = 1 - equity / np.maximum.accumulate(equity, axis=1)
+    max_drawdown = drawdown.max(axis=1)
+    daily_std = strategy.std(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(daily_std > 0, strategy.mean(axis=1) / daily_std * np.sqrt(PERIODS_PER_YEAR), 0.0)
+
+    # Trades are runs of consecutive long bars; find every run's first bar and the bar after its last
+    padded = np.concatenate([np.zeros((n_configs, 1)), positions, np.zeros((n_configs, 1))], axis=1)
+    edges = np.diff(padded, axis=1)
+    entry_rows, entries = np.nonzero(edges > 0)
+    _, exits = np.nonzero(edges < 0)
+    trade_returns = np.exp(log_equity[entry_rows, np.minimum(exits, n - 1)] - log_equity[entry_rows, entries]) - 1
+    n_trades = np.bincount(entry_rows, minlength=n_configs)
+    wins = np.bincount(entry_rows, weights=trade_returns > 0, minlength=n_configs)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hit_rate = np.where(n_trades > 0, wins / n_trades, np.nan)
+
+    return {
+        'total_return': total_return,
+        'annual_return': annual_return,
+        'max_drawdown': max_drawdown,
+        'sharpe': sharpe,
+        'trades': n_trades,
+        'hit_rate': hit_rate,
+        'exposure': positions.mean(axis=1),
+    }
+
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+
+def _run_task(task):
+    rule, configs = task
+    if rule == 'ma':
+        positions = ma_crossover_positions(_shared, [c['fast'] for c in configs], [c['slow'] for c in configs])
+    elif rule == 'rsi':
+        positions = rsi_positions(_shared, [c['window'] for c in configs],
+                                  [c['lower'] for c in configs], [c['upper'] for c in configs])
+    else:
+        raise ValueError(f"Unknown rule: {rule}")
+
+    metrics = evaluate_positions(positions, _shared['returns'])
+    return [dict(config, rule=rule, **{name: float(values[i]) for name, values in metrics.items()})
+            for i, config in enumerate(configs)]
+
+
+def build_grid(fast_windows=DEFAULT_FAST_WINDOWS, slow_windows=DEFAULT_SLOW_WINDOWS,
+               rsi_windows=DEFAULT_RSI_WINDOWS, rsi_lower=DEFAULT_RSI_LOWER, rsi_upper=DEFAULT_RSI_UPPER):
+    """Parameter sets for both signal rules, grouped by rule"""
+    ma = [{'fast': f, 'slow': s} for f, s in itertools.product(fast_windows, slow_windows) if f < s]
+    rsi = [{'window': w, 'lower': lo, 'upper': up}
+           for w, lo, up in itertools.product(rsi_windows, rsi_lower, rsi_upper) if lo < up]
+    return {'ma': ma, 'rsi': rsi}
+
+
+def run_sweep(close, grid=None, workers=None):
+    """Backtest every parameter set of `grid` on a close-price series.
+
+    Parameter sets are split into tasks that run across a process pool; each
+    worker receives the precomputed prefix sums once and evaluates a whole task
+    as array operations. Returns a DataFrame with one row per parameter set,
+    plus a buy-and-hold row for reference.
+    """
+    grid = build_grid() if grid is None else grid
+    shared = precompute(close)
+    tasks = [(rule, configs[i:i + _TASK_SIZE]) for rule, configs in grid.items()
+             for i in range(0, len(configs), _TASK_SIZE)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        _init_worker(shared)
+        chunks = [_run_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,)) as pool:
+            chunks = list(pool.map(_run_task, tasks))
+
+    hold = evaluate_positions(np.ones((1, len(shared['close']))), shared['returns'])
+    rows = [row for chunk in chunks for row in chunk]
+    rows.append(dict(rule='buy_and_hold', **{name: float(values[0]) for name, values in hold.items()}))
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the MA-crossover and RSI signals over a grid of parameters.")
+    parser.add_argument('--symbol', default='BTC', help="Crypto symbol, e.g. BTC or ETH")
+    parser.add_argument('--start', default='2020-01-01', help="First date of the backtest (YYYY-MM-DD)")
+    parser.add_argument('--end', default=pd.Timestamp.today().strftime('%Y-%m-%d'), help="End date (exclusive)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--output', default=None, help="CSV file for the full results table")
+    parser.add_argument('--top', type=int, default=10, help="Number of best configurations to print")
+    args = parser.parse_args()
+
+    from plot_crypto import get_crypto_price_data
+
+    data = get_crypto_price_data(args.symbol, args.start, args.end)
+    if data.empty:
+        print("Failed to fetch data.")
+        return
+
+    results = run_sweep(data['Close'].to_numpy(), workers=args.workers)
+    results = results.sort_values('total_return', ascending=False)
+
+    output = args.output or f"backtest_{args.symbol.lower()}.csv"
+    results.to_csv(output, index=False)
+
+    columns = ['rule', 'fast', 'slow', 'window', 'lower', 'upper', 'total_return', 'max_drawdown', 'hit_rate', 'trades']
+    print(f"{len(results) - 1} configurations backtested on {args.symbol} ({len(data)} bars)")
+    print(results[[c for c in columns if c in results.columns]].head(args.top).to_string(index=False))
+    print(f"\nFull results saved to {os.path.abspath(output)}")
+
+
+if __name__ == "__main__":
+    main()
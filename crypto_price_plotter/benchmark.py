@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from synthetic import random_walk_matrix, synthetic_frames
+
+RESULTS_DIR = Path(__file__).parent / "benchmark_results"
+PLOT_CRYPTO = Path(__file__).parent / "plot_crypto.py"
+
+DEFAULT_ROWS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+DEFAULT_SYMBOLS = (2, 10, 100, 1000)
+QUICK_ROWS = (1_000, 10_000, 100_000)
+QUICK_SYMBOLS = (2, 10)
+
+# Cases whose price matrix (rows x symbols) is larger than this are skipped; the
+# indicator panel alone holds nine matrices of that size
+MAX_CELLS = 20_000_000
+# The rolling correlation cube holds rows x symbols x symbols float32 values
+MAX_CUBE_CELLS = 100_000_000
+# Stop repeating a case once it has used this much time
+MAX_SECONDS_PER_CASE = 30.0
+
+
+def _close_matrix(rows, symbols, seed):
+    # Minute bars so 10M rows still fit in pandas' timestamp range
+    index = pd.date_range('2000-01-01', periods=rows, freq='min', name='Date')
+    columns = ['BTC', 'ETH'] + [f"SYM{i:03d}" for i in range(2, symbols)]
+    return pd.DataFrame(random_walk_matrix(rows, symbols, seed), index=index, columns=columns[:symbols])
+
+
+def _setup_indicators(rows, symbols, seed):
+    from indicators import compute_indicator_panel
+
+    close = _close_matrix(rows, symbols, seed)
+    return lambda: compute_indicator_panel(close)
+
+
+def _setup_trend(rows, symbols, seed):
+    from trend import rolling_trends
+
+    values = random_walk_matrix(rows, symbols, seed)
+    return lambda: rolling_trends(values, (30,))
+
+
+def _setup_analyze_price_trend(rows, symbols, seed):
+    from trend import analyze_price_trend
+
+    if symbols != 2:
+        return None
+    prices = random_walk_matrix(rows, 1, seed)[:, 0]
+    return lambda: analyze_price_trend(prices)
+
+
+def _setup_correlation(rows, symbols, seed):
+    from correlation import correlation_matrix
+
+    returns = _close_matrix(rows, symbols, seed).pct_change()
+    return lambda: correlation_matrix(returns)
+
+
+def _setup_rolling_correlation(rows, symbols, seed):
+    from correlation import rolling_correlation
+
+    if rows * symbols * symbols > MAX_CUBE_CELLS:
+        return None
+    returns = _close_matrix(rows, symbols, seed).pct_change()
+    return lambda: rolling_correlation(returns, 30)
+
+
+def _setup_summary(rows, symbols, seed):
+    from indicators import compute_indicator_panel
+    from summary import summarize_symbols
+
+    close = _close_matrix(rows, symbols, seed)
+    panel = compute_indicator_panel(close)
+    indicators = {name: panel[name] for name in ('MA_50', 'RSI', 'volatility_20d')}
+    return lambda: summarize_symbols(close, indicators)
+
+
+def _setup_charts(rows, symbols, seed):
+    from indicators import add_technical_indicators_batch
+    from rendering import price_volatility_job, technical_jobs, render_chart
+
+    if symbols != 2:
+        return None
+    frames = add_technical_indicators_batch(synthetic_frames(rows, 2, seed, freq='min'))
+    out_dir = tempfile.mkdtemp(prefix='crypto_bench_')
+    jobs = [price_volatility_job(frames, os.path.join(out_dir, 'prices'), 'Benchmark'),
+            *technical_jobs(frames, os.path.join(out_dir, 'technical'))]
+    return lambda: [render_chart(job, dpi=100) for job in jobs]
+
+
+# name -> setup(rows, symbols, seed) returning the timed callable, or None when the case does not apply
+BENCHMARKS = {
+    'indicators': _setup_indicators,
+    'trend': _setup_trend,
+    'analyze_price_trend': _setup_analyze_price_trend,
+    'correlation': _setup_correlation,
+    'rolling_correlation': _setup_rolling_correlation,
+    'summary': _setup_summary,
+    'charts': _setup_charts,
+}
+
+
+# Command lines timed by --startup, each in a fresh interpreter inside a scratch directory.
+# `insights` runs first so `report` has saved results to read.
+STARTUP_COMMANDS = (
+    ('import', ['-c', 'import plot_crypto']),
+    ('insights', [str(PLOT_CRYPTO), 'insights', '--synthetic']),
+    ('report', [str(PLOT_CRYPTO), 'report']),
+    ('report_field', [str(PLOT_CRYPTO), 'report', '--field', 'BTC.end_price']),
+    ('indicators', [str(PLOT_CRYPTO), 'indicators', '--synthetic']),
+)
+
+
+def _time(fn, repeat):
+    """Wall times of up to `repeat` calls, stopping early once MAX_SECONDS_PER_CASE is used up"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+        if sum(times) > MAX_SECONDS_PER_CASE:
+            break
+    return times
+
+
+def run_benchmarks(names=None, rows=DEFAULT_ROWS, symbols=DEFAULT_SYMBOLS, repeat=3, seed=0, max_cells=MAX_CELLS):
+    """Time every benchmark at every (rows, symbols) size; returns one result dict per case"""
+    results = []
+    for name in names or BENCHMARKS:
+        for n_rows in rows:
+            for n_symbols in symbols:
+                case = {'benchmark': name, 'rows': n_rows, 'symbols': n_symbols}
+                if n_rows * n_symbols > max_cells:
+                    results.append(dict(case, skipped='too large'))
+                    continue
+                fn = BENCHMARKS[name](n_rows, n_symbols, seed)
+                if fn is None:
+                    continue
+                times = _time(fn, repeat)
+                results.append(dict(case, runs=len(times), best_s=min(times), median_s=float(np.median(times))))
+                print(f"{name:<20} {n_rows:>10} rows {n_symbols:>5} symbols  {min(times):10.4f} s")
+    return results
+
+
+def startup_benchmarks(repeat=5):
+    """End-to-end wall time of small plot_crypto invocations, dominated by interpreter and import startup"""
+    results = []
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(PLOT_CRYPTO.parent), os.environ.get('PYTHONPATH')])))
+    with tempfile.TemporaryDirectory(prefix='crypto_startup_') as work_dir:
+        for name, args in STARTUP_COMMANDS:
+            run = lambda: subprocess.run([sys.executable] + args, cwd=work_dir, env=env,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            times = _time(run, repeat)
+            results.append({'benchmark': f"startup:{name}", 'rows': None, 'symbols': None,
+                            'runs': len(times), 'best_s': min(times), 'median_s': float(np.median(times))})
+            print(f"{'startup:' + name:<20} {'':>27}  {min(times):10.4f} s")
+    return results
+
+
+def environment():
+    """Versions and machine details stored next to the timings"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'git_commit': commit,
+    }
+
+
+def save_results(results, label, results_dir=RESULTS_DIR):
+    """Write a results file named after `label` and return its path"""
+    results_dir = Path(results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    path = results_dir / f"{label}.json"
+    with open(path, 'w') as f:
+        json.dump({'label': label, 'created': datetime.now().isoformat(timespec='seconds'),
+                   'environment': environment(), 'results': results}, f, indent=2)
+    return path
+
+
+def compare_results(baseline, current):
+    """Table lines comparing best times of the cases both runs measured (ratio < 1 means faster)"""
+    key = lambda r: (r['benchmark'], r['rows'], r['symbols'])
+    before = {key(r): r for r in baseline if 'best_s' in r}
+    lines = [f"{'Benchmark':<20} {'Rows':>10} {'Symbols':>7} {'Baseline (s)':>13} {'Current (s)':>12} {'Ratio':>7}"]
+    for r in current:
+        if 'best_s' not in r or key(r) not in before:
+            continue
+        old = before[key(r)]['best_s']
+        ratio = r['best_s'] / old if old > 0 else float('nan')
+        lines.append(f"{r['benchmark']:<20} {r['rows'] or '-':>10} {r['symbols'] or '-':>7} "
+                     f"{old:>13.4f} {r['best_s']:>12.4f} {ratio:>7.2f}")
+    return lines
+
+
+def _int_list(text):
+    return tuple(int(float(value)) for value in text.split(','))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis functions on synthetic price data (no network).")
+    parser.add_argument('--only', default=None, help=f"Comma-separated benchmarks to run ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--rows', type=_int_list, default=DEFAULT_ROWS, help="Comma-separated row counts, e.g. 1000,1e6")
+    parser.add_argument('--symbols', type=_int_list, default=DEFAULT_SYMBOLS, help="Comma-separated symbol counts")
+    parser.add_argument('--quick', action='store_true', help="Small sizes only (a few seconds)")
+    parser.add_argument('--startup', action='store_true', help="Also time the startup of small plot_crypto commands")
+    parser.add_argument('--startup-only', action='store_true', help="Only time the startup of small plot_crypto commands")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case; the best one is reported")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic price generator")
+    parser.add_argument('--max-cells', type=float, default=MAX_CELLS, help="Skip cases with more rows x symbols than this")
+    parser.add_argument('--label', default=None, help="Name of the results file (default: git commit or timestamp)")
+    parser.add_argument('--compare', default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else None
+    unknown = [name for name in names or () if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+    rows, symbols = (QUICK_ROWS, QUICK_SYMBOLS) if args.quick else (args.rows, args.symbols)
+
+    results = [] if args.startup_only else run_benchmarks(names, rows, symbols, args.repeat, args.seed, args.max_cells)
+    if args.startup or args.startup_only:
+        results += startup_benchmarks(max(args.repeat, 5))
+    label = args.label or environment()['git_commit'] or datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = save_results(results, label)
+    print(f"\nResults saved to {path.resolve()}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {baseline['label']} ({baseline['created']}):")
+        for line in compare_results(baseline['results'], results):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
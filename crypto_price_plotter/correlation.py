@@ -0,0 +1,123 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Recompute the rolling sums from scratch now and then so add/remove rounding error cannot build up
+_RESYNC_INTERVAL = 1000
+
+
+def _as_array(values):
+    if isinstance(values, pd.DataFrame):
+        return values.to_numpy(dtype=float), list(values.columns)
+    values = np.asarray(values, dtype=float)
+    return values, list(range(values.shape[1]))
+
+
+def _center(array, valid):
+    """Subtract column means (NaN zeroed) so the sums of squares stay well conditioned"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        col_means = np.nanmean(array, axis=0)
+    return np.where(valid, array - np.where(np.isnan(col_means), 0.0, col_means), 0.0)
+
+
+def _pairwise_sums(x, v):
+    """Pairwise-complete sums for rows x (NaN zeroed) with validity mask v.
+
+    Returns (count, sum_x, sum_xx, sum_xy) as N x N matrices, where entry (i, j)
+    only counts rows in which both column i and column j are present.
+    """
+    return v.T @ v, x.T @ v, (x * x).T @ v, x.T @ x
+
+
+def _correlation_from_sums(count, sum_x, sum_xx, sum_xy, min_periods):
+    """Pearson correlation for every pair from pairwise-complete sums"""
+    cov = count * sum_xy - sum_x * sum_x.T
+    var = count * sum_xx - sum_x * sum_x
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cov / np.sqrt(var * var.T)
+    corr[(count < max(min_periods, 2)) | (var <= 0) | (var.T <= 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def correlation_matrix(values, min_periods=2):
+    """N x N Pearson correlation of the columns of a dates x symbols matrix.
+
+    Uses pairwise-complete observations like DataFrame.corr(). Returns a labelled
+    DataFrame when given a DataFrame, otherwise a NumPy array.
+    """
+    array, labels = _as_array(values)
+    valid = ~np.isnan(array)
+    corr = _correlation_from_sums(*_pairwise_sums(_center(array, valid), valid.astype(float)), min_periods)
+    if isinstance(values, pd.DataFrame):
+        return pd.DataFrame(corr, index=labels, columns=labels)
+    return corr
+
+
+def rolling_correlation(values, window, min_periods=None, dtype=np.float32, out=None):
+    """Rolling N x N correlation matrices for every row of a dates x symbols matrix.
+
+    The pairwise sums are updated incrementally (add the newest row, remove the
+    one leaving the window), so each step costs O(N^2) regardless of the window
+    length. Returns a (dates, N, N) array of `dtype`; float32 halves the memory
+    of large cubes. Pass a preallocated array (e.g. np.memmap) as `out` to
+    write the cube elsewhere. Rows before the first full window are NaN.
+    """
+    array, _ = _as_array(values)
+    n_rows, n_cols = array.shape
+    min_periods = window if min_periods is None else min_periods
+
+    if out is None:
+        out = np.empty((n_rows, n_cols, n_cols), dtype=dtype)
+    out[:window - 1] = np.nan
+    if n_rows < window:
+        out[:] = np.nan
+        return out
+
+    valid = ~np.isnan(array)
+    x = _center(array, valid)
+    v = valid.astype(float)
+    xx = x * x
+
+    for end in range(window - 1, n_rows):
+        begin = end - window + 1
+        if begin % _RESYNC_INTERVAL == 0:
+            count, sum_x, sum_xx, sum_xy = _pairwise_sums(x[begin:end + 1], v[begin:end + 1])
+        else:
+            new, old = end, begin - 1
+            count += np.outer(v[new], v[new]) - np.outer(v[old], v[old])
+            sum_x += np.outer(x[new], v[new]) - np.outer(x[old], v[old])
+            sum_xx += np.outer(xx[new], v[new]) - np.outer(xx[old], v[old])
+            sum_xy += np.outer(x[new], x[new]) - np.outer(x[old], x[old])
+        out[end] = _correlation_from_sums(count, sum_x, sum_xx, sum_xy, min_periods)
+
+    return out
+
+
+class RunningCorrelation:
+    """Pairwise-complete correlation sums for a dates x symbols matrix that only grows at the end.
+
+    `add` folds new rows into the sums in O(rows * N^2), and `matrix` returns the
+    correlation of everything added so far, optionally with extra trailing rows
+    that are not folded in (e.g. a bar that is still forming).
+    """
+
+    def __init__(self, n_cols, ref=None):
+        self.ref = np.zeros(n_cols) if ref is None else np.where(np.isnan(ref), 0.0, np.asarray(ref, dtype=float))
+        self.sums = tuple(np.zeros((n_cols, n_cols)) for _ in range(4))
+
+    def _sums(self, values):
+        array, _ = _as_array(values)
+        valid = ~np.isnan(array)
+        # A fixed reference instead of the column means keeps the sums additive across calls
+        return _pairwise_sums(np.where(valid, array - self.ref, 0.0), valid.astype(float))
+
+    def add(self, values):
+        self.sums = tuple(total + part for total, part in zip(self.sums, self._sums(values)))
+
+    def matrix(self, extra=None, min_periods=2):
+        sums = self.sums
+        if extra is not None and len(extra):
+            sums = tuple(total + part for total, part in zip(sums, self._sums(extra)))
+        return _correlation_from_sums(*sums, min_periods)
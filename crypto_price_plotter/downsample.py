@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def lttb_indices(x, y, n_out):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Always keeps the first and last point and, from every bucket in between, the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, so peaks and troughs survive. NaN points are
+    skipped.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    finite = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    n = len(finite)
+    if n_out >= n or n_out < 3:
+        return finite
+
+    xs, ys = x[finite], y[finite]
+
+    # Bucket boundaries over the interior points; bucket i spans [edges[i], edges[i + 1])
+    edges = (np.floor(np.arange(n_out - 1) * (n - 2) / (n_out - 2)) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    sums_x = np.add.reduceat(xs[:n - 1], edges[:-1])
+    sums_y = np.add.reduceat(ys[:n - 1], edges[:-1])
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, xs[-1])
+    avg_y = np.append(sums_y / counts, ys[-1])
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((xs[a] - avg_x[i + 1]) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (avg_y[i + 1] - ys[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+
+    return finite[kept]
+
+
+def downsample_series(series, n_out, x_key='x'):
+    """Downsample several series that share one x axis.
+
+    `series` maps names to equal-length arrays, one of which is the x axis. Each
+    y series picks its own LTTB points and the union is applied to all of them,
+    so lines (and bands between them) stay aligned and every series keeps its
+    own peaks. Returns a new dict of sliced arrays.
+    """
+    x = np.asarray(series[x_key], dtype=float)
+    if n_out >= len(x):
+        return series
+
+    picks = [lttb_indices(x, values, n_out) for name, values in series.items() if name != x_key]
+    keep = np.unique(np.concatenate(picks)) if picks else np.arange(len(x))
+    if len(keep) == 0:
+        return series
+    return {name: np.asarray(values)[keep] for name, values in series.items()}
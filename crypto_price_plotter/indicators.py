@@ -0,0 +1,381 @@
+import json
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MA_WINDOWS = (20, 50)
+RSI_WINDOW = 14
+VOLATILITY_WINDOW = 20
+BOLLINGER_WINDOW = 20
+BOLLINGER_NUM_STD = 2
+
+# Bars of history needed to continue every rolling window from an earlier point
+# (one extra bar because returns and price changes look one bar back)
+WARMUP_BARS = max(max(MA_WINDOWS), BOLLINGER_WINDOW, RSI_WINDOW, VOLATILITY_WINDOW) + 1
+
+# Rows per cumulative-sum block; restarting the sums keeps rounding error independent of history length
+_BLOCK_SIZE = 4096
+
+
+def _rolling_moments(values, window, with_var=True):
+    """Rolling mean (and sample variance) down the rows of a 2-D array.
+
+    Matches pandas' rolling(window) with the default min_periods: any window
+    that contains a NaN yields NaN.
+    """
+    n_rows, n_cols = values.shape
+    mean = np.full((n_rows, n_cols), np.nan)
+    var = np.full((n_rows, n_cols), np.nan) if with_var else None
+
+    for start in range(window - 1, n_rows, _BLOCK_SIZE):
+        stop = min(start + _BLOCK_SIZE, n_rows)
+        segment = values[start - window + 1:stop]
+        valid = ~np.isnan(segment)
+
+        # Center each block on its own mean so the sum of squares does not cancel catastrophically
+        if with_var:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                ref = np.nanmean(segment, axis=0)
+            ref = np.where(np.isnan(ref), 0.0, ref)
+        else:
+            ref = np.zeros(n_cols)
+        centered = np.where(valid, segment - ref, 0.0)
+
+        zeros = np.zeros((1, n_cols))
+        csum = np.concatenate([zeros, np.cumsum(centered, axis=0)])
+        count = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+        win_sum = csum[window:] - csum[:-window]
+        full = (count[window:] - count[:-window]) == window
+
+        mean[start:stop] = np.where(full, win_sum / window + ref, np.nan)
+        if with_var:
+            csq = np.concatenate([zeros, np.cumsum(centered * centered, axis=0)])
+            win_sq = csq[window:] - csq[:-window]
+            block_var = np.maximum((win_sq - win_sum * win_sum / window) / (window - 1), 0.0)
+            var[start:stop] = np.where(full, block_var, np.nan)
+
+    return mean, var
+
+
+def compute_indicator_panel(close):
+    """Compute technical indicators for every column of a dates x symbols price matrix.
+
+    Returns a dict mapping indicator name to a DataFrame shaped like `close`.
+    """
+    values = close.to_numpy(dtype=float)
+
+    def frame(arr):
+        return pd.DataFrame(arr, index=close.index, columns=close.columns)
+
+    # Daily returns
+    daily_return = np.full_like(values, np.nan)
+    daily_return[1:] = (values[1:] / values[:-1] - 1) * 100
+
+    # Moving averages; the 20-day mean and std are shared with the Bollinger Bands
+    ma_20, var_20 = _rolling_moments(values, BOLLINGER_WINDOW)
+    moving_averages = {BOLLINGER_WINDOW: ma_20}
+    for window in MA_WINDOWS:
+        if window not in moving_averages:
+            moving_averages[window] = _rolling_moments(values, window, with_var=False)[0]
+    bollinger_std = np.sqrt(var_20)
+
+    # Relative Strength Index (RSI); the first bar has no change and counts as zero gain/loss
+    delta = np.full_like(values, np.nan)
+    delta[1:] = values[1:] - values[:-1]
+    with np.errstate(invalid='ignore'):
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = _rolling_moments(gain, RSI_WINDOW, with_var=False)[0]
+    avg_loss = _rolling_moments(loss, RSI_WINDOW, with_var=False)[0]
+
+    # Avoid division by zero
+    avg_loss[avg_loss == 0] = 0.00001
+    rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    # Volatility (standard deviation of returns)
+    volatility = np.sqrt(_rolling_moments(daily_return, VOLATILITY_WINDOW)[1])
+
+    panel = {'daily_return': frame(daily_return)}
+    for window in MA_WINDOWS:
+        panel[f'MA_{window}'] = frame(moving_averages[window])
+    panel['RSI'] = frame(rsi)
+    panel['volatility_20d'] = frame(volatility)
+    panel['bollinger_mid'] = frame(ma_20)
+    panel['bollinger_std'] = frame(bollinger_std)
+    panel['bollinger_upper'] = frame(ma_20 + BOLLINGER_NUM_STD * bollinger_std)
+    panel['bollinger_lower'] = frame(ma_20 - BOLLINGER_NUM_STD * bollinger_std)
+    return panel
+
+
+def build_price_matrix(frames, column='Close'):
+    """Align per-symbol frames on Date into one dates x symbols matrix"""
+    return pd.concat(
+        {symbol: df.set_index('Date')[column] for symbol, df in frames.items()},
+        axis=1,
+    ).sort_index()
+
+
+def add_technical_indicators(df):
+    """Add technical indicators to the dataframe"""
+    panel = compute_indicator_panel(df[['Close']])
+    for name, values in panel.items():
+        df[name] = values['Close'].to_numpy()
+    return df
+
+
+def add_technical_indicators_batch(frames):
+    """Add technical indicators to every per-symbol frame, one matrix pass per group of equal-length frames.
+
+    Each column holds one symbol's own rows (not a union of dates), so gaps,
+    late starts and duplicate dates give exactly the add_technical_indicators result.
+    """
+    by_length = {}
+    for symbol, df in frames.items():
+        by_length.setdefault(len(df), []).append(symbol)
+
+    computed = {}
+    for symbols in by_length.values():
+        close = pd.DataFrame({symbol: frames[symbol]['Close'].to_numpy(dtype=float) for symbol in symbols})
+        panel = compute_indicator_panel(close)
+        for symbol in symbols:
+            df = frames[symbol].copy()
+            for name, values in panel.items():
+                df[name] = values[symbol].to_numpy()
+            computed[symbol] = df
+    return {symbol: computed[symbol] for symbol in frames}
+
+
+def first_changed_row(previous, data):
+    """Position of the first bar of `data` that is new or differs (Date or Close) from `previous`"""
+    if previous is None:
+        return 0
+    common = min(len(previous), len(data))
+    same = ((previous['Date'].to_numpy()[:common] == data['Date'].to_numpy()[:common]) &
+            (previous['Close'].to_numpy()[:common] == data['Close'].to_numpy()[:common]))
+    return common if same.all() else int(np.argmin(same))
+
+
+def refresh_indicators(previous, data):
+    """Bring an indicator frame up to date with newly fetched price data.
+
+    `previous` is the frame returned by an earlier call (or None) and `data` the
+    latest price frame for the same symbol. Only rows from the first new or
+    revised bar onwards are recomputed, from the WARMUP_BARS closes before it;
+    earlier rows are copied. Returns `previous` itself when nothing changed.
+    """
+    if previous is None or previous.empty:
+        return add_technical_indicators(data.copy())
+
+    first_changed = first_changed_row(previous, data)
+    if first_changed == len(data) == len(previous):
+        return previous
+
+    start = max(0, first_changed - WARMUP_BARS)
+    panel = compute_indicator_panel(data[['Close']].iloc[start:].reset_index(drop=True))
+    result = data.copy()
+    for name, values in panel.items():
+        column = np.empty(len(data))
+        column[:first_changed] = previous[name].to_numpy()[:first_changed]
+        column[first_changed:] = values['Close'].to_numpy()[first_changed - start:]
+        result[name] = column
+    return result
+
+
+class _RollingWindow:
+    """Fixed-size ring buffer with a running mean and sum of squared deviations (Welford).
+
+    NaN values occupy a slot but are left out of the running statistics; like the
+    batch engine, the window only reports a value when it is full and NaN-free.
+    """
+
+    # Recompute the running statistics from the buffer now and then so rounding error cannot build up
+    RESYNC_INTERVAL = 10000
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = [np.nan] * window
+        self.pos = 0
+        self.filled = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.nonzero = 0
+        self.updates = 0
+
+    def _add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def _remove(self, x):
+        if self.n == 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        old_mean = self.mean
+        self.mean = (self.n * old_mean - x) / (self.n - 1)
+        self.m2 -= (x - old_mean) * (x - self.mean)
+        self.n -= 1
+
+    def _resync(self):
+        # Unfilled slots hold NaN, so they drop out together with real missing values
+        values = np.asarray(self.buffer, dtype=float)
+        values = values[~np.isnan(values)]
+        self.n = len(values)
+        self.mean = float(values.mean()) if self.n else 0.0
+        self.m2 = float(((values - self.mean) ** 2).sum()) if self.n else 0.0
+        self.nonzero = int(np.count_nonzero(values))
+
+    def push(self, x):
+        if self.filled == self.window:
+            old = self.buffer[self.pos]
+            if not np.isnan(old):
+                self._remove(old)
+                self.nonzero -= old != 0
+        else:
+            self.filled += 1
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+        if not np.isnan(x):
+            self._add(x)
+            self.nonzero += x != 0
+
+        self.updates += 1
+        if self.updates % self.RESYNC_INTERVAL == 0:
+            self._resync()
+
+    def is_ready(self):
+        return self.filled == self.window and self.n == self.window
+
+    def get_mean(self):
+        if not self.is_ready():
+            return np.nan
+        # A window of zeros (e.g. no losses for the RSI) must average to exactly zero
+        return self.mean if self.nonzero else 0.0
+
+    def get_std(self):
+        if not self.is_ready():
+            return np.nan
+        return float(np.sqrt(max(self.m2 / (self.window - 1), 0.0)))
+
+    def to_state(self):
+        return {
+            'window': self.window,
+            'buffer': list(self.buffer),
+            'pos': self.pos,
+            'filled': self.filled,
+            'updates': self.updates,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        rolling = cls(state['window'])
+        rolling.buffer = [float(v) for v in state['buffer']]
+        rolling.pos = state['pos']
+        rolling.filled = state['filled']
+        rolling.updates = state['updates']
+        rolling._resync()
+        return rolling
+
+
+class StreamingIndicators:
+    """Incremental technical indicators that take one closing price per bar.
+
+    Each update is O(1) and returns the same values that compute_indicator_panel
+    produces for that bar. The state can be saved and restored so a long-running
+    process can resume without replaying the price history.
+    """
+
+    STATE_VERSION = 1
+
+    def __init__(self):
+        self.prev_close = None
+        self.moving_averages = {window: _RollingWindow(window) for window in set(MA_WINDOWS) | {BOLLINGER_WINDOW}}
+        self.gains = _RollingWindow(RSI_WINDOW)
+        self.losses = _RollingWindow(RSI_WINDOW)
+        self.returns = _RollingWindow(VOLATILITY_WINDOW)
+
+    def update(self, close):
+        """Add one bar and return the indicator values for it"""
+        close = float(close)
+        if self.prev_close is None:
+            daily_return = delta = np.nan
+        else:
+            daily_return = (close / self.prev_close - 1) * 100
+            delta = close - self.prev_close
+        self.prev_close = close
+
+        for rolling in self.moving_averages.values():
+            rolling.push(close)
+        # The first bar has no change and counts as zero gain/loss, as in the batch engine
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+        self.returns.push(daily_return)
+
+        return self.current(daily_return)
+
+    def current(self, daily_return=np.nan):
+        """Indicator values for the latest bar"""
+        avg_gain = self.gains.get_mean()
+        avg_loss = self.losses.get_mean()
+        # Avoid division by zero
+        if avg_loss == 0:
+            avg_loss = 0.00001
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        bollinger = self.moving_averages[BOLLINGER_WINDOW]
+        mid = bollinger.get_mean()
+        std = bollinger.get_std()
+
+        values = {'daily_return': daily_return}
+        for window in MA_WINDOWS:
+            values[f'MA_{window}'] = self.moving_averages[window].get_mean()
+        values['RSI'] = rsi
+        values['volatility_20d'] = self.returns.get_std()
+        values['bollinger_mid'] = mid
+        values['bollinger_std'] = std
+        values['bollinger_upper'] = mid + BOLLINGER_NUM_STD * std
+        values['bollinger_lower'] = mid - BOLLINGER_NUM_STD * std
+        return values
+
+    def to_state(self):
+        """Serializable snapshot of the indicator state"""
+        return {
+            'version': self.STATE_VERSION,
+            'prev_close': self.prev_close,
+            'moving_averages': [rolling.to_state() for rolling in self.moving_averages.values()],
+            'gains': self.gains.to_state(),
+            'losses': self.losses.to_state(),
+            'returns': self.returns.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        if state.get('version') != cls.STATE_VERSION:
+            raise ValueError(f"Unsupported indicator state version: {state.get('version')}")
+        indicators = cls()
+        indicators.prev_close = state['prev_close']
+        for rolling_state in state['moving_averages']:
+            rolling = _RollingWindow.from_state(rolling_state)
+            indicators.moving_averages[rolling.window] = rolling
+        indicators.gains = _RollingWindow.from_state(state['gains'])
+        indicators.losses = _RollingWindow.from_state(state['losses'])
+        indicators.returns = _RollingWindow.from_state(state['returns'])
+        return indicators
+
+    def save(self, path):
+        """Write the state to a JSON file"""
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_state(), f)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore the state written by save()"""
+        with open(path) as f:
+            return cls.from_state(json.load(f))
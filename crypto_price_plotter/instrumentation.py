@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+FIELDS = ('run', 'stage', 'symbol', 'status', 'wall_s', 'cpu_s', 'peak_mb', 'rows')
+
+
+class StageMetrics:
+    """Wall time and CPU time, or peak memory, of named pipeline stages.
+
+    Timing is the default. With `track_memory`, each stage instead records the
+    most Python/NumPy memory allocated on top of what was in use when it started
+    (via tracemalloc, running from construction until close()). Tracing slows
+    Python-heavy code, so a memory run leaves the times empty and timings always
+    come from untraced runs. Stages may be nested; a parent's peak includes its
+    children's. Work done in other processes (the chart rendering pool) shows up
+    in wall time only.
+    """
+
+    def __init__(self, track_memory=False):
+        self.run = datetime.now().isoformat(timespec='seconds')
+        self.track_memory = track_memory
+        self.records = []
+        self._open = []
+        self._started_tracing = track_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, symbol=None):
+        """Measure the body of a `with` block; yields the record so callers can add e.g. `rows`"""
+        frame = {'peak': 0, 'base': 0}
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._open:
+                self._open[-1]['peak'] = max(self._open[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['base'] = current
+        self._open.append(frame)
+
+        record = {'run': self.run, 'stage': name, 'symbol': symbol, 'status': 'ok', 'rows': None}
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        except BaseException:
+            record['status'] = 'error'
+            raise
+        finally:
+            self._open.pop()
+            if self.track_memory:
+                record['wall_s'] = record['cpu_s'] = None
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                if self._open:
+                    self._open[-1]['peak'] = max(self._open[-1]['peak'], peak)
+                record['peak_mb'] = max(peak - frame['base'], 0) / 2 ** 20
+            else:
+                record['wall_s'] = time.perf_counter() - wall
+                record['cpu_s'] = time.process_time() - cpu
+                record['peak_mb'] = None
+            self.records.append(record)
+
+    def close(self):
+        """Stop tracemalloc if this instance started it"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def save(self, path):
+        """Append this run's records to a CSV or JSON metrics file, so runs can be compared over time"""
+        if str(path).lower().endswith('.json'):
+            runs = []
+            if os.path.exists(path):
+                with open(path) as f:
+                    runs = json.load(f)
+            runs.append({'run': self.run, 'stages': self.records})
+            with open(path, 'w') as f:
+                json.dump(runs, f, indent=2)
+        else:
+            new_file = not os.path.exists(path)
+            with open(path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerows(self.records)
+
+    def summary_table(self):
+        """Lines of a fixed-width table of the recorded stages, in completion order"""
+        lines = [f"{'Stage':<14} {'Symbol':<8} {'Wall (s)':>9} {'CPU (s)':>9} {'Peak (MB)':>10} {'Rows':>9}  Status"]
+        for r in self.records:
+            wall, cpu, peak = (f"{r[key]:{spec}}" if r[key] is not None else "-"
+                               for key, spec in (('wall_s', '.3f'), ('cpu_s', '.3f'), ('peak_mb', '.1f')))
+            rows = str(r['rows']) if r['rows'] is not None else "-"
+            lines.append(f"{r['stage']:<14} {r['symbol'] or '-':<8} {wall:>9} {cpu:>9} "
+                         f"{peak:>10} {rows:>9}  {r['status']}")
+        return lines
+
+
+def measure(metrics, name, symbol=None):
+    """metrics.stage(...) when instrumentation is on, otherwise a no-op context yielding a throwaway record"""
+    if metrics is None:
+        return nullcontext({})
+    return metrics.stage(name, symbol)
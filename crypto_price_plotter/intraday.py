@@ -0,0 +1,231 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from indicators import WARMUP_BARS, compute_indicator_panel
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def iter_source_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS, time_column='Date'):
+    """Yield a CSV or Parquet file as DataFrames of at most `chunk_rows` rows"""
+    path = Path(path)
+    if path.suffix.lower() == '.parquet':
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            chunk = batch.to_pandas()
+            chunk[time_column] = pd.to_datetime(chunk[time_column])
+            yield chunk
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            chunk[time_column] = pd.to_datetime(chunk[time_column])
+            yield chunk
+
+
+class BarResampler:
+    """Resample time-sorted ticks or bars into fixed-size OHLCV bars, chunk by chunk.
+
+    Input chunks either hold OHLC(V) columns (minute bars and the like) or tick
+    columns `Price` and optionally `Volume`. The last bar of each chunk may still
+    receive rows from the next chunk, so it is held back as a one-row partial bar
+    and only completed bars are returned. Memory stays bounded by the chunk size
+    however many input rows fall into one bar.
+    """
+
+    def __init__(self, bar_size, time_column='Date'):
+        self.bar_size = bar_size
+        self.time_column = time_column
+        self.partial = None
+
+    def _aggregate(self, rows):
+        buckets = rows[self.time_column].dt.floor(self.bar_size)
+        grouped = rows.groupby(buckets, sort=True)
+        if 'Close' in rows.columns:
+            spec = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+            bars = grouped.agg({col: how for col, how in spec.items() if col in rows.columns})
+        else:
+            bars = grouped['Price'].agg(Open='first', High='max', Low='min', Close='last')
+            if 'Volume' in rows.columns:
+                bars['Volume'] = grouped['Volume'].sum()
+        bars.index.name = 'Date'
+        return bars.reset_index()
+
+    def _merge_partial(self, bars):
+        """Fold the held-back partial bar into the first bar when they cover the same period"""
+        partial = self.partial
+        if bars.empty:
+            return partial
+        if partial['Date'].iloc[0] != bars['Date'].iloc[0]:
+            return pd.concat([partial, bars], ignore_index=True)
+        bars = bars.copy()
+        bars.loc[0, 'Open'] = partial['Open'].iloc[0]
+        bars.loc[0, 'High'] = max(bars['High'].iloc[0], partial['High'].iloc[0])
+        bars.loc[0, 'Low'] = min(bars['Low'].iloc[0], partial['Low'].iloc[0])
+        if 'Volume' in bars.columns:
+            bars.loc[0, 'Volume'] = bars['Volume'].iloc[0] + partial['Volume'].iloc[0]
+        return bars
+
+    def feed(self, chunk):
+        """Add a chunk of rows and return the bars it completed"""
+        bars = self._aggregate(chunk) if not chunk.empty else pd.DataFrame()
+        if self.partial is not None:
+            bars = self._merge_partial(bars)
+        if bars.empty:
+            return bars
+        self.partial = bars.iloc[-1:].reset_index(drop=True)
+        return bars.iloc[:-1]
+
+    def flush(self):
+        """Return the final, possibly partial, bar"""
+        bars = self.partial if self.partial is not None else pd.DataFrame()
+        self.partial = None
+        return bars
+
+
+class IndicatorCarry:
+    """Compute indicators for consecutive batches of bars as if they were one series.
+
+    Keeps the last WARMUP_BARS closes and prepends them to the next batch, so the
+    rolling windows continue across batch boundaries and the output matches a
+    single pass over the whole history.
+    """
+
+    def __init__(self):
+        self.tail = np.array([], dtype=float)
+
+    def process(self, bars):
+        if bars.empty:
+            return bars
+        closes = np.concatenate([self.tail, bars['Close'].to_numpy(dtype=float)])
+        panel = compute_indicator_panel(pd.DataFrame({'Close': closes}))
+        bars = bars.reset_index(drop=True)
+        for name, values in panel.items():
+            bars[name] = values['Close'].to_numpy()[len(self.tail):]
+        self.tail = closes[-WARMUP_BARS:]
+        return bars
+
+
+class IndicatorWriter:
+    """Append indicator rows to a CSV or Parquet file as they are produced"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.is_parquet = self.path.suffix.lower() == '.parquet'
+        self._parquet_writer = None
+        self._wrote_csv_header = False
+        self.rows = 0
+
+    def write(self, frame):
+        if frame.empty:
+            return
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='a' if self._wrote_csv_header else 'w',
+                         header=not self._wrote_csv_header, index=False)
+            self._wrote_csv_header = True
+        self.rows += len(frame)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+
+class RunningSummary:
+    """High/low, first/last bar and latest indicators, updated one batch at a time"""
+
+    def __init__(self):
+        self.bars = 0
+        self.first = None
+        self.last = None
+        self.high = None
+        self.low = None
+
+    def update(self, bars):
+        if bars.empty:
+            return
+        self.bars += len(bars)
+        if self.first is None:
+            self.first = bars.iloc[0]
+        self.last = bars.iloc[-1]
+        high = bars.loc[bars['Close'].idxmax()]
+        low = bars.loc[bars['Close'].idxmin()]
+        if self.high is None or high['Close'] > self.high['Close']:
+            self.high = high
+        if self.low is None or low['Close'] < self.low['Close']:
+            self.low = low
+
+    def to_dict(self):
+        if self.bars == 0:
+            return {'bars': 0}
+        start, end = float(self.first['Close']), float(self.last['Close'])
+        return {
+            'bars': self.bars,
+            'start_date': str(self.first['Date']),
+            'end_date': str(self.last['Date']),
+            'start_price': start,
+            'end_price': end,
+            'change_pct': (end / start - 1) * 100 if start > 0 else 0.0,
+            'high': float(self.high['Close']),
+            'high_date': str(self.high['Date']),
+            'low': float(self.low['Close']),
+            'low_date': str(self.low['Date']),
+            'latest': {name: float(self.last[name]) for name in self.last.index
+                       if name not in ('Date', 'Open', 'High', 'Low', 'Close', 'Volume')},
+        }
+
+
+def process_intraday_file(source, output, bar_size='1min', chunk_rows=DEFAULT_CHUNK_ROWS, time_column='Date'):
+    """Resample a large tick/bar file and write indicators without loading it into memory.
+
+    Reads `source` (CSV or Parquet, sorted by time) in chunks of `chunk_rows`,
+    resamples to `bar_size` (a fixed pandas frequency such as '1min', '15min',
+    '1h'), computes the technical indicators with state carried across chunks,
+    and appends the resulting bars to `output` (CSV or Parquet). Peak memory
+    depends on the chunk size, not on the file size. Returns a summary of the run.
+    """
+    resampler = BarResampler(bar_size, time_column)
+    carry = IndicatorCarry()
+    writer = IndicatorWriter(output)
+    summary = RunningSummary()
+    try:
+        for chunk in iter_source_chunks(source, chunk_rows, time_column):
+            bars = carry.process(resampler.feed(chunk))
+            writer.write(bars)
+            summary.update(bars)
+        bars = carry.process(resampler.flush())
+        writer.write(bars)
+        summary.update(bars)
+    finally:
+        writer.close()
+    return summary.to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute indicators over large intraday/tick files in bounded memory.")
+    parser.add_argument('source', help="CSV or Parquet file of ticks (Price[, Volume]) or OHLCV bars, sorted by time")
+    parser.add_argument('output', help="CSV or Parquet file to write bars with indicators to")
+    parser.add_argument('--bar-size', default='1min', help="Bar size as a pandas frequency, e.g. 1min, 15min, 1h")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="Input rows read per chunk")
+    parser.add_argument('--time-column', default='Date', help="Name of the timestamp column")
+    args = parser.parse_args()
+
+    summary = process_intraday_file(args.source, args.output, args.bar_size, args.chunk_rows, args.time_column)
+    print(f"Wrote {summary['bars']} bars to {Path(args.output).resolve()}")
+    if summary['bars']:
+        print(f"Range: {summary['start_date']} to {summary['end_date']}, "
+              f"change {summary['change_pct']:.2f}%, high {summary['high']:.2f}, low {summary['low']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
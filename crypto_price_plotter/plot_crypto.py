@@ -1,419 +1,693 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import yfinance as yf
-import numpy as np
+# Only the standard library is imported at module level. Each subcommand imports the
+# heavy packages it needs (pandas, matplotlib, yfinance, scipy) when it runs, so small
+# jobs such as `report` start in milliseconds.
 from datetime import datetime, timedelta
-import matplotlib.dates as mdates
+import argparse
+import hashlib
+import json
+import logging
 import os
-from scipy import stats
+import sys
+import time
+from pathlib import Path
 
-# Set matplotlib to non-interactive mode to prevent GUI popup
-plt.ioff()
+from instrumentation import StageMetrics, measure
 
-def get_crypto_price_data(symbol, start_date, end_date):
-    # Yahoo Finance ticker format for crypto
-    ticker = f"{symbol}-USD"
+logger = logging.getLogger(__name__)
+
+SYMBOLS = ("BTC", "ETH")
+# First day of the analysed period; the report is labelled with the year when it starts on Jan 1
+START_DATE = "2024-01-01"
+# Extra history fetched before the start date so the moving averages are already warmed up
+CONTEXT_DAYS = 60
+# Seconds between refreshes in watch mode
+WATCH_INTERVAL_SECONDS = 300
+# Local OHLCV cache so repeated runs only download bars that are not stored yet
+CACHE_DIR = Path(__file__).parent / "cache"
+# Serve price data purely from the cache without contacting Yahoo Finance
+OFFLINE_MODE = False
+# Window (in days) for the rolling return correlation
+CORRELATION_WINDOW = 30
+# Chart output settings: resolution, file format ('png', 'svg' or 'webp') and rendering processes (None = all cores)
+CHART_DPI = 300
+CHART_FORMAT = 'png'
+RENDER_WORKERS = None
+# Per-stage timing/memory metrics: file to append them to (.csv or .json, None = off) and whether to print a table
+METRICS_FILE = None
+SHOW_METRICS = False
+# Record peak memory (tracemalloc) instead of timings; tracing slows the run, so the two are measured separately
+TRACK_MEMORY = False
+# Use deterministic synthetic prices instead of Yahoo Finance (offline demos and benchmarking)
+SYNTHETIC_DATA = False
+
+def download_price_data(ticker, start_date, end_date, interval="1d"):
+    """Download bars from Yahoo Finance as a flat frame with a Date column"""
+    import pandas as pd
+    import yfinance as yf
     
-    # Download data from Yahoo Finance
-    data = yf.download(ticker, start=start_date, end=end_date)
+    data = yf.download(ticker, start=start_date, end=end_date, interval=interval, progress=False)
+    if data is None or data.empty:
+        return pd.DataFrame()
     
-    # Reset index to make Date a column
-    data = data.reset_index()
+    # Newer yfinance versions return (field, ticker) column pairs even for one ticker
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
     
-    # Include all available price data
+    # Reset index to make Date a column (intraday intervals call it Datetime)
+    data = data.reset_index().rename(columns={'Datetime': 'Date'})
+    if getattr(data['Date'].dt, 'tz', None) is not None:
+        data['Date'] = data['Date'].dt.tz_localize(None)
     return data
 
-def format_date(timestamp):
-    """Helper function to format pandas timestamp"""
-    if hasattr(timestamp, 'to_pydatetime'):
-        return timestamp.to_pydatetime().strftime('%Y-%m-%d')
-    return str(timestamp)[:10]  # Fallback to string slicing
+def get_crypto_price_data(symbol, start_date, end_date, interval="1d", cache_dir=None, offline=None):
+    import pandas as pd
+    from price_cache import load_cached_prices, save_cached_prices, append_cached_prices, changed_bars, merge_prices
+    
+    # Yahoo Finance ticker format for crypto
+    ticker = f"{symbol}-USD"
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    offline = OFFLINE_MODE if offline is None else offline
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    
+    cached = load_cached_prices(cache_dir, ticker, interval)
+    
+    if not offline:
+        if cached is None or cached.empty:
+            data = download_price_data(ticker, start, end, interval)
+            if not data.empty:
+                save_cached_prices(data, cache_dir, ticker, interval)
+        else:
+            first_cached = cached['Date'].iloc[0]
+            last_cached = cached['Date'].iloc[-1]
+            data = cached
+            if start < first_cached:
+                # Earlier history changes the whole file; rewrite it
+                data = merge_prices([data, download_price_data(ticker, start, first_cached, interval)])
+                save_cached_prices(data, cache_dir, ticker, interval)
+            # Refetch from the last cached bar because it may have been incomplete when stored;
+            # only new or revised bars are appended to the cache
+            if last_cached < end:
+                new_bars = changed_bars(cached, download_price_data(ticker, last_cached, end, interval))
+                if not new_bars.empty:
+                    append_cached_prices(new_bars, cache_dir, ticker, interval)
+                    data = merge_prices([data, new_bars])
+    elif cached is None:
+        print(f"No cached data for {ticker} ({interval}) in offline mode.")
+        return pd.DataFrame()
+    else:
+        data = cached
+    
+    if data.empty:
+        return data
+    
+    # Yahoo Finance treats the end date as exclusive; keep the same contract for cached data
+    in_range = (data['Date'] >= start) & (data['Date'] < end)
+    return data.loc[in_range].reset_index(drop=True)
 
-def add_technical_indicators(df):
-    """Add technical indicators to the dataframe"""
-    # Calculate daily returns
-    df['daily_return'] = df['Close'].pct_change() * 100
+def update_crypto_price_data(symbol, data, end_date, interval="1d", cache_dir=None):
+    """Bring a price frame from get_crypto_price_data up to date without reading or rewriting the whole cache.
     
-    # Calculate moving averages
-    df['MA_20'] = df['Close'].rolling(window=20).mean()
-    df['MA_50'] = df['Close'].rolling(window=50).mean()
+    Downloads the bars from the frame's last one on, appends only the new or
+    revised ones to the cache and returns the updated frame, or `data` itself
+    when nothing changed.
+    """
+    import pandas as pd
+    from price_cache import append_cached_prices, changed_bars
     
-    # Calculate Relative Strength Index (RSI)
-    delta = df['Close'].diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+    if data.empty or OFFLINE_MODE:
+        return data
+    ticker = f"{symbol}-USD"
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    end = pd.Timestamp(end_date)
+    last = data['Date'].iloc[-1]
+    if last >= end:
+        return data
+    new_bars = changed_bars(data, download_price_data(ticker, last, end, interval))
+    if new_bars.empty:
+        return data
+    append_cached_prices(new_bars, cache_dir, ticker, interval)
+    head = data.iloc[:data['Date'].searchsorted(new_bars['Date'].iloc[0])]
+    rest = data.iloc[len(head):]
+    # Revised bars replace their old rows; bars after them that did not change are kept
+    rest = rest[~rest['Date'].isin(new_bars['Date'])]
+    merged = pd.concat([head, new_bars, rest], ignore_index=True)
+    if not rest.empty:
+        merged = merged.sort_values('Date', kind='stable').reset_index(drop=True)
+    return merged
+
+def period_labels(start_date):
+    """Names used in titles, the report and output files for a period starting at `start_date`"""
+    start = datetime.strptime(str(start_date)[:10], "%Y-%m-%d")
+    if start.month == 1 and start.day == 1:
+        return {'label': str(start.year), 'title': f"in {start.year}",
+                'start_label': start.strftime("%b %Y"), 'suffix': str(start.year)}
+    return {'label': f"{start:%Y-%m-%d} to date", 'title': f"since {start:%Y-%m-%d}",
+            'start_label': start.strftime("%b %d, %Y"), 'suffix': start.strftime("%Y%m%d")}
+
+def _extended_start(start_date):
+    """First date fetched: CONTEXT_DAYS before the analysed period, so the moving averages are warmed up"""
+    return (datetime.strptime(str(start_date)[:10], "%Y-%m-%d") - timedelta(days=CONTEXT_DAYS)).strftime("%Y-%m-%d")
+
+def fetch_price_history(start_date, end_date, symbols=SYMBOLS, metrics=None, synthetic=None):
+    """Price frames for every symbol, starting CONTEXT_DAYS before `start_date` (end exclusive)"""
+    synthetic = SYNTHETIC_DATA if synthetic is None else synthetic
+    if synthetic:
+        from synthetic import synthetic_price_data as fetch
+    else:
+        fetch = get_crypto_price_data
+    extended_start = _extended_start(start_date)
+    end = str(end_date)[:10]
+    frames = {}
+    for symbol in symbols:
+        with measure(metrics, 'fetch', symbol) as record:
+            frames[symbol] = fetch(symbol, extended_start, end)
+            record['rows'] = len(frames[symbol])
+    return frames
+
+def compute_correlation(frames):
+    """Price/return correlation summary for the first two symbols and the full return correlation matrix"""
+    import numpy as np
+    from correlation import correlation_matrix, rolling_correlation
+    from indicators import build_price_matrix
     
-    avg_gain = gain.rolling(window=14).mean()
-    avg_loss = loss.rolling(window=14).mean()
+    a, b = list(frames)[:2]
+    try:
+        price_corr_matrix = correlation_matrix(build_price_matrix(frames, 'Close'))
+        return_matrix = build_price_matrix(frames, 'daily_return')
+        return_corr_matrix = correlation_matrix(return_matrix)
+        
+        # Rolling return correlation over time
+        rolling_corr = rolling_correlation(return_matrix, CORRELATION_WINDOW)[:, 0, 1]
+        rolling_corr = rolling_corr[~np.isnan(rolling_corr)]
+        
+        correlation = {
+            'price': float(price_corr_matrix.loc[a, b]),
+            'returns': float(return_corr_matrix.loc[a, b]),
+            'rolling_window': CORRELATION_WINDOW,
+        }
+        if len(rolling_corr) > 0:
+            correlation.update(rolling_latest=float(rolling_corr[-1]),
+                               rolling_min=float(rolling_corr.min()),
+                               rolling_max=float(rolling_corr.max()))
+    except Exception:
+        correlation = {}
+        return_corr_matrix = None
+        logger.exception("Error calculating correlation; continuing without it")
+    return correlation, return_corr_matrix
+
+def chart_jobs(frames, labels, return_corr_matrix=None):
+    """Chart jobs for the period's indicator frames: prices/volatility, one technical chart per symbol and the heatmap"""
+    from rendering import price_volatility_job, technical_jobs, heatmap_job
+    from symbols import SYMBOL_NAMES
     
-    # Avoid division by zero
-    avg_loss = avg_loss.replace(0, 0.00001)
+    names = " and ".join(SYMBOL_NAMES.get(symbol, symbol) for symbol in list(frames)[:2])
+    jobs = [
+        price_volatility_job(frames, f"crypto_prices_analysis_{labels['suffix']}",
+                             f"{names} Prices {labels['title']} with Moving Averages"),
+    ]
+    # One technical chart per symbol so they render in parallel
+    jobs += technical_jobs(frames, f"crypto_technical_analysis_{labels['suffix']}")
+    if return_corr_matrix is not None:
+        jobs.append(heatmap_job(return_corr_matrix, f"crypto_correlation_heatmap_{labels['suffix']}"))
+    return jobs
+
+def analyze(full_data, start_date, metrics=None, charts=True, insights=True):
+    """Chart jobs and/or the insights report for indicator frames, restricted to the period from `start_date`"""
+    import pandas as pd
     
-    rs = avg_gain / avg_loss
-    df['RSI'] = 100 - (100 / (1 + rs))
+    labels = period_labels(start_date)
+    frames = {symbol: df[df['Date'] >= pd.Timestamp(start_date)] for symbol, df in full_data.items()}
+    with measure(metrics, 'correlation') as record:
+        correlation, return_corr_matrix = compute_correlation(frames)
+        record['rows'] = max(len(df) for df in frames.values())
+    analysis = {'insights_file': f"crypto_insights_{labels['suffix']}.txt",
+                'report_file': f"crypto_insights_{labels['suffix']}.json"}
     
-    # Calculate volatility (standard deviation of returns)
-    df['volatility_20d'] = df['daily_return'].rolling(window=20).std()
+    if charts:
+        analysis['chart_jobs'] = chart_jobs(frames, labels, return_corr_matrix)
     
-    # Calculate Bollinger Bands
-    df['bollinger_mid'] = df['Close'].rolling(window=20).mean()
-    df['bollinger_std'] = df['Close'].rolling(window=20).std()
-    df['bollinger_upper'] = df['bollinger_mid'] + 2 * df['bollinger_std']
-    df['bollinger_lower'] = df['bollinger_mid'] - 2 * df['bollinger_std']
+    if insights:
+        from summary import summarize_frames, build_report, render_insights
+        
+        # Insights from one summary pass over all symbols
+        with measure(metrics, 'summary') as record:
+            analysis['report'] = build_report(summarize_frames(frames), labels['label'], labels['start_label'], correlation)
+            analysis['insights'] = render_insights(analysis['report'])
+            record['rows'] = max(len(df) for df in frames.values())
+    return analysis
+
+def write_insights(analysis):
+    """Save the text insights and the structured report; returns both paths"""
+    from summary import save_report
     
-    return df
+    with open(analysis['insights_file'], 'w') as f:
+        f.write('\n'.join(analysis['insights']))
+    save_report(analysis['report'], analysis['report_file'])
+    return analysis['insights_file'], analysis['report_file']
 
-def analyze_price_trend(prices, window=30):
-    """Analyze the recent price trend using linear regression"""
-    try:
-        if len(prices) < window:
-            return "Insufficient data"
-        
-        # Get the last 'window' days of data
-        recent_prices = prices[-window:].astype(float)
-        
-        # Create an array of x values (0, 1, 2, ...)
-        x = np.arange(len(recent_prices))
-        
-        # Perform linear regression
-        slope, intercept, r_value, p_value, std_err = stats.linregress(x, recent_prices)
-        
-        # Annualize the slope (rough estimate of annual return if trend continues)
-        annual_rate = (slope * 365 / window) * (100 / recent_prices[0])
-        
-        # Determine trend strength and direction
-        if p_value > 0.05:
-            trend = "No clear trend"
-        elif slope > 0:
-            if r_value > 0.8:
-                trend = f"Strong uptrend (projected annual return: {annual_rate:.1f}%)"
-            else:
-                trend = f"Moderate uptrend (projected annual return: {annual_rate:.1f}%)"
+def _fingerprint(value):
+    """Content hash of chart job data or a report, to tell whether an output needs regenerating"""
+    import numpy as np
+    
+    digest = hashlib.sha256()
+    
+    def feed(item):
+        if isinstance(item, dict):
+            for key in sorted(item):
+                feed(key)
+                feed(item[key])
+        elif isinstance(item, (list, tuple)):
+            for element in item:
+                feed(element)
+        elif isinstance(item, np.ndarray):
+            digest.update(np.ascontiguousarray(item).tobytes())
         else:
-            if r_value > 0.8:
-                trend = f"Strong downtrend (projected annual return: {annual_rate:.1f}%)"
-            else:
-                trend = f"Moderate downtrend (projected annual return: {annual_rate:.1f}%)"
-        
-        return trend
-    except Exception as e:
-        print(f"Error in trend analysis: {e}")
-        return "Trend analysis unavailable"
+            digest.update(repr(item).encode())
+    
+    feed(value)
+    return digest.hexdigest()
 
-def main():
+def main(start_date=START_DATE, metrics_file=METRICS_FILE, show_metrics=SHOW_METRICS, synthetic=SYNTHETIC_DATA,
+         charts=True, insights=True, track_memory=TRACK_MEMORY):
+    """Run the analysis once (charts and/or insights); returns a process exit code"""
+    metrics = StageMetrics(track_memory) if metrics_file or show_metrics else None
     try:
         print("Starting comprehensive crypto price analysis...")
         
-        # Time period for 2024 (from Jan 1, 2024 to current date)
-        start_date = "2024-01-01"
+        # Analysed period runs from start_date to the current date
         today_date = datetime.now().date()
         
-        # For more context, get data from slightly before 2024
-        extended_start = (datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=60)).strftime("%Y-%m-%d")
+        # For more context, get data from slightly before the start date
+        print(f"Fetching data from {_extended_start(start_date)} to {today_date}...")
         
-        print(f"Fetching data from {extended_start} to {today_date}...")
+        full_data = fetch_price_history(start_date, today_date, metrics=metrics, synthetic=synthetic)
         
-        # Get data for Bitcoin and Ethereum
-        btc_full_data = get_crypto_price_data("BTC", extended_start, today_date.strftime("%Y-%m-%d"))
-        eth_full_data = get_crypto_price_data("ETH", extended_start, today_date.strftime("%Y-%m-%d"))
-        
-        if btc_full_data.empty or eth_full_data.empty:
+        if any(df.empty for df in full_data.values()):
             print("Failed to fetch data.")
-            return
-        
-        # Add technical indicators
-        btc_full_data = add_technical_indicators(btc_full_data)
-        eth_full_data = add_technical_indicators(eth_full_data)
-        
-        # Filter to just 2024 data for main analysis
-        btc_data = btc_full_data[btc_full_data['Date'] >= pd.Timestamp(start_date)]
-        eth_data = eth_full_data[eth_full_data['Date'] >= pd.Timestamp(start_date)]
-        
-        print("Generating price charts...")
-        
-        # Create figure and plot data - Price chart
-        plt.figure(figsize=(14, 10))
-        
-        # Plot 1: Price with Moving Averages
-        ax1 = plt.subplot(2, 1, 1)
-        ax1.plot(btc_data['Date'], btc_data['Close'], 'b-', label='Bitcoin (USD)')
-        ax1.plot(btc_data['Date'], btc_data['MA_20'], 'g--', label='BTC 20-day MA')
-        ax1.plot(btc_data['Date'], btc_data['MA_50'], 'r--', label='BTC 50-day MA')
-        ax1.set_ylabel('Bitcoin Price (USD)', color='b')
-        ax1.tick_params(axis='y', labelcolor='b')
-        ax1.set_title('Bitcoin and Ethereum Prices in 2024 with Moving Averages')
-        ax1.grid(True, alpha=0.3)
-        ax1.legend(loc='upper left')
-        
-        # Create a second y-axis for Ethereum
-        ax2 = ax1.twinx()
-        ax2.plot(eth_data['Date'], eth_data['Close'], 'r-', label='Ethereum (USD)')
-        ax2.set_ylabel('Ethereum Price (USD)', color='r')
-        ax2.tick_params(axis='y', labelcolor='r')
-        
-        # Plot 2: Volatility Comparison
-        ax3 = plt.subplot(2, 1, 2)
-        ax3.plot(btc_data['Date'], btc_data['volatility_20d'], 'b-', label='BTC 20-day Volatility')
-        ax3.plot(eth_data['Date'], eth_data['volatility_20d'], 'r-', label='ETH 20-day Volatility')
-        ax3.set_ylabel('20-day Volatility (%)')
-        ax3.set_title('Volatility Comparison')
-        ax3.grid(True, alpha=0.3)
-        ax3.legend(loc='upper left')
-        
-        # Format x-axis to show dates nicely
-        first_date = btc_data['Date'].iloc[0].to_pydatetime().date()
-        date_range = (today_date - first_date).days
-        
-        for ax in [ax1, ax3]:
-            if date_range <= 90:  # Less than 3 months of data
-                ax.xaxis.set_major_locator(mdates.WeekdayLocator(interval=2))
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))
-            else:
-                ax.xaxis.set_major_locator(mdates.MonthLocator())
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%b'))
-            plt.setp(ax.xaxis.get_majorticklabels(), rotation=45)
-        
-        plt.tight_layout(pad=2.0)
-        
-        # Save the figure
-        plt.savefig('crypto_prices_analysis_2024.png', dpi=300)
-        print(f"Analysis chart saved to {os.path.abspath('crypto_prices_analysis_2024.png')}")
+            return 1
         
-        # Create Technical Analysis Figure
-        plt.figure(figsize=(14, 12))
-        
-        # BTC Technical Chart
-        ax1 = plt.subplot(2, 1, 1)
-        ax1.plot(btc_data['Date'], btc_data['Close'], 'b-', label='BTC Price')
-        ax1.plot(btc_data['Date'], btc_data['bollinger_upper'], 'g--', alpha=0.6)
-        ax1.plot(btc_data['Date'], btc_data['bollinger_mid'], 'g-', alpha=0.6)
-        ax1.plot(btc_data['Date'], btc_data['bollinger_lower'], 'g--', alpha=0.6)
-        ax1.fill_between(btc_data['Date'], btc_data['bollinger_upper'], btc_data['bollinger_lower'], color='g', alpha=0.1)
-        ax1.set_ylabel('Bitcoin Price (USD)')
-        ax1.set_title('Bitcoin Technical Analysis with Bollinger Bands')
-        ax1.grid(True, alpha=0.3)
-        
-        # ETH Technical Chart
-        ax2 = plt.subplot(2, 1, 2)
-        ax2.plot(eth_data['Date'], eth_data['Close'], 'r-', label='ETH Price')
-        ax2.plot(eth_data['Date'], eth_data['bollinger_upper'], 'g--', alpha=0.6)
-        ax2.plot(eth_data['Date'], eth_data['bollinger_mid'], 'g-', alpha=0.6)
-        ax2.plot(eth_data['Date'], eth_data['bollinger_lower'], 'g--', alpha=0.6)
-        ax2.fill_between(eth_data['Date'], eth_data['bollinger_upper'], eth_data['bollinger_lower'], color='g', alpha=0.1)
-        ax2.set_ylabel('Ethereum Price (USD)')
-        ax2.set_title('Ethereum Technical Analysis with Bollinger Bands')
-        ax2.grid(True, alpha=0.3)
-        
-        # Format x-axis
-        for ax in [ax1, ax2]:
-            if date_range <= 90:
-                ax.xaxis.set_major_locator(mdates.WeekdayLocator(interval=2))
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))
-            else:
-                ax.xaxis.set_major_locator(mdates.MonthLocator())
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%b'))
-            plt.setp(ax.xaxis.get_majorticklabels(), rotation=45)
-        
-        plt.tight_layout(pad=2.0)
-        
-        # Save the technical analysis figure
-        plt.savefig('crypto_technical_analysis_2024.png', dpi=300)
-        print(f"Technical chart saved to {os.path.abspath('crypto_technical_analysis_2024.png')}")
-        
-        # Generate advanced insights
-        print("\nGenerating comprehensive insights...")
-        
-        # Safe extraction of values
-        def safe_float(series, idx):
-            try:
-                val = series.iloc[idx]
-                return float(val) if pd.notna(val) else 0.0
-            except:
-                return 0.0
-        
-        # Basic price metrics
-        btc_start = safe_float(btc_data['Close'], 0)
-        btc_end = safe_float(btc_data['Close'], -1)
-        btc_change_pct = ((btc_end / btc_start) - 1) * 100 if btc_start > 0 else 0
-        
-        eth_start = safe_float(eth_data['Close'], 0)
-        eth_end = safe_float(eth_data['Close'], -1)
-        eth_change_pct = ((eth_end / eth_start) - 1) * 100 if eth_start > 0 else 0
-        
-        # Volatility analysis
-        btc_recent_volatility = safe_float(btc_data['volatility_20d'], -1)
-        eth_recent_volatility = safe_float(eth_data['volatility_20d'], -1)
-        volatility_ratio = btc_recent_volatility / eth_recent_volatility if eth_recent_volatility > 0 else "N/A"
+        # Add technical indicators for all symbols in one pass over the price matrix
+        with measure(metrics, 'indicators') as record:
+            from indicators import add_technical_indicators_batch
+            
+            full_data = add_technical_indicators_batch(full_data)
+            record['rows'] = sum(len(df) for df in full_data.values())
         
-        # Find max and min values safely
-        try:
-            btc_max = float(btc_data['Close'].max())
-            btc_max_idx = btc_data['Close'].idxmax()
-            btc_max_date = format_date(btc_data['Date'].iloc[btc_max_idx % len(btc_data)])
-        except Exception as e:
-            print(f"Error getting BTC max: {e}")
-            btc_max = btc_end
-            btc_max_date = "unknown"
+        analysis = analyze(full_data, start_date, metrics, charts=charts, insights=insights)
         
-        try:
-            btc_min = float(btc_data['Close'].min())
-            btc_min_idx = btc_data['Close'].idxmin()
-            btc_min_date = format_date(btc_data['Date'].iloc[btc_min_idx % len(btc_data)])
-        except Exception as e:
-            print(f"Error getting BTC min: {e}")
-            btc_min = btc_start
-            btc_min_date = "unknown"
+        if charts:
+            print("Generating charts...")
             
-        try:
-            eth_max = float(eth_data['Close'].max())
-            eth_max_idx = eth_data['Close'].idxmax()
-            eth_max_date = format_date(eth_data['Date'].iloc[eth_max_idx % len(eth_data)])
-        except Exception as e:
-            print(f"Error getting ETH max: {e}")
-            eth_max = eth_end
-            eth_max_date = "unknown"
+            # Charts render in parallel worker processes
+            with measure(metrics, 'charts') as record:
+                from rendering import render_charts
+                
+                chart_paths = render_charts(analysis['chart_jobs'], dpi=CHART_DPI, fmt=CHART_FORMAT, workers=RENDER_WORKERS)
+                record['rows'] = len(chart_paths)
+            for chart_path in chart_paths:
+                print(f"Chart saved to {os.path.abspath(chart_path)}")
+        
+        if insights:
+            print("\nGenerating comprehensive insights...")
             
-        try:
-            eth_min = float(eth_data['Close'].min())
-            eth_min_idx = eth_data['Close'].idxmin()
-            eth_min_date = format_date(eth_data['Date'].iloc[eth_min_idx % len(eth_data)])
-        except Exception as e:
-            print(f"Error getting ETH min: {e}")
-            eth_min = eth_start
-            eth_min_date = "unknown"
-        
-        # Trend analysis
-        btc_trend = analyze_price_trend(btc_data['Close'].values)
-        eth_trend = analyze_price_trend(eth_data['Close'].values)
-        
-        # Technical signals
-        btc_ma_signal = "Bullish" if btc_end > safe_float(btc_data['MA_50'], -1) else "Bearish"
-        eth_ma_signal = "Bullish" if eth_end > safe_float(eth_data['MA_50'], -1) else "Bearish"
-        
-        btc_rsi = safe_float(btc_data['RSI'], -1)
-        eth_rsi = safe_float(eth_data['RSI'], -1)
-        
-        btc_rsi_signal = "Oversold (buying opportunity)" if btc_rsi < 30 else "Overbought (selling opportunity)" if btc_rsi > 70 else "Neutral"
-        eth_rsi_signal = "Oversold (buying opportunity)" if eth_rsi < 30 else "Overbought (selling opportunity)" if eth_rsi > 70 else "Neutral"
-        
-        # Trading range analysis
-        btc_trading_range = (btc_max - btc_min) / btc_min * 100 if btc_min > 0 else 0
-        eth_trading_range = (eth_max - eth_min) / eth_min * 100 if eth_min > 0 else 0
-        
-        # Current position within range
-        btc_range_position = (btc_end - btc_min) / (btc_max - btc_min) * 100 if (btc_max - btc_min) > 0 else 50
-        eth_range_position = (eth_end - eth_min) / (eth_max - eth_min) * 100 if (eth_max - eth_min) > 0 else 50
-        
-        # Calculate correlation
-        try:
-            # Prepare data for correlation by aligning dates
-            merged = pd.merge(btc_data, eth_data, on='Date', suffixes=('_btc', '_eth'))
-            price_correlation = float(merged['Close_btc'].corr(merged['Close_eth']))
-            return_correlation = float(merged['daily_return_btc'].corr(merged['daily_return_eth']))
-        except Exception as e:
-            price_correlation = return_correlation = "Could not calculate"
-            print(f"Error calculating correlation: {e}")
-        
-        # Generate investment recommendations
-        btc_outlook = "Positive" if btc_trend.startswith("Strong uptrend") or btc_trend.startswith("Moderate uptrend") else "Negative" if btc_trend.startswith("Strong downtrend") or btc_trend.startswith("Moderate downtrend") else "Neutral"
-        eth_outlook = "Positive" if eth_trend.startswith("Strong uptrend") or eth_trend.startswith("Moderate uptrend") else "Negative" if eth_trend.startswith("Strong downtrend") or eth_trend.startswith("Moderate downtrend") else "Neutral"
-        
-        # Relative strength comparison
-        relative_strength = btc_change_pct - eth_change_pct
-        stronger_asset = "Bitcoin" if relative_strength > 0 else "Ethereum" if relative_strength < 0 else "Equal"
-        
-        # Create insights text
-        insights = []
-        insights.append("# Comprehensive Cryptocurrency Analysis for 2024")
-        insights.append("\n## Price Performance")
-        insights.append(f"BTC Starting Price (Jan 2024): ${btc_start:.2f}")
-        insights.append(f"BTC Current Price: ${btc_end:.2f}")
-        insights.append(f"BTC Price Change: {btc_change_pct:.2f}%")
-        
-        insights.append(f"\nETH Starting Price (Jan 2024): ${eth_start:.2f}")
-        insights.append(f"ETH Current Price: ${eth_end:.2f}")
-        insights.append(f"ETH Price Change: {eth_change_pct:.2f}%")
-        
-        insights.append(f"\nRelative Strength: {stronger_asset} has outperformed by {abs(relative_strength):.2f}%")
-        
-        insights.append("\n## Technical Analysis")
-        insights.append(f"BTC Trend Assessment: {btc_trend}")
-        insights.append(f"ETH Trend Assessment: {eth_trend}")
-        
-        insights.append(f"\nBTC 50-day Moving Average Signal: {btc_ma_signal}")
-        insights.append(f"ETH 50-day Moving Average Signal: {eth_ma_signal}")
-        
-        insights.append(f"\nBTC RSI (14-day): {btc_rsi:.2f} - {btc_rsi_signal}")
-        insights.append(f"ETH RSI (14-day): {eth_rsi:.2f} - {eth_rsi_signal}")
-        
-        insights.append("\n## Volatility Analysis")
-        insights.append(f"BTC Recent Volatility (20-day): {btc_recent_volatility:.2f}%")
-        insights.append(f"ETH Recent Volatility (20-day): {eth_recent_volatility:.2f}%")
-        if isinstance(volatility_ratio, float):
-            insights.append(f"BTC/ETH Volatility Ratio: {volatility_ratio:.2f}x")
-        
-        insights.append("\n## Price Range Analysis")
-        insights.append(f"BTC 2024 High: ${btc_max:.2f} on {btc_max_date}")
-        insights.append(f"BTC 2024 Low: ${btc_min:.2f} on {btc_min_date}")
-        insights.append(f"BTC Trading Range: {btc_trading_range:.2f}%")
-        insights.append(f"BTC Current Position in Range: {btc_range_position:.2f}% (0%=at low, 100%=at high)")
-        
-        insights.append(f"\nETH 2024 High: ${eth_max:.2f} on {eth_max_date}")
-        insights.append(f"ETH 2024 Low: ${eth_min:.2f} on {eth_min_date}")
-        insights.append(f"ETH Trading Range: {eth_trading_range:.2f}%")
-        insights.append(f"ETH Current Position in Range: {eth_range_position:.2f}% (0%=at low, 100%=at high)")
-        
-        insights.append("\n## Correlation Analysis")
-        if isinstance(price_correlation, float):
-            insights.append(f"Price Correlation: {price_correlation:.4f} (1=perfect correlation, 0=no correlation, -1=perfect inverse)")
-        if isinstance(return_correlation, float):
-            insights.append(f"Daily Return Correlation: {return_correlation:.4f}")
-        
-        insights.append("\n## Investment Outlook")
-        insights.append(f"Bitcoin Outlook: {btc_outlook}")
-        insights.append(f"Ethereum Outlook: {eth_outlook}")
-        
-        insights.append("\n## Key Observations and Recommendations")
+            # Print insights
+            for line in analysis['insights']:
+                print(line)
+            
+            with measure(metrics, 'write_insights'):
+                insights_file, report_file = write_insights(analysis)
+            print(f"\nComprehensive insights saved to {os.path.abspath(insights_file)}")
+            print(f"Structured insights saved to {os.path.abspath(report_file)}")
         
-        # Add custom recommendations based on analysis
-        if btc_outlook == "Positive" and eth_outlook == "Positive":
-            insights.append("• Both cryptocurrencies show positive momentum; consider maintaining positions in both.")
-        elif btc_outlook == "Positive" and eth_outlook != "Positive":
-            insights.append("• Bitcoin shows stronger performance; consider overweighting BTC in your portfolio.")
-        elif btc_outlook != "Positive" and eth_outlook == "Positive":
-            insights.append("• Ethereum shows stronger performance; consider overweighting ETH in your portfolio.")
+        print("\nAnalysis complete!")
+        return 0
+    
+    except Exception:
+        failed = [r['stage'] for r in metrics.records if r['status'] == 'error'] if metrics else []
+        logger.exception("Analysis failed" + (f" in stage '{failed[0]}'" if failed else ""))
+        return 1
+    
+    finally:
+        if metrics is not None:
+            metrics.close()
+            if show_metrics:
+                print()
+                for line in metrics.summary_table():
+                    print(line)
+            if metrics_file:
+                metrics.save(metrics_file)
+                print(f"Metrics appended to {os.path.abspath(metrics_file)}")
+
+def fetch_command(start_date=START_DATE, synthetic=SYNTHETIC_DATA):
+    """Bring the local price cache up to date and report what it holds"""
+    today_date = datetime.now().date()
+    full_data = fetch_price_history(start_date, today_date, synthetic=synthetic)
+    for symbol, df in full_data.items():
+        if df.empty:
+            print(f"{symbol}: no data")
         else:
-            insights.append("• Both assets show caution signals; consider reducing exposure or implementing hedging strategies.")
-        
-        if btc_rsi < 30 or eth_rsi < 30:
-            insights.append("• Oversold conditions present potential buying opportunities.")
-        elif btc_rsi > 70 or eth_rsi > 70:
-            insights.append("• Overbought conditions suggest caution with new positions.")
-        
-        if isinstance(return_correlation, float) and return_correlation < 0.5:
-            insights.append("• Lower correlation between assets suggests diversification benefits.")
-        
-        if btc_range_position > 80 or eth_range_position > 80:
-            insights.append("• Current prices are near the high end of the trading range; consider taking partial profits.")
-        elif btc_range_position < 20 or eth_range_position < 20:
-            insights.append("• Current prices are near the low end of the trading range; potential value entry points.")
-        
-        # Print insights
-        for line in insights:
-            print(line)
-        
-        # Save insights to a file
-        insights_file = 'crypto_insights_2024.txt'
-        with open(insights_file, 'w') as f:
-            f.write('\n'.join(insights))
-        
-        print(f"\nComprehensive insights saved to {os.path.abspath(insights_file)}")
+            print(f"{symbol}: {len(df)} bars from {df['Date'].iloc[0]:%Y-%m-%d} to {df['Date'].iloc[-1]:%Y-%m-%d}")
+    return 0 if all(not df.empty for df in full_data.values()) else 1
+
+def indicators_command(start_date=START_DATE, synthetic=SYNTHETIC_DATA):
+    """Print the latest close and indicator values for every symbol"""
+    from indicators import add_technical_indicators_batch
+    
+    full_data = fetch_price_history(start_date, datetime.now().date(), synthetic=synthetic)
+    if any(df.empty for df in full_data.values()):
+        print("Failed to fetch data.")
+        return 1
+    for symbol, df in add_technical_indicators_batch(full_data).items():
+        latest = df.iloc[-1]
+        print(f"{symbol} ({latest['Date']:%Y-%m-%d})")
+        for name in ['Close', 'MA_20', 'MA_50', 'RSI', 'volatility_20d', 'bollinger_upper', 'bollinger_lower']:
+            print(f"  {name:<16} {latest[name]:>14.2f}")
+    return 0
+
+def report_command(start_date=START_DATE, field=None):
+    """Print the saved insights, or one value of the saved JSON report (e.g. BTC.latest.RSI), without recomputing"""
+    labels = period_labels(start_date)
+    if field is None:
+        path = f"crypto_insights_{labels['suffix']}.txt"
+        if not os.path.exists(path):
+            print(f"No saved insights at {os.path.abspath(path)}; run the 'insights' command first.")
+            return 1
+        with open(path) as f:
+            print(f.read())
+        return 0
+    
+    path = f"crypto_insights_{labels['suffix']}.json"
+    if not os.path.exists(path):
+        print(f"No saved report at {os.path.abspath(path)}; run the 'insights' command first.")
+        return 1
+    with open(path) as f:
+        value = json.load(f)
+    # Symbol keys live under 'symbols'; allow BTC.end_price as a shorthand for symbols.BTC.end_price
+    if field.split('.')[0] in value.get('symbols', {}):
+        field = f"symbols.{field}"
+    for key in field.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            print(f"Field {field!r} not found in {path}")
+            return 1
+        value = value[key]
+    print(json.dumps(value, indent=2) if isinstance(value, (dict, list)) else value)
+    return 0
+
+class LiveAnalysis:
+    """Watch-mode version of analyze() that only processes the bars that changed.
+    
+    Bars dated before the last bar of every symbol are settled: their price
+    extremes, correlation sums and rolling-correlation range are folded into
+    running totals once. Each update recomputes only the bars from that point
+    on, plus the trailing windows the trend fit and the rolling correlation
+    look back over. Charts reuse an LTTB-downsampled copy of the settled
+    history and append the raw bars after it; the copy is rebuilt once
+    REDOWNSAMPLE_ROWS bars have piled up. A revision of a settled bar starts
+    over from the full history.
+    """
+    
+    REDOWNSAMPLE_ROWS = 50
+    
+    def __init__(self, start_date, dpi=CHART_DPI):
+        import pandas as pd
         
-        plt.close('all')  # Close all plots to free resources
-        print("\nAnalysis complete!")
+        self.start = pd.Timestamp(start_date)
+        self.labels = period_labels(start_date)
+        self.dpi = dpi
+        self.reset()
+    
+    def reset(self):
+        self.settled_until = None
+        self.extremes = None
+        self.correlations = None
+        self.rolling = {'latest': None, 'min': None, 'max': None}
+        self.chart_until = None
+        self.chart_prefix = {}
+    
+    @staticmethod
+    def _slice(frames, since=None, until=None, lookback=0):
+        """Rows of every frame dated in [since, until), plus `lookback` rows before `since`"""
+        sliced = {}
+        for symbol, df in frames.items():
+            dates = df['Date']
+            lo = 0 if since is None else max(0, dates.searchsorted(since) - lookback)
+            hi = len(df) if until is None else dates.searchsorted(until)
+            sliced[symbol] = df.iloc[lo:hi]
+        return sliced
+    
+    def _rolling_values(self, frames, since, until):
+        """Rolling return correlation of the first two symbols for the rows dated in [since, until)"""
+        import numpy as np
+        from correlation import rolling_correlation
+        from indicators import build_price_matrix
+        
+        lookback = CORRELATION_WINDOW - 1
+        returns = build_price_matrix(self._slice(frames, since, until, lookback), 'daily_return')
+        new_rows = len(returns) if since is None else len(returns) - returns.index.searchsorted(since)
+        if new_rows == 0:
+            return np.empty(0)
+        # Only the last `lookback` rows before `since` are complete; older ones do not reach the new rows
+        returns = returns.iloc[-(new_rows + lookback):]
+        values = rolling_correlation(returns, CORRELATION_WINDOW)[-new_rows:, 0, 1].astype(float)
+        return values[~np.isnan(values)]
+    
+    def _fold(self, frames, since, until):
+        """Add the settled rows dated in [since, until) to the running totals"""
+        from indicators import build_price_matrix
+        from summary import price_extremes, combine_extremes
+        
+        rows = self._slice(frames, since, until)
+        close = build_price_matrix(rows, 'Close')
+        if close.empty:
+            return
+        returns = build_price_matrix(rows, 'daily_return')
+        self.extremes = combine_extremes(self.extremes, price_extremes(close))
+        if self.correlations is None:
+            self.correlations = self._running_correlations(close, returns)
+        self.correlations['price'].add(close)
+        self.correlations['returns'].add(returns)
+        self.rolling = self._combine_rolling(self.rolling, self._rolling_values(frames, since, until))
+    
+    @staticmethod
+    def _combine_rolling(rolling, values):
+        if len(values) == 0:
+            return rolling
+        return {'latest': float(values[-1]),
+                'min': float(values.min()) if rolling['min'] is None else min(rolling['min'], float(values.min())),
+                'max': float(values.max()) if rolling['max'] is None else max(rolling['max'], float(values.max()))}
+    
+    @staticmethod
+    def _running_correlations(close, returns):
+        """Empty price and return correlation sums, centred on the column means of the first rows seen"""
+        import warnings
+        import numpy as np
+        from correlation import RunningCorrelation
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return {name: RunningCorrelation(matrix.shape[1], np.nanmean(matrix.to_numpy(dtype=float), axis=0))
+                    for name, matrix in (('price', close), ('returns', returns))}
+    
+    def _correlation(self, frames, tail):
+        import pandas as pd
+        from indicators import build_price_matrix
+        
+        close = build_price_matrix(tail, 'Close')
+        returns = build_price_matrix(tail, 'daily_return')
+        correlations = self.correlations or self._running_correlations(close, returns)
+        price_corr = correlations['price'].matrix(close)
+        return_corr = correlations['returns'].matrix(returns)
+        rolling = self._combine_rolling(self.rolling, self._rolling_values(frames, self.settled_until, None))
+        
+        correlation = {
+            'price': float(price_corr[0, 1]),
+            'returns': float(return_corr[0, 1]),
+            'rolling_window': CORRELATION_WINDOW,
+        }
+        if rolling['latest'] is not None:
+            correlation.update(rolling_latest=rolling['latest'], rolling_min=rolling['min'], rolling_max=rolling['max'])
+        labels = list(tail)
+        return correlation, pd.DataFrame(return_corr, index=labels, columns=labels)
+    
+    def _chart_jobs(self, frames, settled_until, return_corr_matrix):
+        """Chart jobs from the downsampled settled history plus the raw bars after it"""
+        import numpy as np
+        from rendering import downsample_job
+        
+        pending = max(len(df) - df['Date'].searchsorted(self.chart_until) for df in frames.values()) \
+            if self.chart_until is not None else None
+        if pending is None or pending > self.REDOWNSAMPLE_ROWS:
+            self.chart_until = settled_until
+            prefix_jobs = chart_jobs(self._slice(frames, None, settled_until), self.labels)
+            self.chart_prefix = {job['path']: {symbol: series for symbol, _, series in downsample_job(job, self.dpi)['symbols']}
+                                 for job in prefix_jobs if 'symbols' in job}
+        
+        jobs = chart_jobs(self._slice(frames, self.chart_until), self.labels, return_corr_matrix)
+        for job in jobs:
+            if 'symbols' not in job:
+                continue
+            prefix = self.chart_prefix.get(job['path'], {})
+            job['symbols'] = [
+                (symbol, name, {key: np.concatenate([prefix[symbol][key], values]) for key, values in series.items()}
+                 if symbol in prefix else series)
+                for symbol, name, series in job['symbols']
+            ]
+        return jobs
+    
+    def update(self, full_data, changed_since=None):
+        """Analysis like analyze(full_data, start_date) after bars dated `changed_since` or later were added or revised.
+        
+        `changed_since` None means unknown and starts over from the full history.
+        """
+        from summary import TREND_WINDOW, build_report, render_insights, summarize_frames, price_extremes, combine_extremes
+        from indicators import build_price_matrix
+        
+        frames = self._slice(full_data, self.start)
+        settled_until = min(df['Date'].iloc[-1] for df in frames.values())
+        if changed_since is None or self.settled_until is None or changed_since < self.settled_until:
+            self.reset()
+        if self.settled_until is None or settled_until > self.settled_until:
+            self._fold(frames, self.settled_until, settled_until)
+            self.settled_until = settled_until
+        
+        tail = self._slice(frames, settled_until)
+        extremes = combine_extremes(self.extremes, price_extremes(build_price_matrix(tail, 'Close')))
+        correlation, return_corr_matrix = self._correlation(frames, tail)
+        
+        # The trend fit only looks at each symbol's last TREND_WINDOW bars
+        cutoff = min(df['Date'].iloc[-TREND_WINDOW] if len(df) >= TREND_WINDOW else self.start for df in frames.values())
+        summary = summarize_frames(self._slice(frames, cutoff), extremes=extremes)
+        report = build_report(summary, self.labels['label'], self.labels['start_label'], correlation)
+        return {
+            'insights_file': f"crypto_insights_{self.labels['suffix']}.txt",
+            'report_file': f"crypto_insights_{self.labels['suffix']}.json",
+            'chart_jobs': self._chart_jobs(frames, settled_until, return_corr_matrix),
+            'report': report,
+            'insights': render_insights(report),
+        }
+
+def watch(start_date=START_DATE, interval_seconds=WATCH_INTERVAL_SECONDS, iterations=None):
+    """Keep the charts and insights current, refreshing every `interval_seconds`.
+    
+    Each cycle downloads only the bars from the last one held (including the
+    still-forming bar of the current day) and appends just the new or revised
+    bars to the cache. Indicators are recomputed for the trailing windows those
+    bars touch, the analysis (LiveAnalysis) only for the bars that are not
+    settled yet, and a chart or the insights are rewritten only when their
+    input data changed. Runs until interrupted, or for `iterations` cycles.
+    """
+    import pandas as pd
+    from indicators import first_changed_row, refresh_indicators
+    from rendering import render_charts
+    
+    prices = {}
+    frames = {}
+    fingerprints = {}
+    live = LiveAnalysis(start_date)
+    cycle = 0
+    print(f"Watching {', '.join(SYMBOLS)} every {interval_seconds} seconds (Ctrl+C to stop)...")
+    
+    try:
+        while iterations is None or cycle < iterations:
+            cycle += 1
+            # Yahoo Finance treats the end date as exclusive; tomorrow includes today's live bar
+            end_date = pd.Timestamp.now().normalize() + timedelta(days=1)
+            
+            # The first cycle reads the cache; later ones only download the trailing bars
+            missing = [symbol for symbol in SYMBOLS if prices.get(symbol) is None or prices[symbol].empty]
+            if missing:
+                prices.update(fetch_price_history(start_date, end_date, symbols=missing))
+            for symbol in SYMBOLS:
+                if symbol not in missing:
+                    prices[symbol] = update_crypto_price_data(symbol, prices[symbol], end_date)
+            
+            # Earliest bar added or revised this cycle (None: rows disappeared, so start over)
+            changed_since = pd.Timestamp.max
+            for symbol, data in prices.items():
+                if data.empty:
+                    continue
+                previous = frames.get(symbol)
+                refreshed = refresh_indicators(previous, data)
+                if refreshed is previous:
+                    continue
+                row = first_changed_row(previous, data)
+                if changed_since is not None:
+                    changed_since = min(changed_since, data['Date'].iloc[row]) if row < len(data) else None
+                frames[symbol] = refreshed
+            
+            stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if len(frames) < len(SYMBOLS):
+                print(f"[{stamp}] Waiting for data for every symbol...")
+            elif changed_since == pd.Timestamp.max:
+                print(f"[{stamp}] No new bars.")
+            else:
+                analysis = live.update(frames, changed_since)
+                
+                # The chart series are already downsampled by LiveAnalysis
+                stale_jobs = [job for job in analysis['chart_jobs']
+                              if fingerprints.get(job['path']) != _fingerprint(job)]
+                for job in stale_jobs:
+                    fingerprints[job['path']] = _fingerprint(job)
+                for chart_path in render_charts(stale_jobs, dpi=CHART_DPI, fmt=CHART_FORMAT, workers=RENDER_WORKERS,
+                                                downsample=False):
+                    print(f"[{stamp}] Chart updated: {os.path.abspath(chart_path)}")
+                
+                report_fingerprint = hashlib.sha256(json.dumps(analysis['report'], sort_keys=True).encode()).hexdigest()
+                if fingerprints.get(analysis['report_file']) != report_fingerprint:
+                    fingerprints[analysis['report_file']] = report_fingerprint
+                    insights_file, _ = write_insights(analysis)
+                    print(f"[{stamp}] Insights updated: {os.path.abspath(insights_file)}")
+            
+            if iterations is None or cycle < iterations:
+                time.sleep(interval_seconds)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+COMMANDS = ('run', 'fetch', 'indicators', 'insights', 'charts', 'report', 'watch')
+
+def cli(argv=None):
+    """Parse the command line and run a subcommand; `run` is the default when none is given"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv.insert(0, 'run')
+    
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--start-date', default=START_DATE, help="First day of the analysed period (YYYY-MM-DD)")
+    data = argparse.ArgumentParser(add_help=False)
+    data.add_argument('--synthetic', action='store_true', default=SYNTHETIC_DATA, help="Use generated prices instead of downloading them")
+    profiling = argparse.ArgumentParser(add_help=False)
+    profiling.add_argument('--metrics', default=METRICS_FILE, help="Append per-stage timing (or memory) metrics to this .csv or .json file")
+    profiling.add_argument('--profile', action='store_true', default=SHOW_METRICS, help="Print a per-stage timing (or memory) table")
+    profiling.add_argument('--memory', action='store_true', default=TRACK_MEMORY,
+                           help="Measure peak memory per stage instead of timings (a separate, slower run)")
+    
+    parser = argparse.ArgumentParser(description="Analyze Bitcoin and Ethereum prices and generate charts and insights.")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.add_parser('run', parents=[common, data, profiling], help="Fetch data, render the charts and write the insights (default)")
+    commands.add_parser('fetch', parents=[common, data], help="Update the local price cache")
+    commands.add_parser('indicators', parents=[common, data], help="Print the latest indicator values")
+    commands.add_parser('insights', parents=[common, data, profiling], help="Write and print the insights report (no charts)")
+    commands.add_parser('charts', parents=[common, data, profiling], help="Render the charts only")
+    report = commands.add_parser('report', parents=[common], help="Print the saved insights without recomputing anything")
+    report.add_argument('--field', default=None, help="Print one value of the saved JSON report, e.g. BTC.latest.RSI")
+    watch_parser = commands.add_parser('watch', parents=[common], help="Keep running and refresh the outputs as new bars arrive")
+    watch_parser.add_argument('--interval', type=int, default=WATCH_INTERVAL_SECONDS, help="Seconds between refreshes")
+    args = parser.parse_args(argv)
     
-    except Exception as e:
-        print(f"An error occurred: {e}")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.command == 'fetch':
+        return fetch_command(args.start_date, args.synthetic)
+    if args.command == 'indicators':
+        return indicators_command(args.start_date, args.synthetic)
+    if args.command == 'report':
+        return report_command(args.start_date, args.field)
+    if args.command == 'watch':
+        watch(args.start_date, args.interval)
+        return 0
+    return main(args.start_date, args.metrics, args.profile or (args.memory and not args.metrics), args.synthetic,
+                charts=args.command in ('run', 'charts'), insights=args.command in ('run', 'insights'),
+                track_memory=args.memory)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(cli())
@@ -0,0 +1,82 @@
+import pandas as pd
+from pathlib import Path
+
+# New and revised bars go to a small tail file next to the main one; beyond this many rows it is merged in
+TAIL_COMPACT_ROWS = 500
+
+
+def cache_path(cache_dir, ticker, interval):
+    """Return the Parquet file holding cached bars for one ticker and interval"""
+    return Path(cache_dir) / f"{ticker}_{interval}.parquet"
+
+
+def tail_path(cache_dir, ticker, interval):
+    """Return the Parquet file holding bars appended since the main file was last written"""
+    return Path(cache_dir) / f"{ticker}_{interval}.tail.parquet"
+
+
+def _write_atomic(df, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.parquet.tmp')
+    df.to_parquet(tmp_path, index=False)
+    tmp_path.replace(path)
+
+
+def load_cached_prices(cache_dir, ticker, interval):
+    """Read cached bars, or return None when nothing has been cached yet"""
+    path = cache_path(cache_dir, ticker, interval)
+    tail = tail_path(cache_dir, ticker, interval)
+    if not path.exists():
+        return pd.read_parquet(tail) if tail.exists() else None
+    if not tail.exists():
+        return pd.read_parquet(path)
+    return merge_prices([pd.read_parquet(path), pd.read_parquet(tail)])
+
+
+def save_cached_prices(df, cache_dir, ticker, interval):
+    """Write bars to the cache, replacing the previous file (and any appended tail) atomically"""
+    _write_atomic(df, cache_path(cache_dir, ticker, interval))
+    tail_path(cache_dir, ticker, interval).unlink(missing_ok=True)
+
+
+def append_cached_prices(bars, cache_dir, ticker, interval):
+    """Add new or revised bars to the cache without rewriting the whole history.
+
+    Only the tail file is rewritten; once it holds more than TAIL_COMPACT_ROWS
+    bars it is merged into the main file.
+    """
+    if bars is None or bars.empty:
+        return
+    tail = tail_path(cache_dir, ticker, interval)
+    merged = merge_prices([pd.read_parquet(tail) if tail.exists() else None, bars])
+    if len(merged) > TAIL_COMPACT_ROWS:
+        path = cache_path(cache_dir, ticker, interval)
+        save_cached_prices(merge_prices([pd.read_parquet(path) if path.exists() else None, merged]),
+                           cache_dir, ticker, interval)
+    else:
+        _write_atomic(merged, tail)
+
+
+def changed_bars(cached, bars):
+    """Rows of `bars` that are missing from `cached` or differ from the cached row with the same Date"""
+    if cached is None or cached.empty or bars.empty:
+        return bars
+    start = cached['Date'].searchsorted(bars['Date'].iloc[0])
+    known = cached.iloc[start:].drop_duplicates(subset='Date', keep='last').set_index('Date')
+    columns = [c for c in bars.columns if c != 'Date']
+    if any(c not in known.columns for c in columns):
+        return bars
+    old = known.reindex(bars['Date'])[columns].reset_index(drop=True)
+    new = bars[columns].reset_index(drop=True)
+    same = (old.eq(new) | (old.isna() & new.isna())).all(axis=1) & bars['Date'].reset_index(drop=True).isin(known.index)
+    return bars[~same.to_numpy()].reset_index(drop=True)
+
+
+def merge_prices(frames):
+    """Combine bar frames on Date; later frames win so refreshed bars replace stale ones"""
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged.drop_duplicates(subset='Date', keep='last')
+    return merged.sort_values('Date').reset_index(drop=True)
@@ -0,0 +1,295 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from downsample import downsample_series
+from symbols import SYMBOL_NAMES
+
+SUPPORTED_FORMATS = ('png', 'svg', 'webp')
+SYMBOL_COLORS = ('b', 'r', 'm', 'c', 'y', 'k')
+
+# Figure templates built once per process and reused for every chart with the same layout
+_templates = {}
+
+# Below this many jobs, starting worker processes (each importing matplotlib) costs more than it saves
+MIN_POOL_JOBS = 4
+
+
+def _series(df, columns):
+    """Pull the plotted columns out of a frame as plain arrays (cheap to send to worker processes)"""
+    series = {'x': mdates.date2num(df['Date'])}
+    for column in columns:
+        series[column] = df[column].to_numpy(dtype=float)
+    return series
+
+
+def _format_date_axis(ax, x):
+    """Weekly ticks for short ranges, monthly ticks up to two years, automatic ticks beyond that"""
+    date_range = (x[-1] - x[0]) if len(x) else 0
+    if date_range <= 90:  # Less than 3 months of data
+        ax.xaxis.set_major_locator(mdates.WeekdayLocator(interval=2))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))
+    elif date_range > 730:  # Multi-year histories would get one label per month
+        locator = mdates.AutoDateLocator()
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+    else:
+        ax.xaxis.set_major_locator(mdates.MonthLocator())
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b'))
+    ax.tick_params(axis='x', labelrotation=45)
+
+
+def _rescale(*axes):
+    for ax in axes:
+        ax.relim()
+        ax.autoscale_view()
+
+
+class _PriceVolatilityChart:
+    """Two symbols' prices with moving averages on twin axes, plus a volatility comparison"""
+
+    def __init__(self):
+        self.fig = Figure(figsize=(14, 10))
+        FigureCanvasAgg(self.fig)
+
+        self.ax_price = self.fig.add_subplot(2, 1, 1)
+        self.price, = self.ax_price.plot([], [], 'b-')
+        self.ma_20, = self.ax_price.plot([], [], 'g--')
+        self.ma_50, = self.ax_price.plot([], [], 'r--')
+        self.ax_price.tick_params(axis='y', labelcolor='b')
+        self.ax_price.grid(True, alpha=0.3)
+
+        self.ax_other = self.ax_price.twinx()
+        self.other_price, = self.ax_other.plot([], [], 'r-')
+        self.ax_other.tick_params(axis='y', labelcolor='r')
+
+        self.ax_vol = self.fig.add_subplot(2, 1, 2)
+        self.vol, = self.ax_vol.plot([], [], 'b-')
+        self.other_vol, = self.ax_vol.plot([], [], 'r-')
+        self.ax_vol.set_ylabel('20-day Volatility (%)')
+        self.ax_vol.set_title('Volatility Comparison')
+        self.ax_vol.grid(True, alpha=0.3)
+
+    def draw(self, job):
+        (symbol, name, data), (other_symbol, other_name, other) = job['symbols']
+
+        self.price.set_data(data['x'], data['Close'])
+        self.price.set_label(f'{name} (USD)')
+        self.ma_20.set_data(data['x'], data['MA_20'])
+        self.ma_20.set_label(f'{symbol} 20-day MA')
+        self.ma_50.set_data(data['x'], data['MA_50'])
+        self.ma_50.set_label(f'{symbol} 50-day MA')
+        self.ax_price.set_ylabel(f'{name} Price (USD)', color='b')
+        self.ax_price.set_title(job['title'])
+        self.ax_price.legend(loc='upper left')
+
+        self.other_price.set_data(other['x'], other['Close'])
+        self.other_price.set_label(f'{other_name} (USD)')
+        self.ax_other.set_ylabel(f'{other_name} Price (USD)', color='r')
+
+        self.vol.set_data(data['x'], data['volatility_20d'])
+        self.vol.set_label(f'{symbol} 20-day Volatility')
+        self.other_vol.set_data(other['x'], other['volatility_20d'])
+        self.other_vol.set_label(f'{other_symbol} 20-day Volatility')
+        self.ax_vol.legend(loc='upper left')
+
+        _rescale(self.ax_price, self.ax_other, self.ax_vol)
+        for ax in (self.ax_price, self.ax_vol):
+            _format_date_axis(ax, data['x'])
+
+
+class _TechnicalChart:
+    """One Bollinger Band panel per symbol"""
+
+    def __init__(self, n_panels):
+        self.fig = Figure(figsize=(14, 6 * n_panels))
+        FigureCanvasAgg(self.fig)
+        self.panels = []
+        for i in range(n_panels):
+            ax = self.fig.add_subplot(n_panels, 1, i + 1)
+            color = SYMBOL_COLORS[i % len(SYMBOL_COLORS)]
+            price, = ax.plot([], [], f'{color}-')
+            upper, = ax.plot([], [], 'g--', alpha=0.6)
+            mid, = ax.plot([], [], 'g-', alpha=0.6)
+            lower, = ax.plot([], [], 'g--', alpha=0.6)
+            ax.grid(True, alpha=0.3)
+            self.panels.append({'ax': ax, 'price': price, 'upper': upper, 'mid': mid, 'lower': lower, 'band': None})
+
+    def draw(self, job):
+        for panel, (symbol, name, data) in zip(self.panels, job['symbols']):
+            ax = panel['ax']
+            panel['price'].set_data(data['x'], data['Close'])
+            panel['price'].set_label(f'{symbol} Price')
+            panel['upper'].set_data(data['x'], data['bollinger_upper'])
+            panel['mid'].set_data(data['x'], data['bollinger_mid'])
+            panel['lower'].set_data(data['x'], data['bollinger_lower'])
+
+            # The shaded band is a polygon and cannot be updated in place
+            if panel['band'] is not None:
+                panel['band'].remove()
+            panel['band'] = ax.fill_between(data['x'], data['bollinger_upper'], data['bollinger_lower'],
+                                            color='g', alpha=0.1)
+
+            ax.set_ylabel(f'{name} Price (USD)')
+            ax.set_title(f'{name} Technical Analysis with Bollinger Bands')
+            _rescale(ax)
+            _format_date_axis(ax, data['x'])
+
+
+class _HeatmapChart:
+    """Annotated correlation matrix"""
+
+    # Per-cell value labels are skipped above this size to keep the chart readable
+    MAX_ANNOTATED = 20
+
+    def __init__(self, size):
+        side = max(4, 0.5 * size + 2)
+        self.fig = Figure(figsize=(side + 1, side))
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(1, 1, 1)
+        self.image = self.ax.imshow(np.zeros((size, size)), cmap='RdBu_r', vmin=-1, vmax=1)
+        self.fig.colorbar(self.image, ax=self.ax, fraction=0.046, pad=0.04)
+        self.ax.set_xticks(range(size))
+        self.ax.set_yticks(range(size))
+        self.annotations = []
+
+    def draw(self, job):
+        matrix, labels = job['matrix'], job['labels']
+        self.image.set_data(matrix)
+        self.ax.set_xticklabels(labels, rotation=45, ha='right')
+        self.ax.set_yticklabels(labels)
+        self.ax.set_title(job['title'])
+
+        for text in self.annotations:
+            text.remove()
+        self.annotations = []
+        if len(labels) <= self.MAX_ANNOTATED:
+            for i in range(len(labels)):
+                for j in range(len(labels)):
+                    self.annotations.append(
+                        self.ax.text(j, i, f"{matrix[i, j]:.2f}", ha='center', va='center', fontsize=8))
+
+
+def _template_for(job):
+    if job['kind'] == 'price_volatility':
+        key, factory = ('price_volatility',), _PriceVolatilityChart
+    elif job['kind'] == 'technical':
+        n_panels = len(job['symbols'])
+        key, factory = ('technical', n_panels), lambda: _TechnicalChart(n_panels)
+    elif job['kind'] == 'heatmap':
+        size = len(job['labels'])
+        key, factory = ('heatmap', size), lambda: _HeatmapChart(size)
+    else:
+        raise ValueError(f"Unknown chart kind: {job['kind']}")
+
+    if key not in _templates:
+        _templates[key] = factory()
+    return _templates[key]
+
+
+def _plot_width(fig, dpi):
+    """Width of the widest axes in output pixels"""
+    return int(max(ax.get_position().width for ax in fig.axes) * fig.get_figwidth() * dpi)
+
+
+def _downsample_job(job, n_out):
+    """Reduce every symbol's series to about `n_out` points; all of a symbol's lines share the kept dates"""
+    if 'symbols' not in job:
+        return job
+    job = dict(job)
+    job['symbols'] = [(symbol, name, downsample_series(data, n_out)) for symbol, name, data in job['symbols']]
+    return job
+
+
+def downsample_job(job, dpi=300):
+    """A copy of `job` with its series reduced (LTTB) to the plot width at `dpi`, as render_chart does before drawing"""
+    return _downsample_job(job, _plot_width(_template_for(job).fig, dpi))
+
+
+def render_chart(job, dpi=300, fmt='png', downsample=True):
+    """Render one chart job to disk and return its path.
+
+    With `downsample`, long series are reduced (LTTB) to roughly one point per
+    pixel column of the plot before drawing; the chart looks the same but
+    renders faster and produces much smaller files.
+    """
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported chart format {fmt!r}; choose one of {SUPPORTED_FORMATS}")
+    template = _template_for(job)
+    if downsample:
+        job = _downsample_job(job, _plot_width(template.fig, dpi))
+    template.draw(job)
+    if job['kind'] == 'heatmap':
+        template.fig.tight_layout()
+    else:
+        template.fig.tight_layout(pad=2.0)
+
+    path = f"{job['path']}.{fmt}"
+    template.fig.savefig(path, dpi=dpi, format=fmt)
+    return path
+
+
+def _render_star(args):
+    return render_chart(*args)
+
+
+def render_charts(jobs, dpi=300, fmt='png', workers=None, downsample=True):
+    """Render chart jobs across a process pool; returns the written paths in job order.
+
+    Each worker keeps its own figure templates, so charts with the same layout
+    only update line data instead of rebuilding the figure.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+
+    if workers == 1 or len(jobs) < MIN_POOL_JOBS:
+        return [render_chart(job, dpi, fmt, downsample) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_star, [(job, dpi, fmt, downsample) for job in jobs]))
+
+
+def _symbol_entry(symbol, df, columns):
+    return symbol, SYMBOL_NAMES.get(symbol, symbol), _series(df, columns)
+
+
+def price_volatility_job(frames, path, title):
+    """Chart job for the price/volatility figure; `frames` maps two symbols to their indicator frames"""
+    (symbol, df), (other_symbol, other_df) = list(frames.items())[:2]
+    columns = ['Close', 'MA_20', 'MA_50', 'volatility_20d']
+    return {
+        'kind': 'price_volatility',
+        'path': path,
+        'title': title,
+        'symbols': [_symbol_entry(symbol, df, columns), _symbol_entry(other_symbol, other_df, columns)],
+    }
+
+
+def technical_job(frames, path):
+    """Chart job with one Bollinger Band panel for each symbol in `frames`"""
+    columns = ['Close', 'bollinger_upper', 'bollinger_mid', 'bollinger_lower']
+    return {
+        'kind': 'technical',
+        'path': path,
+        'symbols': [_symbol_entry(symbol, df, columns) for symbol, df in frames.items()],
+    }
+
+
+def technical_jobs(frames, path):
+    """One single-panel technical chart job per symbol, written to `<path>_<symbol>`, so the pool can render them in parallel"""
+    return [technical_job({symbol: df}, f"{path}_{symbol}") for symbol, df in frames.items()]
+
+
+def heatmap_job(corr, path, title='Daily Return Correlation'):
+    """Chart job for a labelled correlation matrix"""
+    return {
+        'kind': 'heatmap',
+        'path': path,
+        'title': title,
+        'matrix': corr.to_numpy(dtype=float),
+        'labels': [str(label) for label in corr.columns],
+    }
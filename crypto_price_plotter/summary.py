@@ -0,0 +1,291 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from indicators import build_price_matrix
+from symbols import SYMBOL_NAMES
+from trend import format_trend, rolling_trends
+
+TREND_WINDOW = 30
+
+
+def _as_float(value):
+    """JSON-friendly float: NaN becomes None"""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _num(value):
+    """Missing values count as 0.0, as the original report did"""
+    return 0.0 if value is None else value
+
+
+def _format_date(value):
+    return pd.Timestamp(value).strftime('%Y-%m-%d') if pd.notna(value) else "unknown"
+
+
+def _rsi_signal(rsi):
+    return "Oversold (buying opportunity)" if rsi < 30 else "Overbought (selling opportunity)" if rsi > 70 else "Neutral"
+
+
+def _outlook(trend_label):
+    if trend_label.startswith(("Strong uptrend", "Moderate uptrend")):
+        return "Positive"
+    if trend_label.startswith(("Strong downtrend", "Moderate downtrend")):
+        return "Negative"
+    return "Neutral"
+
+
+def price_extremes(close):
+    """First, highest and lowest observed price of every column of a dates x symbols matrix, with their dates.
+
+    Returns a dict of per-column arrays; combine_extremes merges the results of
+    consecutive row ranges, so a growing history never has to be rescanned.
+    """
+    values = close.to_numpy(dtype=float)
+    cols = np.arange(values.shape[1])
+    valid = ~np.isnan(values)
+    has_data = valid.any(axis=0)
+    dates = close.index.to_numpy()
+
+    first_idx = np.argmax(valid, axis=0)
+    high_idx = np.argmax(np.where(valid, values, -np.inf), axis=0)
+    low_idx = np.argmin(np.where(valid, values, np.inf), axis=0)
+    return {
+        'has_data': has_data,
+        'start': values[first_idx, cols], 'start_date': dates[first_idx],
+        'high': values[high_idx, cols], 'high_date': dates[high_idx],
+        'low': values[low_idx, cols], 'low_date': dates[low_idx],
+    }
+
+
+def combine_extremes(earlier, later):
+    """price_extremes of two consecutive row ranges combined; ties keep the earlier bar, as argmax/argmin do"""
+    if earlier is None:
+        return later
+    a, b = earlier['has_data'], later['has_data']
+    take_start = ~a & b
+    take_high = b & (~a | (later['high'] > earlier['high']))
+    take_low = b & (~a | (later['low'] < earlier['low']))
+    return {
+        'has_data': a | b,
+        'start': np.where(take_start, later['start'], earlier['start']),
+        'start_date': np.where(take_start, later['start_date'], earlier['start_date']),
+        'high': np.where(take_high, later['high'], earlier['high']),
+        'high_date': np.where(take_high, later['high_date'], earlier['high_date']),
+        'low': np.where(take_low, later['low'], earlier['low']),
+        'low_date': np.where(take_low, later['low_date'], earlier['low_date']),
+    }
+
+
+def summarize_symbols(close, indicators, trend_window=TREND_WINDOW, extremes=None):
+    """Summary statistics for every symbol of a dates x symbols price matrix in one vectorized pass.
+
+    `indicators` maps indicator names (MA_50, RSI, volatility_20d, ...) to
+    matrices aligned with `close`. Returns a JSON-serializable dict keyed by
+    symbol with start/end prices, high/low with dates, range position, latest
+    indicators, trend fit and the derived signals.
+
+    `close` only needs the trailing rows (trend_window per symbol) when
+    `extremes` gives the price_extremes of the whole period.
+    """
+    values = close.to_numpy(dtype=float)
+    n_rows, n_cols = values.shape
+    cols = np.arange(n_cols)
+    valid = ~np.isnan(values)
+    dates = close.index.to_numpy()
+    if extremes is None:
+        extremes = price_extremes(close)
+    has_data = extremes['has_data'] & valid.any(axis=0)
+
+    # Last observed bar of every symbol
+    last_idx = n_rows - 1 - np.argmax(valid[::-1], axis=0)
+    start = np.where(has_data, extremes['start'], 0.0)
+    end = np.where(has_data, values[last_idx, cols], 0.0)
+
+    # Highs and lows with the bar they happened on
+    high = np.where(has_data, extremes['high'], end)
+    low = np.where(has_data, extremes['low'], start)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_pct = np.where(start > 0, (end / start - 1) * 100, 0.0)
+        trading_range = np.where(low > 0, (high - low) / low * 100, 0.0)
+        range_position = np.where(high - low > 0, (end - low) / (high - low) * 100, 50.0)
+
+    # Latest indicator values at each symbol's last bar
+    latest = {name: matrix.to_numpy(dtype=float)[last_idx, cols] for name, matrix in indicators.items()}
+
+    # Trend fit over each symbol's trailing window
+    offsets = np.arange(trend_window - 1, -1, -1)[:, None]
+    rows = last_idx[None, :] - offsets
+    tail = np.where(rows >= 0, values[np.clip(rows, 0, None), cols], np.nan)
+    fit = rolling_trends(tail, [trend_window])[trend_window]
+    observed = (rows >= 0).sum(axis=0)
+
+    summary = {}
+    for j, symbol in enumerate(close.columns):
+        symbol_latest = {name: _as_float(arr[j]) for name, arr in latest.items()}
+        rsi = _num(symbol_latest.get('RSI'))
+        ma_50 = _num(symbol_latest.get('MA_50'))
+
+        slope, r_value, p_value = fit['slope'][-1, j], fit['r_value'][-1, j], fit['p_value'][-1, j]
+        if not has_data[j] or observed[j] < trend_window:
+            trend_label = "Insufficient data"
+        else:
+            trend_label = format_trend(slope, r_value, p_value, tail[0, j], trend_window)
+
+        summary[str(symbol)] = {
+            'name': SYMBOL_NAMES.get(str(symbol), str(symbol)),
+            'start_date': _format_date(extremes['start_date'][j]) if has_data[j] else "unknown",
+            'end_date': _format_date(dates[last_idx[j]]) if has_data[j] else "unknown",
+            'start_price': float(start[j]),
+            'end_price': float(end[j]),
+            'change_pct': float(change_pct[j]),
+            'high': float(high[j]),
+            'high_date': _format_date(extremes['high_date'][j]) if has_data[j] else "unknown",
+            'low': float(low[j]),
+            'low_date': _format_date(extremes['low_date'][j]) if has_data[j] else "unknown",
+            'trading_range_pct': float(trading_range[j]),
+            'range_position_pct': float(range_position[j]),
+            'latest': symbol_latest,
+            'trend': {
+                'window': trend_window,
+                'slope': _as_float(slope),
+                'r_value': _as_float(r_value),
+                'p_value': _as_float(p_value),
+                'label': trend_label,
+            },
+            'ma_signal': "Bullish" if float(end[j]) > ma_50 else "Bearish",
+            'rsi_signal': _rsi_signal(rsi),
+            'outlook': _outlook(trend_label),
+        }
+    return summary
+
+
+def summarize_frames(frames, trend_window=TREND_WINDOW, extremes=None):
+    """summarize_symbols for per-symbol indicator frames (aligned on Date)"""
+    first = next(iter(frames.values()))
+    price_columns = ('Date', 'Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume')
+    indicator_columns = [c for c in first.columns if c not in price_columns]
+    close = build_price_matrix(frames, 'Close')
+    indicators = {name: build_price_matrix(frames, name) for name in indicator_columns}
+    return summarize_symbols(close, indicators, trend_window, extremes)
+
+
+def build_report(symbols, period_label, start_label, correlation=None):
+    """Assemble the structured insights report for the first two symbols (primary vs secondary)"""
+    (a_sym, a), (b_sym, b) = list(symbols.items())[:2]
+
+    a_vol = _num(a['latest'].get('volatility_20d'))
+    b_vol = _num(b['latest'].get('volatility_20d'))
+    relative_strength = a['change_pct'] - b['change_pct']
+
+    return {
+        'period': {'label': period_label, 'start_label': start_label},
+        'symbols': symbols,
+        'comparison': {
+            'primary': a_sym,
+            'secondary': b_sym,
+            'relative_strength_pct': relative_strength,
+            'stronger_asset': a['name'] if relative_strength > 0 else b['name'] if relative_strength < 0 else "Equal",
+            'volatility_ratio': a_vol / b_vol if b_vol > 0 else None,
+        },
+        'correlation': correlation or {},
+    }
+
+
+def render_insights(report):
+    """Render the text insights report from the structured report"""
+    period = report['period']['label']
+    start_label = report['period']['start_label']
+    comparison = report['comparison']
+    a_sym, b_sym = comparison['primary'], comparison['secondary']
+    symbols = report['symbols']
+    a, b = symbols[a_sym], symbols[b_sym]
+    pair = ((a_sym, a), (b_sym, b))
+    correlation = report['correlation']
+
+    insights = []
+    insights.append(f"# Comprehensive Cryptocurrency Analysis for {period}")
+    insights.append("\n## Price Performance")
+    for i, (sym, s) in enumerate(pair):
+        prefix = "\n" if i else ""
+        insights.append(f"{prefix}{sym} Starting Price ({start_label}): ${s['start_price']:.2f}")
+        insights.append(f"{sym} Current Price: ${s['end_price']:.2f}")
+        insights.append(f"{sym} Price Change: {s['change_pct']:.2f}%")
+
+    insights.append(f"\nRelative Strength: {comparison['stronger_asset']} has outperformed by "
+                    f"{abs(comparison['relative_strength_pct']):.2f}%")
+
+    insights.append("\n## Technical Analysis")
+    for sym, s in pair:
+        insights.append(f"{sym} Trend Assessment: {s['trend']['label']}")
+    for i, (sym, s) in enumerate(pair):
+        prefix = "" if i else "\n"
+        insights.append(f"{prefix}{sym} 50-day Moving Average Signal: {s['ma_signal']}")
+    for i, (sym, s) in enumerate(pair):
+        prefix = "" if i else "\n"
+        insights.append(f"{prefix}{sym} RSI (14-day): {_num(s['latest'].get('RSI')):.2f} - {s['rsi_signal']}")
+
+    insights.append("\n## Volatility Analysis")
+    for sym, s in pair:
+        insights.append(f"{sym} Recent Volatility (20-day): {_num(s['latest'].get('volatility_20d')):.2f}%")
+    if comparison['volatility_ratio'] is not None:
+        insights.append(f"{a_sym}/{b_sym} Volatility Ratio: {comparison['volatility_ratio']:.2f}x")
+
+    insights.append("\n## Price Range Analysis")
+    for i, (sym, s) in enumerate(pair):
+        prefix = "\n" if i else ""
+        insights.append(f"{prefix}{sym} {period} High: ${s['high']:.2f} on {s['high_date']}")
+        insights.append(f"{sym} {period} Low: ${s['low']:.2f} on {s['low_date']}")
+        insights.append(f"{sym} Trading Range: {s['trading_range_pct']:.2f}%")
+        insights.append(f"{sym} Current Position in Range: {s['range_position_pct']:.2f}% (0%=at low, 100%=at high)")
+
+    insights.append("\n## Correlation Analysis")
+    if correlation.get('price') is not None:
+        insights.append(f"Price Correlation: {correlation['price']:.4f} (1=perfect correlation, 0=no correlation, -1=perfect inverse)")
+    if correlation.get('returns') is not None:
+        insights.append(f"Daily Return Correlation: {correlation['returns']:.4f}")
+    if correlation.get('rolling_latest') is not None:
+        insights.append(f"{correlation['rolling_window']}-day Rolling Return Correlation: {correlation['rolling_latest']:.4f} "
+                        f"(range {correlation['rolling_min']:.2f} to {correlation['rolling_max']:.2f})")
+
+    insights.append("\n## Investment Outlook")
+    for sym, s in pair:
+        insights.append(f"{s['name']} Outlook: {s['outlook']}")
+
+    insights.append("\n## Key Observations and Recommendations")
+
+    # Add custom recommendations based on analysis
+    a_outlook, b_outlook = a['outlook'], b['outlook']
+    if a_outlook == "Positive" and b_outlook == "Positive":
+        insights.append("• Both cryptocurrencies show positive momentum; consider maintaining positions in both.")
+    elif a_outlook == "Positive" and b_outlook != "Positive":
+        insights.append(f"• {a['name']} shows stronger performance; consider overweighting {a_sym} in your portfolio.")
+    elif a_outlook != "Positive" and b_outlook == "Positive":
+        insights.append(f"• {b['name']} shows stronger performance; consider overweighting {b_sym} in your portfolio.")
+    else:
+        insights.append("• Both assets show caution signals; consider reducing exposure or implementing hedging strategies.")
+
+    a_rsi, b_rsi = _num(a['latest'].get('RSI')), _num(b['latest'].get('RSI'))
+    if a_rsi < 30 or b_rsi < 30:
+        insights.append("• Oversold conditions present potential buying opportunities.")
+    elif a_rsi > 70 or b_rsi > 70:
+        insights.append("• Overbought conditions suggest caution with new positions.")
+
+    if correlation.get('returns') is not None and correlation['returns'] < 0.5:
+        insights.append("• Lower correlation between assets suggests diversification benefits.")
+
+    if a['range_position_pct'] > 80 or b['range_position_pct'] > 80:
+        insights.append("• Current prices are near the high end of the trading range; consider taking partial profits.")
+    elif a['range_position_pct'] < 20 or b['range_position_pct'] < 20:
+        insights.append("• Current prices are near the low end of the trading range; potential value entry points.")
+
+    return insights
+
+
+def save_report(report, path):
+    """Write the structured report as JSON"""
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
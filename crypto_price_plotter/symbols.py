@@ -0,0 +1,3 @@
+# Display names for the symbols we know; anything else is shown by its ticker.
+# Kept in a module of its own so the report code does not import matplotlib and the renderers do not import pandas.
+SYMBOL_NAMES = {'BTC': 'Bitcoin', 'ETH': 'Ethereum'}
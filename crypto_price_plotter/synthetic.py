@@ -0,0 +1,70 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Rough price levels so synthetic charts look familiar; other symbols start at 100
+START_PRICES = {'BTC': 40000.0, 'ETH': 2300.0}
+DAILY_DRIFT = 0.0005
+DAILY_VOLATILITY = 0.03
+
+
+def _seed(symbol, seed):
+    """Stable per-symbol seed (Python's hash() is salted per process)"""
+    return zlib.crc32(f"{symbol}:{seed}".encode())
+
+
+def random_walk_matrix(n_rows, n_symbols, seed=0, start_price=100.0, drift=DAILY_DRIFT,
+                       volatility=DAILY_VOLATILITY, dtype=np.float64):
+    """(n_rows, n_symbols) close prices following independent geometric random walks"""
+    rng = np.random.default_rng(seed)
+    log_returns = rng.normal(drift - volatility ** 2 / 2, volatility, size=(n_rows, n_symbols))
+    log_returns[0] = 0.0
+    np.cumsum(log_returns, axis=0, out=log_returns)
+    prices = np.exp(log_returns, out=log_returns)
+    prices *= start_price
+    return prices.astype(dtype, copy=False)
+
+
+def synthetic_ohlcv(n_rows, symbol='BTC', seed=0, start='2020-01-01', freq='D',
+                    drift=DAILY_DRIFT, volatility=DAILY_VOLATILITY):
+    """Deterministic OHLCV frame shaped like get_crypto_price_data's output.
+
+    Closes follow a geometric random walk; each bar opens at the previous close,
+    High/Low extend beyond the open/close by a random fraction of the bar's
+    volatility, and volume is log-normal.
+    """
+    rng = np.random.default_rng(_seed(symbol, seed))
+    close = random_walk_matrix(n_rows, 1, seed=rng, start_price=START_PRICES.get(symbol, 100.0),
+                               drift=drift, volatility=volatility)[:, 0]
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    wick = np.abs(rng.normal(0, volatility / 2, size=(2, n_rows)))
+    return pd.DataFrame({
+        'Date': pd.date_range(start, periods=n_rows, freq=freq),
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + wick[0]),
+        'Low': np.minimum(open_, close) * (1 - wick[1]),
+        'Close': close,
+        'Volume': rng.lognormal(20, 1, size=n_rows),
+    })
+
+
+def synthetic_frames(n_rows, n_symbols, seed=0, start='2020-01-01', freq='D'):
+    """Per-symbol synthetic frames keyed BTC, ETH, then SYM002, SYM003, ..."""
+    symbols = ['BTC', 'ETH'] + [f"SYM{i:03d}" for i in range(2, n_symbols)]
+    return {symbol: synthetic_ohlcv(n_rows, symbol, seed, start, freq) for symbol in symbols[:n_symbols]}
+
+
+def synthetic_price_data(symbol, start_date, end_date, interval="1d", seed=0):
+    """Drop-in replacement for get_crypto_price_data that never touches the network.
+
+    Returns one bar per `interval` from start_date up to (excluding) end_date.
+    The same arguments always produce the same prices.
+    """
+    freq = {'1d': 'D', '1h': 'h', '1wk': 'W', '1mo': 'MS'}.get(interval, interval.replace('m', 'min'))
+    dates = pd.date_range(pd.Timestamp(start_date), pd.Timestamp(end_date), freq=freq, inclusive='left')
+    if len(dates) == 0:
+        return pd.DataFrame()
+    data = synthetic_ohlcv(len(dates), symbol, seed, freq=freq)
+    data['Date'] = dates
+    return data
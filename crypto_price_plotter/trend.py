@@ -0,0 +1,129 @@
+import warnings
+
+import numpy as np
+
+# Rows per prefix-sum block; restarting the sums keeps rounding error independent of history length
+_BLOCK_SIZE = 4096
+# Same guard scipy.stats.linregress uses when r is exactly +/-1
+_TINY = 1.0e-20
+
+
+def rolling_trends(prices, windows=(30,)):
+    """Least-squares trend line over every trailing window of a price series.
+
+    `prices` is a 1-D series or a 2-D dates x symbols array. For each window
+    length the result holds slope, intercept, r_value, p_value and std_err
+    arrays shaped like `prices`, where row i describes the window ending at
+    row i (x = 0 .. window-1, as in analyze_price_trend). Rows without a full,
+    NaN-free window are NaN.
+    """
+    # scipy.special loads much faster than scipy.stats; stdtr is the Student-t CDF
+    from scipy.special import stdtr
+
+    values = np.asarray(prices, dtype=float)
+    is_1d = values.ndim == 1
+    if is_1d:
+        values = values[:, None]
+    n_rows, n_cols = values.shape
+    windows = sorted(set(int(w) for w in windows))
+    if windows[0] < 3:
+        raise ValueError("Trend windows need at least 3 points")
+    max_window = windows[-1]
+
+    names = ('slope', 'intercept', 'r_value', 'p_value', 'std_err')
+    results = {w: {name: np.full((n_rows, n_cols), np.nan) for name in names} for w in windows}
+
+    for start in range(0, n_rows, _BLOCK_SIZE):
+        stop = min(start + _BLOCK_SIZE, n_rows)
+        lo = max(0, start - max_window + 1)
+        segment = values[lo:stop]
+        valid = ~np.isnan(segment)
+
+        # Center prices on the block mean and index rows from the block start to keep the sums small
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            ref = np.nanmean(segment, axis=0)
+        ref = np.where(np.isnan(ref), 0.0, ref)
+        y = np.where(valid, segment - ref, 0.0)
+        k = np.arange(len(segment), dtype=float)[:, None]
+
+        zeros = np.zeros((1, n_cols))
+        sum_y = np.concatenate([zeros, np.cumsum(y, axis=0)])
+        sum_ky = np.concatenate([zeros, np.cumsum(k * y, axis=0)])
+        sum_yy = np.concatenate([zeros, np.cumsum(y * y, axis=0)])
+        count = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+
+        for window in windows:
+            first_end = max(start, window - 1)
+            if first_end >= stop:
+                continue
+            ends = np.arange(first_end, stop) - lo + 1
+            begins = ends - window
+
+            sy = sum_y[ends] - sum_y[begins]
+            sxy = (sum_ky[ends] - sum_ky[begins]) - begins[:, None] * sy
+            syy = sum_yy[ends] - sum_yy[begins]
+            full = (count[ends] - count[begins]) == window
+
+            # Closed-form sums over x = 0 .. window-1
+            sx = window * (window - 1) / 2
+            sxx_c = window * (window * window - 1) / 12
+            sxy_c = sxy - sx * sy / window
+            syy_c = np.maximum(syy - sy * sy / window, 0.0)
+
+            slope = sxy_c / sxx_c
+            intercept = (sy / window + ref) - slope * sx / window
+            with np.errstate(invalid='ignore', divide='ignore'):
+                r_value = np.where(syy_c > 0, sxy_c / np.sqrt(sxx_c * syy_c), 0.0)
+            r_value = np.clip(r_value, -1.0, 1.0)
+
+            dof = window - 2
+            t_stat = r_value * np.sqrt(dof / ((1.0 - r_value + _TINY) * (1.0 + r_value + _TINY)))
+            p_value = 2 * stdtr(dof, -np.abs(t_stat))
+            std_err = np.sqrt((1 - r_value ** 2) * syy_c / sxx_c / dof)
+
+            out = results[window]
+            rows = slice(first_end, stop)
+            for name, arr in zip(names, (slope, intercept, r_value, p_value, std_err)):
+                out[name][rows] = np.where(full, arr, np.nan)
+
+    if is_1d:
+        for out in results.values():
+            for name in names:
+                out[name] = out[name][:, 0]
+    return results
+
+
+def format_trend(slope, r_value, p_value, start_price, window):
+    """Turn one trend-line fit into the text label used in the insights report"""
+    # Annualize the slope (rough estimate of annual return if trend continues)
+    annual_rate = (slope * 365 / window) * (100 / start_price)
+
+    # Determine trend strength and direction
+    if p_value > 0.05:
+        return "No clear trend"
+    elif slope > 0:
+        if r_value > 0.8:
+            return f"Strong uptrend (projected annual return: {annual_rate:.1f}%)"
+        return f"Moderate uptrend (projected annual return: {annual_rate:.1f}%)"
+    else:
+        if r_value > 0.8:
+            return f"Strong downtrend (projected annual return: {annual_rate:.1f}%)"
+        return f"Moderate downtrend (projected annual return: {annual_rate:.1f}%)"
+
+
+def analyze_price_trend(prices, window=30):
+    """Analyze the recent price trend using linear regression"""
+    try:
+        if len(prices) < window:
+            return "Insufficient data"
+
+        # Get the last 'window' days of data
+        recent_prices = np.asarray(prices[-window:], dtype=float)
+
+        trend = rolling_trends(recent_prices, [window])[window]
+        return format_trend(trend['slope'][-1], trend['r_value'][-1], trend['p_value'][-1],
+                            recent_prices[0], window)
+    except Exception as e:
+        print(f"Error in trend analysis: {e}")
+        return "Trend analysis unavailable"
@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import re
+import socket
+import time
+from pathlib import Path
+
+import numpy as np
+
+from parsing import (iter_listing, parse_listing, parse_listing_soup, parse_paper_details,
+                     parse_paper_details_soup)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+# Papers on the CVPR 2024 all-days listing page.
+DEFAULT_ENTRIES = 2716
+# Stop repeating a case once it has used this much time (plain soup needs ~20 s per full listing).
+MAX_SECONDS_PER_CASE = 10.0
+
+# Crawl benchmark against mock_site.py.
+DEFAULT_CRAWL_PAPERS = 500
+DEFAULT_CONCURRENCY = (1, 8, 32, 64)
+DEFAULT_LATENCY_MS = 50.0
+DEFAULT_SEQUENTIAL_PAPERS = 20
+
+PARSERS = {
+    'listing': {
+        'soup': lambda html: parse_listing_soup(html, strain=False),
+        'soup+strainer': parse_listing_soup,
+        'lxml stream': parse_listing,
+    },
+    'detail': {
+        'soup': lambda html: parse_paper_details_soup(html, strain=False),
+        'soup+strainer': parse_paper_details_soup,
+        'lxml': parse_paper_details,
+    },
+}
+
+
+def scaled_listing(html: str, entries: int) -> str:
+    """
+    Repeat the entries of a saved listing page until it holds `entries` papers.
+    """
+    blocks = re.findall(r'<dt class="ptitle">.*?(?=<dt class="ptitle">|</dl>)', html, flags=re.S)
+    start = html.index(blocks[0])
+    end = html.index('</dl>', start)
+    repeated = [blocks[i % len(blocks)] for i in range(entries)]
+    return html[:start] + ''.join(repeated) + html[end:]
+
+
+def _time(fn, repeat):
+    best = float('inf')
+    spent = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        if spent > MAX_SECONDS_PER_CASE:
+            break
+    return best, result
+
+
+def _first_entry_seconds(html):
+    start = time.perf_counter()
+    next(iter_listing(html))
+    return time.perf_counter() - start
+
+
+def run_benchmarks(fixtures_dir=FIXTURES_DIR, entries=DEFAULT_ENTRIES, repeat=5):
+    """
+    Time every parser on the saved fixtures and check that they all return the same data.
+
+    Returns:
+        A list of result rows (page, parser, seconds per page, speedup over plain soup).
+    """
+    listing = scaled_listing((fixtures_dir / "listing.html").read_text(encoding='utf-8'), entries)
+    details = [path.read_text(encoding='utf-8') for path in sorted(fixtures_dir.glob("detail_*.html"))]
+    pages = {'listing': [listing], 'detail': details}
+
+    results = []
+    for page, parsers in PARSERS.items():
+        expected = None
+        baseline = None
+        for name, parse in parsers.items():
+            seconds, output = _time(lambda: [parse(html) for html in pages[page]], repeat)
+            seconds /= len(pages[page])
+            if expected is None:
+                expected, baseline = output, seconds
+            elif output != expected:
+                raise AssertionError(f"{name} parser disagrees with soup on the {page} fixtures")
+            results.append({'page': page, 'parser': name, 'seconds': seconds, 'speedup': baseline / seconds})
+    results.append({'page': 'listing', 'parser': 'lxml stream (first entry)',
+                    'seconds': _first_entry_seconds(listing), 'speedup': None})
+    return results
+
+
+def _serve(port, options):
+    from aiohttp import web
+    from mock_site import create_app
+
+    web.run_app(create_app(**options), host='127.0.0.1', port=port, print=None, access_log=None)
+
+
+def start_mock_site(**options):
+    """
+    Run mock_site.py in a separate process (so it does not compete with the crawler's event loop).
+
+    Returns:
+        (process, base URL); terminate the process when done.
+    """
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    process = multiprocessing.Process(target=_serve, args=(port, options), daemon=True)
+    process.start()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("The mock site did not start")
+
+
+def _percentile_ms(values, q):
+    return float(np.percentile(values, q)) * 1000 if values else float('nan')
+
+
+def crawl_benchmarks(papers=DEFAULT_CRAWL_PAPERS, concurrency=DEFAULT_CONCURRENCY, latency_ms=DEFAULT_LATENCY_MS,
+                     jitter_ms=None, error_rate=0.0, sequential_papers=DEFAULT_SEQUENTIAL_PAPERS):
+    """
+    Scrape a mock conference with the sequential scraper and the concurrent crawler.
+
+    Returns:
+        A list of result rows (mode, concurrency, pages, seconds, pages/s,
+        p50/p99 request latency, mean parse time per detail page).
+    """
+    from crawler import crawl_papers
+    from cvpr_scrapper import scrape_papers
+
+    # Per-page progress messages would swamp the results.
+    logging.getLogger().setLevel(logging.WARNING)
+    jitter_ms = latency_ms / 2 if jitter_ms is None else jitter_ms
+    process, base_url = start_mock_site(papers=papers, latency_ms=latency_ms, jitter_ms=jitter_ms,
+                                        error_rate=error_rate)
+    main_url = f"{base_url}/CVPR2024?day=all"
+    results = []
+    try:
+        if sequential_papers:
+            start = time.perf_counter()
+            scraped = scrape_papers(main_url, sequential_papers, base_url, delay_seconds=0)
+            seconds = time.perf_counter() - start
+            results.append({'mode': 'sequential', 'concurrency': 1, 'pages': len(scraped) + 1,
+                            'seconds': seconds, 'pages_per_second': (len(scraped) + 1) / seconds,
+                            'p50_ms': None, 'p99_ms': None, 'parse_ms': None})
+        for level in concurrency:
+            timings = {}
+            start = time.perf_counter()
+            # No rate limit: the benchmark measures what the crawler itself can sustain.
+            scraped = asyncio.run(crawl_papers(main_url, base_url=base_url, concurrency=level,
+                                               requests_per_second=1e9, burst=level, backoff_seconds=0.05,
+                                               timings=timings))
+            seconds = time.perf_counter() - start
+            requests = timings.get('request', [])
+            results.append({'mode': 'crawler', 'concurrency': level, 'pages': len(requests), 'seconds': seconds,
+                            'pages_per_second': len(requests) / seconds,
+                            'p50_ms': _percentile_ms(requests, 50), 'p99_ms': _percentile_ms(requests, 99),
+                            'parse_ms': float(np.mean(timings.get('parse', [np.nan]))) * 1000})
+            if len(scraped) != papers:
+                print(f"Warning: concurrency {level} scraped {len(scraped)} of {papers} papers")
+    finally:
+        process.terminate()
+        process.join()
+    return results
+
+
+def _print_crawl_results(results):
+    print(f"{'mode':<11} {'conc':>5} {'pages':>6} {'seconds':>8} {'pages/s':>8} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'parse ms':>8}")
+
+    def number(value):
+        return f"{value:.1f}" if value is not None else "-"
+
+    for row in results:
+        print(f"{row['mode']:<11} {row['concurrency']:>5} {row['pages']:>6} {row['seconds']:>8.2f} "
+              f"{row['pages_per_second']:>8.1f} {number(row['p50_ms']):>7} {number(row['p99_ms']):>7} "
+              f"{number(row['parse_ms']):>8}")
+
+
+def _int_list(text):
+    return tuple(int(value) for value in text.split(','))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML parsers on saved pages and the crawler "
+                                                 "against a local mock site (no network).")
+    parser.add_argument('--fixtures', type=Path, default=FIXTURES_DIR,
+                        help="Directory with listing.html and detail_*.html pages")
+    parser.add_argument('--entries', type=int, default=DEFAULT_ENTRIES,
+                        help="Papers on the (repeated) listing page")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per case; the best one is reported")
+    parser.add_argument('--crawl', action='store_true', help="Also benchmark crawling the mock site")
+    parser.add_argument('--crawl-only', action='store_true', help="Only benchmark crawling the mock site")
+    parser.add_argument('--papers', type=int, default=DEFAULT_CRAWL_PAPERS, help="Papers on the mock listing")
+    parser.add_argument('--concurrency', type=_int_list, default=DEFAULT_CONCURRENCY,
+                        help="Comma-separated crawler concurrency levels")
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_LATENCY_MS, help="Mock site response delay")
+    parser.add_argument('--jitter-ms', type=float, default=None, help="Delay variation (default: half the delay)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of mock responses that are 503")
+    parser.add_argument('--sequential', type=int, default=DEFAULT_SEQUENTIAL_PAPERS,
+                        help="Papers for the sequential scrape_papers baseline (0 to skip)")
+    args = parser.parse_args()
+
+    if not args.crawl_only:
+        print(f"Listing scaled to {args.entries} papers; detail pages from {args.fixtures}")
+        print(f"{'page':<8} {'parser':<26} {'ms/page':>10} {'speedup':>8}")
+        for row in run_benchmarks(args.fixtures, args.entries, args.repeat):
+            speedup = f"{row['speedup']:.1f}x" if row['speedup'] is not None else ""
+            print(f"{row['page']:<8} {row['parser']:<26} {row['seconds'] * 1000:>10.2f} {speedup:>8}")
+    if args.crawl or args.crawl_only:
+        print(f"\nMock site: {args.papers} papers, {args.latency_ms:.0f} ms latency, "
+              f"{args.error_rate:.0%} errors")
+        _print_crawl_results(crawl_benchmarks(args.papers, args.concurrency, args.latency_ms, args.jitter_ms,
+                                              args.error_rate, args.sequential))
+
+
+if __name__ == "__main__":
+    main()
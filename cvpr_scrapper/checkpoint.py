@@ -0,0 +1,112 @@
+import copy
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from http_cache import BackgroundWriter
+
+
+class CrawlCheckpoint:
+    """
+    Record of the papers a crawl has finished, so an interrupted run can resume.
+
+    Entries are grouped by target (the conference listing URL) and hold the
+    scraped paper data, so a resumed run can still produce the complete output
+    without requesting those pages again. Clear the target once a run completes;
+    the next run then re-checks every page. Writes go through a BackgroundWriter
+    so they never block the event loop. A crawl of several targets opens one
+    checkpoint and works through for_target() views, so all of them share one
+    connection and one writer thread.
+    """
+
+    def __init__(self, path: Path, target: Optional[str] = None):
+        self.path = Path(path)
+        self.target = target
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS completed ("
+            " target TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " paper TEXT NOT NULL,"
+            " PRIMARY KEY (target, url))"
+        )
+        self.connection.commit()
+        self.writer = BackgroundWriter(self.path)
+        self._owner = True
+
+    def for_target(self, target: str) -> "CrawlCheckpoint":
+        """
+        This checkpoint for another target, sharing its connection and writer; close only the original.
+        """
+        view = copy.copy(self)
+        view.target = target
+        view._owner = False
+        return view
+
+    def completed(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Papers already scraped for this target, keyed by paper URL.
+        """
+        rows = self.connection.execute(
+            "SELECT url, paper FROM completed WHERE target = ?", (self.target,)
+        ).fetchall()
+        return {url: json.loads(paper) for url, paper in rows}
+
+    def iter_completed(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (url, paper) for this target's completed papers without loading them all at once.
+        """
+        cursor = self.connection.execute("SELECT url, paper FROM completed WHERE target = ?", (self.target,))
+        for url, paper in cursor:
+            yield url, json.loads(paper)
+
+    def is_completed(self, url: str) -> bool:
+        return self.connection.execute(
+            "SELECT 1 FROM completed WHERE target = ? AND url = ?", (self.target, url)
+        ).fetchone() is not None
+
+    def add(self, url: str, paper: Dict[str, Any]) -> None:
+        """
+        Mark a paper as done. Committed on the writer thread right away, so a crash
+        loses at most the pages in flight and the writes still queued.
+        """
+        self.writer.submit(lambda connection: connection.execute(
+            "INSERT OR REPLACE INTO completed (target, url, paper) VALUES (?, ?, ?)",
+            (self.target, url, json.dumps(paper))
+        ))
+
+    def clear(self) -> None:
+        """
+        Forget this target's progress (call after a run has finished).
+        """
+        self.writer.submit(lambda connection: connection.execute(
+            "DELETE FROM completed WHERE target = ?", (self.target,)
+        ))
+
+    def close(self) -> None:
+        if self._owner:
+            self.writer.close()
+            self.connection.close()
+
+
+def has_progress(path: Path, targets: Iterable[str]) -> bool:
+    """
+    Whether an interrupted crawl left completed papers for any of the targets in the file at `path`.
+    """
+    path = Path(path)
+    if not path.exists():
+        return False
+    connection = sqlite3.connect(str(path))
+    try:
+        targets = list(targets)
+        placeholders = ', '.join('?' for _ in targets)
+        return connection.execute(
+            f"SELECT 1 FROM completed WHERE target IN ({placeholders}) LIMIT 1", targets
+        ).fetchone() is not None
+    except sqlite3.OperationalError:
+        # No crawl has checkpointed into this file yet.
+        return False
+    finally:
+        connection.close()
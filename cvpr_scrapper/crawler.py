@@ -0,0 +1,490 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from checkpoint import CrawlCheckpoint
+from http_cache import ResponseCache
+from parsing import BASE_URL, parse_listing, parse_paper_details
+
+CONCURRENCY = 8             # Requests in flight at once (also the connection pool size).
+REQUESTS_PER_SECOND = 4.0   # Sustained request rate allowed per host.
+BURST = 4                   # Requests a host may receive back to back before the rate applies.
+MAX_RETRIES = 5             # Retries for 429/5xx responses and connection errors.
+BACKOFF_SECONDS = 1.0       # First retry delay; doubles on every further attempt.
+TIMEOUT_SECONDS = 30        # Whole-request limit for pages; for downloads, the limit between two reads.
+CHUNK_SIZE = 256 * 1024     # Bytes read and written at a time by downloads.
+USER_AGENT = "cvpr_scrapper (+https://github.com/xzhou110/ai_projects)"
+
+# Responses that mean "try again later" rather than "this page is broken".
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: holds up to `burst` tokens, refilled at `rate` tokens per second.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """
+        Wait until a token is available and take it.
+        """
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Empty the bucket and hold back the next token for `seconds` (the host asked us to slow down).
+        """
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def _range_total(response: aiohttp.ClientResponse) -> Optional[int]:
+    """
+    Full size of the file, from a Content-Range header such as "bytes 100-199/1000" or "bytes */1000".
+    """
+    match = re.search(r'/(\d+)$', response.headers.get('Content-Range', ''))
+    return int(match.group(1)) if match else None
+
+
+def _range_start(response: aiohttp.ClientResponse) -> Optional[int]:
+    """
+    First byte of a 206 body, from a Content-Range header such as "bytes 100-199/1000".
+    """
+    match = re.match(r'bytes (\d+)-', response.headers.get('Content-Range', ''))
+    return int(match.group(1)) if match else None
+
+
+def _response_validator(response: aiohttp.ClientResponse) -> Optional[str]:
+    """
+    If-Range value identifying this version of the file: a strong ETag, else Last-Modified.
+    """
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+
+def _read_validator(path: Path) -> Optional[str]:
+    try:
+        return json.loads(path.read_text(encoding='utf-8')).get('if_range')
+    except (OSError, ValueError):
+        return None
+
+
+def _write_validator(path: Path, if_range: Optional[str]) -> None:
+    if if_range is None:
+        path.unlink(missing_ok=True)
+    else:
+        path.write_text(json.dumps({'if_range': if_range}), encoding='utf-8')
+
+
+def _hash_file(path: Path, chunk_size: int = CHUNK_SIZE) -> Tuple["hashlib._Hash", int]:
+    """
+    SHA-256 object and size of whatever `path` holds (nothing if it does not exist).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    if path.exists():
+        with path.open('rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+                size += len(chunk)
+    return digest, size
+
+
+def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+    """
+    Seconds requested by a Retry-After header, if it holds a number.
+    """
+    value = response.headers.get('Retry-After')
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AsyncFetcher:
+    """
+    Pooled keep-alive HTTP client with bounded concurrency, per-host rate limits and retries.
+
+    With a ResponseCache, requests for cached pages are conditional (If-None-Match /
+    If-Modified-Since) and a 304 answer returns the cached body. With a `timings`
+    dict, the seconds taken by every successful page request are appended to
+    timings['request'] (the crawl adds page parse times under 'parse').
+
+    Use as an async context manager:
+
+        async with AsyncFetcher() as fetcher:
+            html = await fetcher.fetch_text(url)
+    """
+
+    def __init__(self, concurrency: int = CONCURRENCY, requests_per_second: float = REQUESTS_PER_SECOND,
+                 burst: int = BURST, max_retries: int = MAX_RETRIES, backoff_seconds: float = BACKOFF_SECONDS,
+                 timeout_seconds: float = TIMEOUT_SECONDS, cache: Optional[ResponseCache] = None,
+                 timings: Optional[Dict[str, List[float]]] = None):
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.cache = cache
+        self.timings = timings
+        self.stats = {'downloaded': 0, 'not_modified': 0, 'failed': 0}
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+            headers={'User-Agent': USER_AGENT},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.session.close()
+
+    def record(self, name: str, seconds: float) -> None:
+        if self.timings is not None:
+            self.timings.setdefault(name, []).append(seconds)
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+        return self._buckets[host]
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential backoff with jitter so retries from many tasks do not line up.
+        return self.backoff_seconds * (2 ** attempt) * (0.5 + random.random())
+
+    def _retry_delay(self, url: str, response: aiohttp.ClientResponse, attempt: int) -> float:
+        """
+        Seconds to wait before retrying a RETRY_STATUSES response: its Retry-After (even 0), else backoff.
+
+        A 429 also pauses the host's bucket for that long, so the other requests
+        queued for the host wait too instead of running into the limit again.
+        """
+        delay = _retry_after(response)
+        if delay is None:
+            delay = self._backoff(attempt)
+        if response.status == 429:
+            self._bucket(url).pause(delay)
+        return delay
+
+    async def fetch_text(self, url: str) -> Optional[str]:
+        """
+        Fetch a page, retrying 429/5xx responses and connection errors with backoff.
+
+        Returns:
+            The response body, or None if the page could not be fetched.
+        """
+        headers = self.cache.conditional_headers(url) if self.cache else {}
+        for attempt in range(self.max_retries + 1):
+            await self._bucket(url).acquire()
+            async with self._semaphore:
+                try:
+                    start = time.perf_counter()
+                    async with self.session.get(url, headers=headers) as response:
+                        if response.status == 304 and headers:
+                            self.record('request', time.perf_counter() - start)
+                            self.cache.touch(url)
+                            self.stats['not_modified'] += 1
+                            return self.cache.get(url)['body']
+                        if response.status in RETRY_STATUSES:
+                            delay = self._retry_delay(url, response, attempt)
+                            problem = f"HTTP {response.status}"
+                        elif response.status >= 400:
+                            logging.error(f"Error fetching {url}: HTTP {response.status}")
+                            self.stats['failed'] += 1
+                            return None
+                        else:
+                            body = await response.text()
+                            self.record('request', time.perf_counter() - start)
+                            if self.cache:
+                                self.cache.put(url, body, response.headers.get('ETag'),
+                                               response.headers.get('Last-Modified'))
+                            self.stats['downloaded'] += 1
+                            return body
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    delay = self._backoff(attempt)
+                    problem = repr(e)
+
+            if attempt == self.max_retries:
+                break
+            logging.warning(f"{problem} from {url}; retrying in {delay:.1f}s "
+                            f"(attempt {attempt + 1}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+        logging.error(f"Giving up on {url} after {self.max_retries + 1} attempts ({problem})")
+        self.stats['failed'] += 1
+        return None
+
+    async def download(self, url: str, path: Path, chunk_size: int = CHUNK_SIZE) -> Optional[Dict[str, Any]]:
+        """
+        Stream a file to `path` chunk by chunk, resuming whatever `path` already holds.
+
+        The ETag (or Last-Modified) of the response is kept in `<path>.validator`.
+        A partial file is continued with a Range request carrying it as If-Range,
+        so if the file changed on the server the whole new file is sent and the
+        download starts over instead of joining old and new bytes. Interrupted
+        transfers are retried from the bytes received so far, and the finished
+        file must match the size the server announced. Memory use does not
+        depend on the file size, and file I/O runs off the event loop.
+
+        Returns:
+            {'size': bytes, 'sha256': hex digest} of the complete file, or None on failure.
+        """
+        path = Path(path)
+        validator_path = path.with_name(path.name + '.validator')
+        if_range = _read_validator(validator_path) if path.exists() else None
+        if path.exists() and if_range is None:
+            # Left by a run whose server sent no validator: the bytes may belong to an older version.
+            path.unlink()
+        # Hash the partial file once; the running digest then carries across attempts.
+        digest, size = await asyncio.to_thread(_hash_file, path, chunk_size)
+        problem = None
+        for attempt in range(self.max_retries + 1):
+            # Identity encoding keeps Content-Length and Range offsets in bytes of the file itself.
+            headers = {'Accept-Encoding': 'identity'}
+            if size:
+                headers['Range'] = f"bytes={size}-"
+                if if_range:
+                    headers['If-Range'] = if_range
+
+            await self._bucket(url).acquire()
+            async with self._semaphore:
+                try:
+                    # No total timeout: large files may take long; only stalls abort the transfer.
+                    timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout_seconds,
+                                                    sock_read=self.timeout_seconds)
+                    async with self.session.get(url, headers=headers, timeout=timeout) as response:
+                        if response.status == 416 and size:
+                            # Nothing left to send: the partial file may already be complete.
+                            if _range_total(response) == size:
+                                validator_path.unlink(missing_ok=True)
+                                self.stats['downloaded'] += 1
+                                return {'size': size, 'sha256': digest.hexdigest()}
+                            path.unlink()
+                            digest, size = hashlib.sha256(), 0
+                            delay, problem = 0, "HTTP 416 for a stale partial file"
+                        elif response.status in RETRY_STATUSES:
+                            delay = self._retry_delay(url, response, attempt)
+                            problem = f"HTTP {response.status}"
+                        elif response.status >= 400:
+                            logging.error(f"Error downloading {url}: HTTP {response.status}")
+                            self.stats['failed'] += 1
+                            return None
+                        elif response.status == 206 and _range_start(response) != size:
+                            # A range other than the one asked for cannot be appended.
+                            path.unlink(missing_ok=True)
+                            digest, size = hashlib.sha256(), 0
+                            delay, problem = 0, f"unexpected Content-Range {response.headers.get('Content-Range')}"
+                        else:
+                            if response.status == 206:
+                                expected = _range_total(response)
+                            else:
+                                # Full body (new download, or the file changed): start over.
+                                digest, size = hashlib.sha256(), 0
+                                expected = response.content_length
+                                if_range = _response_validator(response)
+                                await asyncio.to_thread(_write_validator, validator_path, if_range)
+                            f = await asyncio.to_thread(path.open, 'ab' if size else 'wb')
+                            try:
+                                async for chunk in response.content.iter_chunked(chunk_size):
+                                    await asyncio.to_thread(f.write, chunk)
+                                    digest.update(chunk)
+                                    size += len(chunk)
+                            finally:
+                                await asyncio.to_thread(f.close)
+                            if expected is None or size == expected:
+                                validator_path.unlink(missing_ok=True)
+                                self.stats['downloaded'] += 1
+                                return {'size': size, 'sha256': digest.hexdigest()}
+                            if size > expected:
+                                path.unlink()
+                                digest, size = hashlib.sha256(), 0
+                            delay = self._backoff(attempt)
+                            problem = f"size mismatch ({size} of {expected} bytes)"
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    delay = self._backoff(attempt)
+                    problem = repr(e)
+            if attempt == self.max_retries:
+                break
+            logging.warning(f"{problem} from {url}; retrying in {delay:.1f}s "
+                            f"(attempt {attempt + 1}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+        logging.error(f"Giving up on {url} after {self.max_retries + 1} attempts ({problem})")
+        self.stats['failed'] += 1
+        return None
+
+
+async def _crawl(main_url: str, max_papers: Optional[int] = None, base_url: str = BASE_URL,
+                 cache_path: Optional[Path] = None, resume: bool = True,
+                 **fetcher_options: Any) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yield (listing position, paper) pairs: checkpointed papers first, then new ones as they complete.
+    """
+    cache = ResponseCache(cache_path) if cache_path else None
+    checkpoint = CrawlCheckpoint(cache_path, main_url) if cache_path and resume else None
+    tasks: List[asyncio.Task] = []
+    try:
+        async with AsyncFetcher(cache=cache, **fetcher_options) as fetcher:
+            listing_html = await fetcher.fetch_text(main_url)
+            if listing_html is None:
+                logging.error(f"Error fetching the conference page {main_url}")
+                return
+
+            entries = parse_listing(listing_html, base_url, max_papers)
+            if not entries:
+                logging.error("No paper entries found. Please check the page structure.")
+                return
+            position = {entry['paper_url']: i for i, entry in enumerate(entries)}
+
+            completed = 0
+            if checkpoint:
+                for url, paper in checkpoint.iter_completed():
+                    if url in position:
+                        completed += 1
+                        yield position[url], paper
+            pending = [entry for entry in entries if not (checkpoint and checkpoint.is_completed(entry['paper_url']))]
+            if completed:
+                logging.info(f"Resuming: {completed} of {len(entries)} papers already scraped.")
+            logging.info(f"Scraping {len(pending)} detail pages with {fetcher.concurrency} concurrent requests.")
+
+            async def scrape(entry: Dict[str, str]) -> Optional[Dict[str, Any]]:
+                html = await fetcher.fetch_text(entry['paper_url'])
+                if html is None:
+                    return None
+                start = time.perf_counter()
+                try:
+                    abstract, pdf_link, supp_link = parse_paper_details(html, base_url)
+                except Exception as e:
+                    # One unparsable page must not cancel the others; it stays missing from the checkpoint.
+                    logging.error(f"Error parsing {entry['paper_url']}: {e!r}")
+                    fetcher.stats['failed'] += 1
+                    return None
+                fetcher.record('parse', time.perf_counter() - start)
+                paper = {
+                    'title': entry['title'],
+                    'authors': entry['authors'],
+                    'abstract': abstract,
+                    'paper_url': entry['paper_url'],
+                    'pdf_link': pdf_link,
+                    'supplemental_link': supp_link
+                }
+                if checkpoint:
+                    checkpoint.add(entry['paper_url'], paper)
+                return paper
+
+            tasks = [asyncio.ensure_future(scrape(entry)) for entry in pending]
+            done = 0
+            for next_done in asyncio.as_completed(tasks):
+                paper = await next_done
+                done += 1
+                if done % 100 == 0 or done == len(pending):
+                    logging.info(f"Scraped {done}/{len(pending)} detail pages.")
+                if paper is not None:
+                    completed += 1
+                    yield position[paper['paper_url']], paper
+
+            stats = fetcher.stats
+            logging.info(f"{stats['downloaded']} pages downloaded, {stats['not_modified']} unchanged (304), "
+                         f"{stats['failed']} failed.")
+
+        # Keep the checkpoint while papers are missing so the next run retries only those.
+        if checkpoint and completed == len(entries):
+            checkpoint.clear()
+    finally:
+        for task in tasks:
+            task.cancel()
+        if cache:
+            cache.close()
+        if checkpoint:
+            checkpoint.close()
+
+
+async def stream_papers(main_url: str, max_papers: Optional[int] = None, **options: Any) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Scrape a conference and yield each paper as soon as it is ready, without collecting them.
+
+    Papers restored from the checkpoint come first, then new ones in completion
+    order. Takes the same keyword arguments as crawl_papers.
+    """
+    async for _, paper in _crawl(main_url, max_papers, **options):
+        yield paper
+
+
+async def crawl_papers(main_url: str, max_papers: Optional[int] = None, base_url: str = BASE_URL,
+                       cache_path: Optional[Path] = None, resume: bool = True,
+                       **fetcher_options: Any) -> List[Dict[str, Any]]:
+    """
+    Scrape a conference listing and all of its paper detail pages concurrently.
+
+    With `cache_path`, pages are kept in an on-disk response cache and re-runs
+    send conditional requests, and every finished paper is checkpointed; if a run
+    is interrupted, the next one (with `resume`) only scrapes the papers that are
+    still missing. The checkpoint is cleared once every paper has been scraped.
+
+    Args:
+        main_url: URL of the main conference page.
+        max_papers: Maximum number of papers to scrape (None for all).
+        base_url: Site root that relative links are resolved against.
+        cache_path: SQLite file for the response cache and checkpoint (None to disable both).
+        resume: Skip papers completed by an earlier, interrupted run.
+        **fetcher_options: Passed to AsyncFetcher (concurrency, requests_per_second, ...).
+
+    Returns:
+        A list of dictionaries, each containing data for one paper, in listing order.
+    """
+    results = [item async for item in _crawl(main_url, max_papers, base_url, cache_path, resume, **fetcher_options)]
+    return [paper for _, paper in sorted(results, key=lambda item: item[0])]
+
+
+async def crawl_into(writer: Any, main_url: str, max_papers: Optional[int] = None, **options: Any) -> int:
+    """
+    Stream a conference's papers into a writer from writers.py; returns the number written.
+    """
+    count = 0
+    async for paper in stream_papers(main_url, max_papers, **options):
+        writer.write(paper)
+        count += 1
+    return count
+
+
+def scrape_conference(main_url: str, max_papers: Optional[int] = None, **options: Any) -> List[Dict[str, Any]]:
+    """
+    Blocking wrapper around crawl_papers; `options` are crawl_papers' keyword arguments.
+    """
+    return asyncio.run(crawl_papers(main_url, max_papers, **options))
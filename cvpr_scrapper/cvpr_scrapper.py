@@ -1,33 +1,35 @@
 import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
 import time
 import csv
 from pathlib import Path
 import logging
 from typing import Optional, Tuple, Dict, Any, List
 
+from parsing import BASE_URL, build_full_url, parse_listing, parse_paper_details
+from crawler import CONCURRENCY, REQUESTS_PER_SECOND, crawl_into
+from scheduler import parse_targets, crawl_targets_into
+from checkpoint import has_progress
+from writers import DATASET_FIELDNAMES, open_writers
+
 # Configure logging to display timestamps and log levels.
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s [%(levelname)s] %(message)s'
 )
 
-BASE_URL = "https://openaccess.thecvf.com"
 MAIN_URL = "https://openaccess.thecvf.com/CVPR2024?day=all"
-MAX_PAPERS = 20         # Limit for demo purposes.
-DELAY_SECONDS = 3       # Delay between requests to be polite.
-
-
-def build_full_url(relative_link: str) -> str:
-    """
-    Build a full URL given a relative link.
-    """
-    if relative_link.startswith('/'):
-        return BASE_URL + relative_link
-    return relative_link
+MAX_PAPERS = None       # Scrape the whole conference; set a number to limit demo runs.
+DELAY_SECONDS = 3       # Delay between requests of the sequential scrape_papers path.
+# Response cache and resume checkpoint shared by all runs.
+CACHE_PATH = Path(__file__).parent / "cvpr_cache.sqlite"
+# Default outputs, next to this script.
+OUTPUT_PATH = Path(__file__).parent / "cvpr2024_papers.csv"
+DATASET_PATH = Path(__file__).parent / "cvf_papers.csv"
 
 
-def scrape_paper_details(paper_url: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+def scrape_paper_details(paper_url: str, base_url: str = BASE_URL) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
     """
     Given a paper detail page URL, extract the abstract, PDF link, and supplemental link.
     
@@ -41,35 +43,22 @@ def scrape_paper_details(paper_url: str) -> Optional[Tuple[str, Optional[str], O
         logging.error(f"Error fetching {paper_url}: {e}")
         return None
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+    return parse_paper_details(response.text, base_url)
 
-    # Locate the abstract (it might be in a <div> with id or class "abstract")
-    abstract_div = soup.find('div', id='abstract') or soup.find('div', class_='abstract')
-    abstract = abstract_div.get_text(strip=True) if abstract_div else ""
 
-    # Extract PDF and supplementary links.
-    pdf_link = None
-    supp_link = None
-    for a in soup.find_all('a'):
-        link_text = a.get_text(strip=True).lower()
-        href = a.get('href')
-        if not href:
-            continue
-        if "pdf" in link_text and not pdf_link:
-            pdf_link = build_full_url(href)
-        elif ("supp" in link_text or "supplement" in link_text) and not supp_link:
-            supp_link = build_full_url(href)
-
-    return abstract, pdf_link, supp_link
-
-
-def scrape_papers(main_url: str, max_papers: int = MAX_PAPERS) -> List[Dict[str, Any]]:
+def scrape_papers(main_url: str, max_papers: Optional[int] = MAX_PAPERS, base_url: str = BASE_URL,
+                  delay_seconds: float = DELAY_SECONDS) -> List[Dict[str, Any]]:
     """
     Scrape the main CVPR 2024 page for paper entries and return a list of paper data dictionaries.
     
+    Fetches one page at a time with `delay_seconds` between requests; the concurrent
+    crawler in crawler.py is much faster for whole conferences.
+    
     Args:
         main_url: URL of the main conference page.
-        max_papers: Maximum number of papers to scrape.
+        max_papers: Maximum number of papers to scrape (None for all).
+        base_url: Site root that relative links are resolved against.
+        delay_seconds: Pause before each detail page request.
     
     Returns:
         A list of dictionaries, each containing data for one paper.
@@ -81,35 +70,22 @@ def scrape_papers(main_url: str, max_papers: int = MAX_PAPERS) -> List[Dict[str,
         logging.error(f"Error fetching the main CVPR 2024 page: {e}")
         return []
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    paper_entries = soup.find_all('dt', class_='ptitle')
+    paper_entries = parse_listing(response.text, base_url, max_papers)
     if not paper_entries:
         logging.error("No paper entries found. Please check the page structure.")
         return []
 
     papers_data = []
     for count, entry in enumerate(paper_entries):
-        if count >= max_papers:
+        if max_papers is not None and count >= max_papers:
             break
 
-        a_tag = entry.find('a')
-        if not a_tag:
-            continue
-
-        title = a_tag.get_text(strip=True)
-        paper_relative_link = a_tag.get('href')
-        if not paper_relative_link:
-            continue
-        paper_url = build_full_url(paper_relative_link)
-
-        # Extract authors from the corresponding <dd> tag (usually the next sibling).
-        dd_authors = entry.find_next_sibling('dd')
-        authors = dd_authors.get_text(strip=True) if dd_authors else ""
+        title, authors, paper_url = entry['title'], entry['authors'], entry['paper_url']
 
         logging.info(f"Scraping paper: {title}")
-        time.sleep(DELAY_SECONDS)
+        time.sleep(delay_seconds)
 
-        details = scrape_paper_details(paper_url)
+        details = scrape_paper_details(paper_url, base_url)
         if details is None:
             continue
         abstract, pdf_link, supp_link = details
@@ -146,16 +122,53 @@ def save_to_csv(data: List[Dict[str, Any]], output_path: Path) -> None:
         logging.error(f"Error writing CSV file: {e}")
 
 
+def resuming(options: Dict[str, Any], urls: List[str]) -> bool:
+    """
+    Whether this run continues an interrupted crawl, so the outputs it left are appended to.
+    """
+    return bool(options['resume'] and options['cache_path'] and has_progress(options['cache_path'], urls))
+
+
 def main():
-    logging.info("Starting the CVPR 2024 scraping process.")
-    papers_data = scrape_papers(MAIN_URL)
-    if not papers_data:
-        logging.error("No paper data scraped; exiting.")
+    parser = argparse.ArgumentParser(description="Scrape CVPR 2024 papers from openaccess.thecvf.com.")
+    parser.add_argument('--max-papers', type=int, default=MAX_PAPERS, help="Maximum number of papers (default: all)")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help="Concurrent requests")
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND, help="Requests per second per host")
+    parser.add_argument('--cache', type=Path, default=CACHE_PATH, help="SQLite file for the response cache and checkpoint")
+    parser.add_argument('--no-cache', action='store_true', help="Do not cache responses or checkpoint progress")
+    parser.add_argument('--no-resume', action='store_true', help="Ignore progress saved by an interrupted run")
+    parser.add_argument('--output', type=Path, default=None,
+                        help=f"Output file (.csv, .jsonl, .sqlite or .parquet; default: {OUTPUT_PATH.name}, "
+                             f"or {DATASET_PATH.name} with --conferences)")
+    parser.add_argument('--sink', type=Path, default=None,
+                        help="Additional output, e.g. papers.sqlite or papers.parquet")
+    parser.add_argument('--conferences', nargs='+', default=None, metavar='TARGET',
+                        help="Crawl several conferences into one dataset, e.g. CVPR2024 ICCV WACV2022-2024 or all")
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help="Processes parsing pages with --conferences (default: one per core)")
+    args = parser.parse_args()
+
+    options = dict(cache_path=None if args.no_cache else args.cache, resume=not args.no_resume,
+                   concurrency=args.concurrency, requests_per_second=args.rate)
+    # Papers are written as they arrive, so partial results are on disk while the crawl runs.
+    if args.conferences:
+        try:
+            targets = parse_targets(args.conferences)
+        except ValueError as e:
+            parser.error(str(e))
+        logging.info(f"Starting the scraping process for {', '.join(target.name for target in targets)}.")
+        append = resuming(options, [target.listing_url() for target in targets])
+        with open_writers([args.output or DATASET_PATH, args.sink], fieldnames=DATASET_FIELDNAMES,
+                          append=append) as writer:
+            count = asyncio.run(crawl_targets_into(writer, targets, max_papers=args.max_papers,
+                                                   parse_workers=args.parse_workers, **options))
+    else:
+        logging.info("Starting the CVPR 2024 scraping process.")
+        with open_writers([args.output or OUTPUT_PATH, args.sink], append=resuming(options, [MAIN_URL])) as writer:
+            count = asyncio.run(crawl_into(writer, MAIN_URL, args.max_papers, **options))
+    if count == 0:
+        logging.error("No paper data scraped.")
         return
-
-    # Ensure the CSV is saved to the same folder as this script.
-    output_file = Path(__file__).parent / "cvpr2024_papers.csv"
-    save_to_csv(papers_data, output_file)
     logging.info("Scraping complete.")
 
 
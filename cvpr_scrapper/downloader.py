@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+from urllib.parse import urlsplit
+
+from crawler import CONCURRENCY, REQUESTS_PER_SECOND, AsyncFetcher
+from writers import read_papers
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s'
+)
+
+STORE_DIR = Path(__file__).parent / "downloads"
+DEFAULT_INPUT = Path(__file__).parent / "cvpr2024_papers.csv"
+# Link columns of the scraper output that point at files.
+LINK_FIELDS = ('pdf_link', 'supplemental_link')
+
+
+class ContentStore:
+    """
+    Downloaded files stored once per content hash.
+
+    Layout of the store directory:
+        objects/ab/abcdef....pdf   files named by their SHA-256 (plus the URL's extension)
+        partial/<url hash>.part    unfinished downloads, resumed on the next run
+        store.sqlite               which URL holds which object
+
+    The same file linked from several conferences or years is kept once.
+    """
+
+    def __init__(self, path: Path = STORE_DIR):
+        self.path = Path(path)
+        (self.path / "objects").mkdir(parents=True, exist_ok=True)
+        (self.path / "partial").mkdir(exist_ok=True)
+        # download_all() calls add() from its writer thread.
+        self.connection = sqlite3.connect(str(self.path / "store.sqlite"), check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            " sha256 TEXT PRIMARY KEY,"
+            " path TEXT NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            " url TEXT PRIMARY KEY,"
+            " sha256 TEXT NOT NULL REFERENCES objects (sha256),"
+            " downloaded_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def lookup(self, url: str) -> Optional[Path]:
+        """
+        Stored file of a URL downloaded earlier, or None.
+        """
+        row = self.connection.execute(
+            "SELECT objects.path FROM urls JOIN objects USING (sha256) WHERE urls.url = ?", (url,)
+        ).fetchone()
+        if row is None or not (self.path / row[0]).exists():
+            return None
+        return self.path / row[0]
+
+    def partial_path(self, url: str) -> Path:
+        return self.path / "partial" / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.part"
+
+    def add(self, url: str, partial: Path, sha256: str, size: int) -> Tuple[Path, bool]:
+        """
+        Move a finished download into the store.
+
+        Returns:
+            (stored path, True if an identical file was already stored and the download was dropped).
+        """
+        row = self.connection.execute("SELECT path FROM objects WHERE sha256 = ?", (sha256,)).fetchone()
+        duplicate = row is not None and (self.path / row[0]).exists()
+        if duplicate:
+            relative = row[0]
+            partial.unlink()
+        else:
+            suffix = Path(urlsplit(url).path).suffix.lower()
+            relative = f"objects/{sha256[:2]}/{sha256}{suffix}"
+            (self.path / relative).parent.mkdir(exist_ok=True)
+            partial.replace(self.path / relative)
+            self.connection.execute("INSERT OR REPLACE INTO objects (sha256, path, size) VALUES (?, ?, ?)",
+                                    (sha256, relative, size))
+        self.connection.execute("INSERT OR REPLACE INTO urls (url, sha256, downloaded_at) VALUES (?, ?, ?)",
+                                (url, sha256, time.time()))
+        self.connection.commit()
+        return self.path / relative, duplicate
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def collect_links(papers: Iterable[Dict[str, Any]], fields: Iterable[str] = LINK_FIELDS) -> List[str]:
+    """
+    File URLs of the given papers, without repeats, in input order.
+    """
+    fields = list(fields)
+    links = {}
+    for paper in papers:
+        for field in fields:
+            if paper.get(field):
+                links[paper[field]] = None
+    return list(links)
+
+
+async def download_all(urls: List[str], store: ContentStore, **fetcher_options: Any) -> Dict[str, int]:
+    """
+    Download every URL not in the store yet, a bounded number at a time.
+
+    Finished files are moved into the store and recorded on one writer thread,
+    so the commit and the rename never stall the other downloads.
+
+    Returns:
+        Counts of 'downloaded', 'duplicates', 'skipped' (already stored) and 'failed' URLs,
+        plus the 'bytes' transferred.
+    """
+    counts = {'downloaded': 0, 'duplicates': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+    pending = []
+    for url in urls:
+        if store.lookup(url):
+            counts['skipped'] += 1
+        else:
+            pending.append(url)
+    logging.info(f"{len(urls)} files linked, {counts['skipped']} already stored, {len(pending)} to download.")
+
+    loop = asyncio.get_running_loop()
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store-writer")
+    async with AsyncFetcher(**fetcher_options) as fetcher:
+        async def fetch(url: str) -> None:
+            partial = store.partial_path(url)
+            resumed = partial.stat().st_size if partial.exists() else 0
+            result = await fetcher.download(url, partial)
+            if result is None:
+                counts['failed'] += 1
+                return
+            counts['bytes'] += result['size'] - resumed
+            _, duplicate = await loop.run_in_executor(writer, store.add, url, partial, result['sha256'], result['size'])
+            counts['duplicates' if duplicate else 'downloaded'] += 1
+
+        tasks = [asyncio.ensure_future(fetch(url)) for url in pending]
+        try:
+            for done, next_done in enumerate(asyncio.as_completed(tasks), 1):
+                await next_done
+                if done % 100 == 0 or done == len(pending):
+                    logging.info(f"Downloaded {done}/{len(pending)} files.")
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.shutdown(wait=True)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the PDFs and supplemental files of scraped papers.")
+    parser.add_argument('inputs', nargs='*', type=Path, default=[DEFAULT_INPUT],
+                        help="Output files of cvpr_scrapper.py (.csv, .jsonl, .sqlite or .parquet)")
+    parser.add_argument('--store', type=Path, default=STORE_DIR, help="Directory of the content-addressed store")
+    parser.add_argument('--no-supplemental', action='store_true', help="Only download the paper PDFs")
+    parser.add_argument('--limit', type=int, default=None, help="Download at most this many files")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help="Concurrent downloads")
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND, help="Requests per second per host")
+    args = parser.parse_args()
+
+    fields = ['pdf_link'] if args.no_supplemental else LINK_FIELDS
+    urls = collect_links((paper for path in args.inputs for paper in read_papers(path)), fields)[:args.limit]
+    store = ContentStore(args.store)
+    start = time.perf_counter()
+    try:
+        counts = asyncio.run(download_all(urls, store, concurrency=args.concurrency, requests_per_second=args.rate))
+    finally:
+        store.close()
+    elapsed = time.perf_counter() - start
+    logging.info(f"{counts['downloaded']} files downloaded, {counts['duplicates']} duplicates of stored files, "
+                 f"{counts['skipped']} already stored, {counts['failed']} failed; "
+                 f"{counts['bytes'] / 1e6:.1f} MB in {elapsed:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
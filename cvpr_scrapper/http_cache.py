@@ -0,0 +1,141 @@
+import logging
+import sqlite3
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable
+
+# Attempts of a background write that finds the database locked by another connection.
+WRITE_ATTEMPTS = 5
+
+class BackgroundWriter:
+    """
+    Runs the writes to one SQLite file on a dedicated thread, in the order they are submitted.
+
+    The crawl's event loop hands a write over and carries on; compression, the
+    statement and the commit (and its fsync) happen on the writer thread, over
+    a connection of its own. flush() waits for everything submitted so far.
+    """
+
+    def __init__(self, path: Path):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        # Created here but only ever used on the writer thread.
+        self.connection = sqlite3.connect(str(path), check_same_thread=False)
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._last: Optional[Future] = None
+
+    def submit(self, write: Callable[[sqlite3.Connection], Any]) -> None:
+        self._last = self._executor.submit(self._run, write)
+
+    def _run(self, write: Callable[[sqlite3.Connection], Any]) -> None:
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                write(self.connection)
+                self.connection.commit()
+                return
+            except sqlite3.Error as e:
+                self.connection.rollback()
+                # "database is locked": another connection held the write lock past the busy timeout.
+                busy = isinstance(e, sqlite3.OperationalError) and 'locked' in str(e)
+                if not busy or attempt == WRITE_ATTEMPTS - 1:
+                    logging.exception(f"Background SQLite write lost after {attempt + 1} attempt(s)")
+                    return
+                logging.warning(f"SQLite database busy; retrying the write (attempt {attempt + 1}/{WRITE_ATTEMPTS})")
+                time.sleep(0.1 * 2 ** attempt)
+
+    def flush(self) -> None:
+        if self._last is not None:
+            self._last.result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.connection.close()
+
+
+class ResponseCache:
+    """
+    Persistent cache of fetched pages keyed by URL, stored in SQLite.
+
+    Each entry keeps the (compressed) body together with the ETag and
+    Last-Modified validators the server sent, so later requests can be made
+    conditional and a 304 Not Modified answer reuses the stored body.
+    Writes go through a BackgroundWriter so they never block the event loop.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY,"
+            " body BLOB NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+        self.writer = BackgroundWriter(self.path)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached entry for a URL ('body', 'etag', 'last_modified', 'fetched_at'), or None.
+        """
+        row = self.connection.execute(
+            "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        return {
+            'body': zlib.decompress(body).decode('utf-8'),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': fetched_at,
+        }
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Request headers that let the server answer 304 if the cached copy is still current.
+        """
+        row = self.connection.execute(
+            "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        headers = {}
+        if row is not None:
+            etag, last_modified = row
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def put(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """
+        Store or replace the cached copy of a page.
+        """
+        fetched_at = time.time()
+        self.writer.submit(lambda connection: connection.execute(
+            "INSERT OR REPLACE INTO responses (url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (url, zlib.compress(body.encode('utf-8')), etag, last_modified, fetched_at)
+        ))
+
+    def touch(self, url: str) -> None:
+        """
+        Record that the cached copy was revalidated just now.
+        """
+        fetched_at = time.time()
+        self.writer.submit(lambda connection: connection.execute(
+            "UPDATE responses SET fetched_at = ? WHERE url = ?", (fetched_at, url)
+        ))
+
+    def flush(self) -> None:
+        """
+        Wait until every write submitted so far is committed.
+        """
+        self.writer.flush()
+
+    def close(self) -> None:
+        self.writer.close()
+        self.connection.close()
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import hashlib
+import logging
+import random
+import re
+from html import escape
+from typing import Dict, Any
+
+from aiohttp import web
+
+DEFAULT_PAPERS = 2716   # Papers per conference listing (CVPR 2024 had 2716).
+DEFAULT_PORT = 8765
+
+WORDS = """
+image video 3d scene object detection segmentation diffusion model transformer learning self-supervised
+neural radiance field point cloud generation depth estimation pose human mesh reconstruction tracking
+semantic instance panoptic attention network representation contrastive multimodal language vision
+zero-shot few-shot domain adaptation robust efficient real-time lightweight unified framework benchmark
+dataset editing synthesis super-resolution denoising deblurring inpainting motion optical flow stereo
+camera lidar driving autonomous navigation embodied agent retrieval captioning grounding reasoning
+""".split()
+FIRST_NAMES = "Wei Li Jing Hao Yu Chen Anna Marco Sara David Kai Lei Ming Xin Yan Jun Tao Min Priya Omar".split()
+LAST_NAMES = "Zhang Wang Liu Chen Yang Huang Zhao Wu Zhou Xu Sun Ma Zhu Hu Lin Kim Lee Park Rossi Smith".split()
+
+PAGE_HEAD = """<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=UTF-8" />
+<title>{name} Open Access Repository</title>
+<link rel="stylesheet" type="text/css" href="../../static/conf.css" />
+<script type="text/javascript" src="../../static/jquery.js"></script>
+</head>
+<body>
+<div id="header">
+<div id="header_left">
+<a href="https://www.thecvf.com/"><img src="/img/cropped-cvf-s.jpg" width="175" height="112" border="0" alt="CVF"></a>
+</div>
+<div id="header_right">
+<div id="header_title">
+<a href="https://www.thecvf.com/">{name}</a> <a href="/menu" class="a_monochrome">open access</a>
+</div>
+<div id="help" >
+These {name} papers are the Open Access versions, provided by the <a href="https://www.thecvf.com/">Computer Vision Foundation.</a>
+</div>
+</div>
+</div>
+<div class="clear"></div>
+<div id="content">
+<dl>
+"""
+PAGE_TAIL = "</dl>\n</div>\n</body>\n</html>\n"
+
+
+class MockPaper:
+    """
+    Deterministic fake paper number `number` of a conference edition such as "CVPR2024".
+    """
+
+    def __init__(self, name: str, number: int):
+        rng = random.Random(f"{name}/{number}")
+        self.name = name
+        self.title = ' '.join(rng.choices(WORDS, k=rng.randint(6, 12))).capitalize()
+        self.authors = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(2, 8))]
+        self.abstract = '. '.join(' '.join(rng.choices(WORDS, k=rng.randint(12, 25))).capitalize()
+                                  for _ in range(rng.randint(6, 10))) + '.'
+        self.has_supplemental = rng.random() < 0.7
+        conference, year = name[:-4], name[-4:]
+        self.slug = f"{self.authors[0].split()[-1]}_Paper_{number:05d}_{conference}_{year}"
+        self.html_path = f"/content/{name}/html/{self.slug}_paper.html"
+        self.pdf_path = f"/content/{name}/papers/{self.slug}_paper.pdf"
+        self.supplemental_path = f"/content/{name}/supplemental/{self.slug}_supplemental.pdf"
+
+    def links(self) -> str:
+        links = f'[<a href="{self.pdf_path}">pdf</a>]\n'
+        if self.has_supplemental:
+            links += f'[<a href="{self.supplemental_path}">supp</a>]\n'
+        bibtex = (f'@InProceedings{{{self.slug},\n    author    = {{{escape(" and ".join(self.authors))}}},\n'
+                  f'    title     = {{{escape(self.title)}}},\n    year      = {{{self.name[-4:]}}}\n}}')
+        return (links + '<div class="link2">[<a class="fakelink" '
+                "onclick=\"$(this).siblings('.bibref').slideToggle()\">bibtex</a>]\n"
+                f'<div class="bibref pre-white-space">{bibtex}</div>\n</div>\n')
+
+    def listing_entry(self) -> str:
+        forms = ',\n'.join(
+            f'<form id="form-{escape(author.replace(" ", "-"))}" action="/{self.name}" method="post" class="authsearch">\n'
+            f'<input type="hidden" name="query_author" value="{escape(author)}">\n'
+            f'<a href="#" onclick="$(this).parent().submit()">{escape(author)}</a>\n</form>'
+            for author in self.authors)
+        return (f'<dt class="ptitle"><br><a href="{self.html_path}">{escape(self.title)}</a></dt>\n'
+                f'<dd>\n{forms}\n</dd>\n<dd>\n{self.links()}</dd>\n')
+
+    def detail_page(self) -> str:
+        return (PAGE_HEAD.format(name=self.name) +
+                f'<dd>\n<div id="papertitle">\n{escape(self.title)}</div>\n'
+                f'<div id="authors">\n<br><b><i>{escape(", ".join(self.authors))}</i></b>; '
+                f'Proceedings of the IEEE/CVF Conference, {self.name[-4:]}</div>\n'
+                '<font size="5">\n<br><b>Abstract</b>\n</font>\n'
+                f'<br><br><div id="abstract">\n{escape(self.abstract)}</div>\n'
+                '<font size="5">\n<br><b>Related Material</b>\n</font>\n<br><br>\n'
+                f'{self.links()}</dd>\n' + PAGE_TAIL)
+
+
+def listing_page(name: str, papers: int) -> str:
+    return PAGE_HEAD.format(name=name) + ''.join(MockPaper(name, i).listing_entry() for i in range(papers)) + PAGE_TAIL
+
+
+def create_app(papers: int = DEFAULT_PAPERS, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+               error_rate: float = 0.0, pdf_bytes: int = 100_000, seed: int = 0) -> web.Application:
+    """
+    aiohttp app imitating openaccess.thecvf.com for any conference edition, e.g. /CVPR2024?day=all.
+
+    Every request waits latency_ms +- jitter_ms; a fraction `error_rate` of them
+    is answered with 503 (with Retry-After: 0 for every second one) before any
+    content. Detail pages carry an ETag and answer If-None-Match with 304.
+    PDF and supplemental links serve `pdf_bytes` bytes with an ETag and honour Range / If-Range requests.
+    """
+    rng = random.Random(seed)
+    listings: Dict[str, str] = {}
+    stats: Dict[str, Any] = {'requests': 0, 'errors': 0}
+
+    def find_paper(name: str, path: str) -> MockPaper:
+        match = re.search(r'_Paper_(\d+)_', path)
+        if not match or int(match.group(1)) >= papers:
+            raise web.HTTPNotFound()
+        return MockPaper(name, int(match.group(1)))
+
+    @web.middleware
+    async def conditions(request: web.Request, handler):
+        stats['requests'] += 1
+        delay = max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        if rng.random() < error_rate:
+            stats['errors'] += 1
+            headers = {'Retry-After': '0'} if stats['errors'] % 2 else {}
+            return web.Response(status=503, headers=headers, text="Service Unavailable")
+        return await handler(request)
+
+    async def listing(request: web.Request) -> web.Response:
+        name = request.match_info['name']
+        if name not in listings:
+            listings[name] = listing_page(name, papers)
+        return web.Response(text=listings[name], content_type='text/html')
+
+    async def detail(request: web.Request) -> web.Response:
+        paper = find_paper(request.match_info['name'], request.path)
+        etag = f'"{paper.slug}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=paper.detail_page(), content_type='text/html', headers={'ETag': etag})
+
+    async def document(request: web.Request) -> web.Response:
+        find_paper(request.match_info['name'], request.path)
+        # Deterministic content so repeated downloads hash the same.
+        block = hashlib.sha256(request.path.encode('utf-8')).digest()
+        body = (block * (pdf_bytes // len(block) + 1))[:pdf_bytes]
+        etag = f'"{block.hex()[:16]}-{pdf_bytes}"'
+        if_range = request.headers.get('If-Range')
+        match = re.fullmatch(r'bytes=(\d+)-', request.headers.get('Range', ''))
+        # A stale If-Range means the client holds another version: send the whole file.
+        if match and if_range in (None, etag):
+            start = int(match.group(1))
+            if start >= len(body):
+                return web.Response(status=416, headers={'Content-Range': f"bytes */{len(body)}"})
+            return web.Response(status=206, body=body[start:], content_type='application/pdf',
+                                headers={'Content-Range': f"bytes {start}-{len(body) - 1}/{len(body)}",
+                                         'ETag': etag})
+        return web.Response(body=body, content_type='application/pdf', headers={'ETag': etag})
+
+    app = web.Application(middlewares=[conditions])
+    app['stats'] = stats
+    app.add_routes([
+        web.get(r'/{name:[A-Z]+\d{4}}', listing),
+        web.get(r'/content/{name}/html/{file}', detail),
+        web.get(r'/content/{name}/papers/{file}', document),
+        web.get(r'/content/{name}/supplemental/{file}', document),
+    ])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for openaccess.thecvf.com.")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument('--papers', type=int, default=DEFAULT_PAPERS, help="Papers per conference listing")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Delay added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Random +- variation of the delay")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--pdf-bytes', type=int, default=100_000, help="Size of every PDF/supplemental file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    logging.info(f"Mock conference site on http://127.0.0.1:{args.port}/CVPR2024?day=all")
+    app = create_app(args.papers, args.latency_ms, args.jitter_ms, args.error_rate, args.pdf_bytes)
+    web.run_app(app, host='127.0.0.1', port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+from itertools import islice
+from typing import Optional, Tuple, Dict, List, Iterator
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # Fall back to BeautifulSoup's pure-Python parser.
+    etree = lxml_html = None
+
+BASE_URL = "https://openaccess.thecvf.com"
+# Characters of the listing page fed to the streaming parser at a time.
+LISTING_CHUNK_SIZE = 64 * 1024
+
+# XPath for <div id="abstract"> or, failing that, <div class="abstract">.
+ABSTRACT_XPATH = ("//div[@id='abstract'] | "
+                  "//div[contains(concat(' ', normalize-space(@class), ' '), ' abstract ')]")
+
+
+def build_full_url(relative_link: str, base_url: str = BASE_URL) -> str:
+    """
+    Build a full URL given a relative link.
+    """
+    if relative_link.startswith('/'):
+        return base_url + relative_link
+    return relative_link
+
+
+def _text(element) -> str:
+    # Same result as BeautifulSoup's get_text(strip=True): stripped text pieces, joined.
+    return ''.join(piece.strip() for piece in element.itertext())
+
+
+def _release(element) -> None:
+    # Drop a finished element and everything before it so the tree never holds the whole page.
+    element.clear(keep_tail=True)
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def iter_listing(html: str, base_url: str = BASE_URL) -> Iterator[Dict[str, str]]:
+    """
+    Yield the paper entries of a conference listing page one at a time, in page order.
+
+    With lxml the page is fed to a pull parser in chunks and each <dt>/<dd> is
+    discarded once handled, so entries arrive before the rest of the page is
+    parsed and memory does not grow with the number of papers. Stopping early
+    (e.g. with max_papers) skips parsing the remainder of the page.
+
+    Yields:
+        Dictionaries with 'title', 'authors' and 'paper_url'.
+    """
+    if etree is None:
+        yield from parse_listing_soup(html, base_url)
+        return
+
+    parser = etree.HTMLPullParser(events=('end',), tag=('dt', 'dd'))
+    pending = None  # Entry whose authors <dd> has not been seen yet.
+    for start in range(0, len(html), LISTING_CHUNK_SIZE):
+        parser.feed(html[start:start + LISTING_CHUNK_SIZE])
+        for _, element in parser.read_events():
+            if element.tag == 'dt':
+                if pending is not None:
+                    yield pending
+                    pending = None
+                if 'ptitle' in (element.get('class') or '').split():
+                    a_tag = element.find('.//a')
+                    if a_tag is not None and a_tag.get('href'):
+                        pending = {
+                            'title': _text(a_tag),
+                            'authors': "",
+                            'paper_url': build_full_url(a_tag.get('href'), base_url),
+                        }
+            elif pending is not None:
+                # The first <dd> after a title holds the authors; later ones hold links.
+                pending['authors'] = _text(element)
+                yield pending
+                pending = None
+            _release(element)
+    try:
+        parser.close()
+    except (etree.ParserError, etree.XMLSyntaxError):
+        # Empty or comment-only page: no entries, like the soup parser.
+        pass
+    if pending is not None:
+        yield pending
+
+
+def parse_listing(html: str, base_url: str = BASE_URL, max_papers: Optional[int] = None) -> List[Dict[str, str]]:
+    """
+    Extract the paper entries from a conference listing page.
+
+    Args:
+        html: HTML of the listing page.
+        base_url: Site root that relative paper links are resolved against.
+        max_papers: Stop after this many entries (None for all).
+
+    Returns:
+        A list of dictionaries with 'title', 'authors' and 'paper_url', in page order.
+    """
+    return list(islice(iter_listing(html, base_url), max_papers))
+
+
+def parse_paper_details(html: str, base_url: str = BASE_URL) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Extract the abstract, PDF link, and supplemental link from a paper detail page.
+
+    Returns:
+        A tuple (abstract, pdf_link, supp_link); missing links are None.
+    """
+    if lxml_html is None:
+        return parse_paper_details_soup(html, base_url)
+
+    try:
+        document = lxml_html.document_fromstring(html)
+    except (etree.ParserError, etree.XMLSyntaxError):
+        # "Document is empty": a blank or comment-only page has no details, as with the soup parser.
+        return "", None, None
+    abstract_divs = document.xpath(ABSTRACT_XPATH)
+    # Prefer id="abstract" over class="abstract", as the soup parser does.
+    abstract_divs.sort(key=lambda div: div.get('id') != 'abstract')
+    abstract = _text(abstract_divs[0]) if abstract_divs else ""
+
+    pdf_link = None
+    supp_link = None
+    for a in document.iter('a'):
+        href = a.get('href')
+        if not href:
+            continue
+        link_text = _text(a).lower()
+        if "pdf" in link_text and not pdf_link:
+            pdf_link = build_full_url(href, base_url)
+        elif ("supp" in link_text or "supplement" in link_text) and not supp_link:
+            supp_link = build_full_url(href, base_url)
+        if pdf_link and supp_link:
+            break
+
+    return abstract, pdf_link, supp_link
+
+
+def parse_listing_soup(html: str, base_url: str = BASE_URL, strain: bool = True) -> List[Dict[str, str]]:
+    """
+    BeautifulSoup version of parse_listing, used when lxml is not installed.
+
+    With `strain`, only the <dt>/<dd> elements are built into the tree.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer(['dt', 'dd']) if strain else None)
+    entries = []
+    for entry in soup.find_all('dt', class_='ptitle'):
+        a_tag = entry.find('a')
+        if not a_tag:
+            continue
+
+        title = a_tag.get_text(strip=True)
+        paper_relative_link = a_tag.get('href')
+        if not paper_relative_link:
+            continue
+
+        # Extract authors from the corresponding <dd> tag (usually the next sibling).
+        dd_authors = entry.find_next_sibling('dd')
+        authors = dd_authors.get_text(strip=True) if dd_authors else ""
+
+        entries.append({
+            'title': title,
+            'authors': authors,
+            'paper_url': build_full_url(paper_relative_link, base_url),
+        })
+    return entries
+
+
+def parse_paper_details_soup(html: str, base_url: str = BASE_URL,
+                             strain: bool = True) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    BeautifulSoup version of parse_paper_details, used when lxml is not installed.
+
+    With `strain`, only <div> and <a> elements are built into the tree.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer(['div', 'a']) if strain else None)
+
+    # Locate the abstract (it might be in a <div> with id or class "abstract")
+    abstract_div = soup.find('div', id='abstract') or soup.find('div', class_='abstract')
+    abstract = abstract_div.get_text(strip=True) if abstract_div else ""
+
+    # Extract PDF and supplementary links.
+    pdf_link = None
+    supp_link = None
+    for a in soup.find_all('a'):
+        link_text = a.get_text(strip=True).lower()
+        href = a.get('href')
+        if not href:
+            continue
+        if "pdf" in link_text and not pdf_link:
+            pdf_link = build_full_url(href, base_url)
+        elif ("supp" in link_text or "supplement" in link_text) and not supp_link:
+            supp_link = build_full_url(href, base_url)
+
+    return abstract, pdf_link, supp_link
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, AsyncIterator, Callable, NamedTuple
+
+from checkpoint import CrawlCheckpoint
+from crawler import AsyncFetcher
+from http_cache import ResponseCache
+from parsing import BASE_URL, parse_listing, parse_paper_details
+
+# Years with open access proceedings on openaccess.thecvf.com (ICCV is held in odd years).
+CONFERENCE_YEARS = {
+    'CVPR': range(2013, 2026),
+    'ICCV': range(2013, 2026, 2),
+    'WACV': range(2020, 2026),
+}
+# From these years on, the listing is split into days and "?day=all" shows every paper.
+DAY_PAGES_SINCE = {'CVPR': 2018, 'ICCV': 2019}
+
+
+def _parse_in_worker(parse: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a parsing function in a pool process.
+
+    lxml's exceptions cannot be pickled back to the crawl (their error log is not
+    picklable), so a failure comes back as a plain ValueError with the same message.
+    """
+    try:
+        return parse(*args)
+    except Exception as e:
+        raise ValueError(f"{type(e).__name__}: {e}") from None
+
+
+class Target(NamedTuple):
+    """
+    One conference edition to crawl, e.g. Target('CVPR', 2024).
+    """
+    conference: str
+    year: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.conference}{self.year}"
+
+    def listing_url(self, base_url: str = BASE_URL) -> str:
+        url = f"{base_url}/{self.name}"
+        if self.year >= DAY_PAGES_SINCE.get(self.conference, 9999):
+            url += "?day=all"
+        return url
+
+
+def parse_targets(specs: Iterable[str]) -> List[Target]:
+    """
+    Turn specs such as "CVPR2024", "ICCV" (every year), "WACV2022-2024" or "all" into targets.
+    """
+    targets = []
+    for spec in specs:
+        spec = spec.strip().upper()
+        if spec == 'ALL':
+            targets += [Target(conference, year) for conference, years in CONFERENCE_YEARS.items() for year in years]
+            continue
+        match = re.fullmatch(r'([A-Z]+)(?:(\d{4})(?:-(\d{4}))?)?', spec)
+        if not match or match.group(1) not in CONFERENCE_YEARS:
+            raise ValueError(f"Unknown conference target: {spec} (known: {', '.join(CONFERENCE_YEARS)})")
+        conference, first, last = match.groups()
+        years = CONFERENCE_YEARS[conference]
+        if first and not last:
+            if int(first) not in years:
+                raise ValueError(f"No {conference} proceedings for {first} "
+                                 f"(available: {', '.join(str(year) for year in years)})")
+            years = [int(first)]
+        elif first:
+            years = [year for year in range(int(first), int(last) + 1) if year in years]
+        targets += [Target(conference, year) for year in years]
+    # Keep the first occurrence of each target.
+    return list(dict.fromkeys(targets))
+
+
+async def stream_targets(targets: List[Target], max_papers: Optional[int] = None, base_url: str = BASE_URL,
+                         cache_path: Optional[Path] = None, resume: bool = True,
+                         parse_workers: Optional[int] = None,
+                         **fetcher_options: Any) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Crawl several conference editions as one job and yield each paper as soon as it is ready.
+
+    Listing and detail pages of every target go through a single work queue,
+    served by one AsyncFetcher, so the connection pool, rate limit and response
+    cache are shared. Pages are parsed in a process pool of `parse_workers`
+    processes (default: one per core) so parsing never blocks the event loop.
+    A paper URL that appears in several listings is scraped and yielded once.
+    Each paper carries 'conference' and 'year' fields.
+
+    Args:
+        targets: Conference editions to crawl (see parse_targets).
+        max_papers: Maximum number of papers per target (None for all).
+        base_url: Site root that listing URLs and relative links are built from.
+        cache_path: SQLite file for the response cache and per-target checkpoints (None to disable).
+        resume: Skip papers completed by an earlier, interrupted run.
+        parse_workers: Processes used for HTML parsing.
+        **fetcher_options: Passed to AsyncFetcher (concurrency, requests_per_second, ...).
+    """
+    loop = asyncio.get_running_loop()
+    cache = ResponseCache(cache_path) if cache_path else None
+    checkpoints = CrawlCheckpoint(cache_path) if cache_path and resume else None
+    queue: asyncio.Queue = asyncio.Queue()
+    results: asyncio.Queue = asyncio.Queue()
+    seen = set()
+    progress: Dict[Target, Dict[str, Any]] = {}
+
+    def tagged(paper: Dict[str, Any], target: Target) -> Dict[str, Any]:
+        return dict(paper, conference=target.conference, year=target.year)
+
+    def finish(target: Target) -> None:
+        state = progress[target]
+        state['pending'] -= 1
+        # Keep the checkpoint while papers are missing so the next run retries only those.
+        if state['pending'] == 0:
+            logging.info(f"{target.name}: {state['scraped']} papers scraped, {state['failed']} failed, "
+                         f"{state['duplicates']} duplicates skipped.")
+            if state['checkpoint'] and state['failed'] == 0:
+                state['checkpoint'].clear()
+
+    async def crawl_listing(fetcher: AsyncFetcher, pool: ProcessPoolExecutor, target: Target) -> None:
+        url = target.listing_url(base_url)
+        html = await fetcher.fetch_text(url)
+        if html is None:
+            logging.error(f"Error fetching the {target.name} listing {url}")
+            return
+        entries = await loop.run_in_executor(pool, _parse_in_worker, parse_listing, html, base_url, max_papers)
+        if not entries:
+            logging.error(f"No paper entries found for {target.name}. Please check the page structure.")
+            return
+
+        checkpoint = checkpoints.for_target(url) if checkpoints else None
+        completed = checkpoint.completed() if checkpoint else {}
+        state = progress[target] = {'pending': 1, 'scraped': 0, 'failed': 0, 'duplicates': 0,
+                                    'checkpoint': checkpoint}
+        for entry in entries:
+            paper_url = entry['paper_url']
+            if paper_url in seen:
+                state['duplicates'] += 1
+                continue
+            seen.add(paper_url)
+            if paper_url in completed:
+                state['scraped'] += 1
+                results.put_nowait(tagged(completed[paper_url], target))
+            else:
+                state['pending'] += 1
+                queue.put_nowait((target, entry))
+        logging.info(f"{target.name}: {len(entries)} papers listed, {state['pending'] - 1} to scrape.")
+        finish(target)
+
+    async def crawl_paper(fetcher: AsyncFetcher, pool: ProcessPoolExecutor, target: Target,
+                          entry: Dict[str, str]) -> None:
+        state = progress[target]
+        try:
+            html = await fetcher.fetch_text(entry['paper_url'])
+            if html is None:
+                state['failed'] += 1
+                return
+            abstract, pdf_link, supp_link = await loop.run_in_executor(pool, _parse_in_worker, parse_paper_details,
+                                                                       html, base_url)
+            paper = {
+                'title': entry['title'],
+                'authors': entry['authors'],
+                'abstract': abstract,
+                'paper_url': entry['paper_url'],
+                'pdf_link': pdf_link,
+                'supplemental_link': supp_link
+            }
+            if state['checkpoint']:
+                state['checkpoint'].add(entry['paper_url'], paper)
+            state['scraped'] += 1
+            results.put_nowait(tagged(paper, target))
+        except Exception as e:
+            # Counted so the checkpoint is kept and the next run retries this paper.
+            logging.warning(f"Error scraping {entry['paper_url']}: {e}")
+            state['failed'] += 1
+        finally:
+            finish(target)
+
+    async def worker(fetcher: AsyncFetcher, pool: ProcessPoolExecutor) -> None:
+        while True:
+            target, entry = await queue.get()
+            try:
+                if entry is None:
+                    await crawl_listing(fetcher, pool, target)
+                else:
+                    await crawl_paper(fetcher, pool, target, entry)
+            except Exception:
+                logging.exception(f"Unexpected error while crawling {target.name}")
+            finally:
+                queue.task_done()
+
+    async def close_results() -> None:
+        await queue.join()
+        results.put_nowait(None)
+
+    parse_workers = parse_workers or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+            async with AsyncFetcher(cache=cache, **fetcher_options) as fetcher:
+                for target in targets:
+                    queue.put_nowait((target, None))
+                # Enough workers to keep every connection busy while other pages are being parsed.
+                tasks: List[asyncio.Task] = [asyncio.ensure_future(worker(fetcher, pool))
+                                             for _ in range(fetcher.concurrency + parse_workers)]
+                tasks.append(asyncio.ensure_future(close_results()))
+                logging.info(f"Crawling {len(targets)} targets with {fetcher.concurrency} concurrent requests "
+                             f"and {parse_workers} parser processes.")
+
+                try:
+                    while True:
+                        paper = await results.get()
+                        if paper is None:
+                            break
+                        yield paper
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+
+                stats = fetcher.stats
+                logging.info(f"{len(seen)} unique papers; {stats['downloaded']} pages downloaded, "
+                             f"{stats['not_modified']} unchanged (304), {stats['failed']} failed.")
+    finally:
+        if cache:
+            cache.close()
+        if checkpoints:
+            checkpoints.close()
+
+
+async def crawl_targets_into(writer: Any, targets: List[Target], **options: Any) -> int:
+    """
+    Stream the papers of several conference editions into a writer; returns the number written.
+    """
+    count = 0
+    async for paper in stream_targets(targets, **options):
+        writer.write(paper)
+        count += 1
+    return count
@@ -0,0 +1,388 @@
+import argparse
+import json
+import logging
+import math
+import re
+import shutil
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+import numpy as np
+
+from writers import read_papers
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s'
+)
+
+INDEX_DIR = Path(__file__).parent / "paper_index"
+DEFAULT_INPUT = Path(__file__).parent / "cvpr2024_papers.csv"
+
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+# Title words count this many times towards a paper's term frequencies.
+TITLE_WEIGHT = 2
+# Fields kept in the index, for displaying results and for rebuilding segments.
+STORED_FIELDS = ['title', 'authors', 'abstract', 'paper_url', 'pdf_link', 'conference', 'year']
+
+# Author terms are prefixed so they never collide with words of the text:
+# "@kai zhang" for a full name, "@@zhang" for a single name part.
+AUTHOR_PREFIX = '@'
+AUTHOR_PART_PREFIX = '@@'
+# Frequencies are stored as uint16.
+MAX_FREQ = np.iinfo(np.uint16).max
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or that the their this to we
+which with our can these via using than such both also while not all more over based
+""".split())
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase words (letters and digits) of a text, without stopwords.
+    """
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _author_names(authors: str) -> List[str]:
+    # Author lists are comma separated ("Kai Zhang,Yongyong Chen" or "Kai Zhang, Yongyong Chen").
+    return [' '.join(_WORD.findall(name.lower())) for name in (authors or '').split(',') if name.strip()]
+
+
+def _author_filter_term(author: str) -> str:
+    name = ' '.join(_WORD.findall(author.lower()))
+    return AUTHOR_PREFIX + name if ' ' in name else AUTHOR_PART_PREFIX + name
+
+
+class Segment:
+    """
+    One immutable, memory-mapped part of the index.
+
+    Files in the segment directory:
+        terms.npy       sorted vocabulary (fixed-width unicode), searched with np.searchsorted
+        offsets.npy     start of each term's postings; term i owns postings[offsets[i]:offsets[i + 1]]
+        postings.npy    document numbers (int32, local to the segment)
+        freqs.npy       term frequency of each posting (uint16)
+        lengths.npy     document lengths in terms (float32)
+        stored.jsonl    STORED_FIELDS of each document, one line each
+        stored_offsets.npy  byte offset of each line in stored.jsonl
+        urls.npy        sorted paper_url of every document, for skipping known papers when adding
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.terms = np.load(self.path / "terms.npy", mmap_mode='r')
+        self.offsets = np.load(self.path / "offsets.npy", mmap_mode='r')
+        self.postings = np.load(self.path / "postings.npy", mmap_mode='r')
+        self.freqs = np.load(self.path / "freqs.npy", mmap_mode='r')
+        self.lengths = np.load(self.path / "lengths.npy", mmap_mode='r')
+        self.stored_offsets = np.load(self.path / "stored_offsets.npy", mmap_mode='r')
+        self.urls = np.load(self.path / "urls.npy", mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def postings_for(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (documents, frequencies) of a term; empty arrays if the segment does not contain it.
+        """
+        i = int(np.searchsorted(self.terms, term))
+        if i == len(self.terms) or self.terms[i] != term:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint16)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.postings[start:end], self.freqs[start:end]
+
+    def stored(self, doc: int) -> Dict[str, Any]:
+        with (self.path / "stored.jsonl").open('rb') as f:
+            f.seek(int(self.stored_offsets[doc]))
+            return json.loads(f.readline())
+
+    def papers(self) -> List[Dict[str, Any]]:
+        """
+        Stored fields of every document, in document order.
+        """
+        with (self.path / "stored.jsonl").open(encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def contains(self, urls: List[str]) -> np.ndarray:
+        """
+        Boolean mask of the given paper URLs that are in this segment.
+        """
+        if not len(self.urls) or not urls:
+            return np.zeros(len(urls), dtype=bool)
+        wanted = np.array(urls, dtype=str)
+        found = np.minimum(np.searchsorted(self.urls, wanted), len(self.urls) - 1)
+        return self.urls[found] == wanted
+
+    @staticmethod
+    def write(path: Path, papers: List[Dict[str, Any]]) -> None:
+        """
+        Build a segment directory for the given papers.
+        """
+        postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        lengths = np.zeros(len(papers), dtype=np.float32)
+        for doc, paper in enumerate(papers):
+            counts: Dict[str, int] = defaultdict(int)
+            for word in tokenize(paper.get('title') or ''):
+                counts[word] += TITLE_WEIGHT
+            for word in tokenize(paper.get('abstract') or ''):
+                counts[word] += 1
+            for word in tokenize(paper.get('authors') or ''):
+                counts[word] += 1
+            lengths[doc] = sum(counts.values())
+            for name in _author_names(paper.get('authors')):
+                counts[AUTHOR_PREFIX + name] = 1
+                for part in name.split():
+                    counts[AUTHOR_PART_PREFIX + part] = 1
+            for term, count in counts.items():
+                postings[term][doc] = min(count, MAX_FREQ)
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        docs = np.fromiter((doc for term in terms for doc in postings[term]), dtype=np.int32, count=offsets[-1])
+        freqs = np.fromiter((freq for term in terms for freq in postings[term].values()),
+                            dtype=np.uint16, count=offsets[-1])
+
+        path.mkdir(parents=True)
+        np.save(path / "terms.npy", np.array(terms, dtype=str) if terms else np.array([], dtype='<U1'))
+        np.save(path / "offsets.npy", offsets)
+        np.save(path / "postings.npy", docs)
+        np.save(path / "freqs.npy", freqs)
+        np.save(path / "lengths.npy", lengths)
+        stored_offsets = np.zeros(len(papers), dtype=np.int64)
+        with (path / "stored.jsonl").open('wb') as f:
+            for doc, paper in enumerate(papers):
+                stored_offsets[doc] = f.tell()
+                f.write(json.dumps({field: paper.get(field) for field in STORED_FIELDS},
+                                   ensure_ascii=False).encode('utf-8') + b'\n')
+        np.save(path / "stored_offsets.npy", stored_offsets)
+        urls = sorted(paper.get('paper_url') or '' for paper in papers)
+        np.save(path / "urls.npy", np.array(urls, dtype=str) if urls else np.array([], dtype='<U1'))
+
+
+class PaperIndex:
+    """
+    On-disk inverted index over paper titles, abstracts and authors with BM25 ranking.
+
+    The index is a directory of immutable segments plus a small manifest.json.
+    Adding papers writes a new segment instead of rewriting the index, and
+    compact() merges the segments back into one. Segments are memory-mapped,
+    so opening the index reads only the manifest and a query touches just the
+    postings of its terms.
+
+        index = PaperIndex(INDEX_DIR)
+        index.add(read_papers("cvpr2024_papers.csv"))
+        for hit in index.search("diffusion denoising", authors=["Kai Zhang"]):
+            print(hit['score'], hit['title'])
+    """
+
+    def __init__(self, path: Path = INDEX_DIR):
+        self.path = Path(path)
+        manifest = self.path / "manifest.json"
+        self.manifest = json.loads(manifest.read_text()) if manifest.exists() else {'segments': [], 'next_segment': 0}
+        self._remove_retired_segments()
+        self.segments = [Segment(self.path / name) for name in self.manifest['segments']]
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self.segments)
+
+    def _save_manifest(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        temporary = self.path / "manifest.json.tmp"
+        temporary.write_text(json.dumps(self.manifest, indent=2))
+        # Swap atomically so a crash never leaves a manifest pointing at half-written segments.
+        temporary.replace(self.path / "manifest.json")
+
+    def _remove_retired_segments(self) -> None:
+        """
+        Delete segment directories that compact() replaced but could not remove.
+
+        On Windows a directory cannot be deleted while another index object or
+        process still has its files memory-mapped; those are cleaned up here on
+        a later open. Segments numbered from next_segment on are left alone, as
+        they may still be in the middle of being written.
+        """
+        if not self.path.is_dir():
+            return
+        live = set(self.manifest['segments'])
+        for directory in self.path.glob("segment_*"):
+            number = directory.name[len("segment_"):]
+            if directory.name not in live and number.isdigit() and int(number) < self.manifest['next_segment']:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def _new_segment_name(self) -> str:
+        name = f"segment_{self.manifest['next_segment']:05d}"
+        self.manifest['next_segment'] += 1
+        return name
+
+    def add(self, papers: Iterable[Dict[str, Any]]) -> int:
+        """
+        Index the papers whose paper_url is not in the index yet; returns how many were added.
+        """
+        batch: Dict[str, Dict[str, Any]] = {}
+        for paper in papers:
+            url = paper.get('paper_url')
+            if url and url not in batch:
+                batch[url] = paper
+        urls = list(batch)
+        known = np.zeros(len(urls), dtype=bool)
+        for segment in self.segments:
+            known |= segment.contains(urls)
+        new_papers = [batch[url] for url, seen in zip(urls, known) if not seen]
+        if not new_papers:
+            return 0
+
+        name = self._new_segment_name()
+        Segment.write(self.path / name, new_papers)
+        self.manifest['segments'].append(name)
+        self._save_manifest()
+        self.segments.append(Segment(self.path / name))
+        return len(new_papers)
+
+    def compact(self) -> None:
+        """
+        Merge all segments into one (keeps queries fast after many small additions).
+        """
+        if len(self.segments) < 2:
+            return
+        papers = [paper for segment in self.segments for paper in segment.papers()]
+        old_paths = [segment.path for segment in self.segments]
+        name = self._new_segment_name()
+        Segment.write(self.path / name, papers)
+        self.manifest['segments'] = [name]
+        self._save_manifest()
+        # Drop the old segments (closing their memory maps) before deleting their files.
+        self.segments = [Segment(self.path / name)]
+        for path in old_paths:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def search(self, query: str, k: int = 10, authors: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        The k best-matching papers for a query, ranked by BM25.
+
+        Args:
+            query: Free text matched against titles, abstracts and author names.
+            k: Number of results.
+            authors: Only return papers with all of these authors. A full name
+                ("Kai Zhang") must match an author exactly; a single word
+                ("Zhang") matches any part of an author's name. Case-insensitive.
+
+        Returns:
+            Stored fields of each hit plus its 'score', best first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        filters = [_author_filter_term(author) for author in authors or [] if author.strip()]
+        if not terms and not filters:
+            return []
+
+        total_docs = len(self)
+        if total_docs == 0:
+            return []
+        total_length = sum(float(np.sum(segment.lengths, dtype=np.float64)) for segment in self.segments)
+        average_length = total_length / total_docs or 1.0
+        postings = [{term: segment.postings_for(term) for term in terms + filters} for segment in self.segments]
+        document_frequency = {term: sum(len(found[term][0]) for found in postings) for term in terms}
+        idf = {term: math.log(1 + (total_docs - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+        candidates = []
+        base = 0
+        for segment, found in zip(self.segments, postings):
+            scores = np.zeros(len(segment))
+            norm = K1 * (1 - B + B * np.asarray(segment.lengths) / average_length)
+            for term in terms:
+                docs, freqs = found[term]
+                if len(docs):
+                    tf = freqs.astype(np.float64)
+                    # Document numbers are unique within a posting list, so fancy-index += is safe.
+                    scores[docs] += idf[term] * tf * (K1 + 1) / (tf + norm[docs])
+            if filters:
+                allowed = np.ones(len(segment), dtype=bool)
+                for term in filters:
+                    mask = np.zeros(len(segment), dtype=bool)
+                    mask[found[term][0]] = True
+                    allowed &= mask
+                if not terms:
+                    # Filter-only query: list the author's papers.
+                    scores[allowed] = 1.0
+                scores[~allowed] = 0.0
+            hits = np.flatnonzero(scores)
+            if len(hits) > k:
+                # Keep every hit tied with the k-th score, so the index-order tie-break below decides.
+                kth = np.partition(scores[hits], len(hits) - k)[len(hits) - k]
+                hits = hits[scores[hits] >= kth]
+            candidates += [(float(scores[doc]), base + int(doc), segment, int(doc)) for doc in hits]
+            base += len(segment)
+
+        # Equal scores keep indexing order, so results do not change when segments are merged.
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        return [dict(segment.stored(doc), score=score) for score, _, segment, doc in candidates[:k]]
+
+
+def index_command(args) -> None:
+    index = PaperIndex(args.index)
+    for path in args.inputs:
+        start = time.perf_counter()
+        added = index.add(read_papers(path))
+        logging.info(f"Indexed {added} new papers from {path} in {time.perf_counter() - start:.2f}s "
+                     f"({len(index)} papers, {len(index.segments)} segments).")
+    if args.compact:
+        index.compact()
+        logging.info("Merged the index into one segment.")
+
+
+def query_command(args) -> None:
+    start = time.perf_counter()
+    index = PaperIndex(args.index)
+    opened = time.perf_counter()
+    hits = index.search(' '.join(args.query), k=args.k, authors=args.author)
+    searched = time.perf_counter()
+    for rank, hit in enumerate(hits, 1):
+        venue = f" [{hit['conference']} {hit['year']}]" if hit.get('conference') else ""
+        print(f"{rank:>3}. {hit['score']:6.2f}  {hit['title']}{venue}")
+        print(f"      {hit['authors']}")
+        print(f"      {hit['paper_url']}")
+    print(f"{len(hits)} results from {len(index)} papers; open {1000 * (opened - start):.1f} ms, "
+          f"search {1000 * (searched - opened):.1f} ms")
+
+
+def compact_command(args) -> None:
+    index = PaperIndex(args.index)
+    index.compact()
+    logging.info(f"{len(index)} papers in {len(index.segments)} segment(s).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and search a local index of scraped papers.")
+    parser.add_argument('--index', type=Path, default=INDEX_DIR, help="Index directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    index_parser = commands.add_parser('index', help="Add the papers of scraper output files to the index")
+    index_parser.add_argument('inputs', nargs='*', type=Path, default=[DEFAULT_INPUT],
+                              help="Output files of cvpr_scrapper.py (.csv, .jsonl, .sqlite or .parquet)")
+    index_parser.add_argument('--compact', action='store_true', help="Merge the index into one segment afterwards")
+    index_parser.set_defaults(handler=index_command)
+
+    query_parser = commands.add_parser('query', help="Search the index with BM25 ranking")
+    query_parser.add_argument('query', nargs='*', help="Search terms")
+    query_parser.add_argument('--author', action='append', default=None,
+                              help="Only papers by this author (repeat for several)")
+    query_parser.add_argument('-k', type=int, default=10, help="Number of results")
+    query_parser.set_defaults(handler=query_command)
+
+    compact_parser = commands.add_parser('compact', help="Merge all segments into one")
+    compact_parser.set_defaults(handler=compact_command)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import argparse
+import json
+import logging
+import zlib
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+import numpy as np
+
+from search_index import tokenize
+from writers import read_papers
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s'
+)
+
+SIMILARITY_DIR = Path(__file__).parent / "similarity_index"
+DEFAULT_INPUT = Path(__file__).parent / "cvpr2024_papers.csv"
+
+NUM_PERM = 128          # MinHash values per paper.
+SEED = 1                # Seed of the hash permutations; stored signatures are only valid for this seed.
+# LSH banding as (bands, rows per band); bands * rows must equal NUM_PERM. Two papers with
+# Jaccard similarity s share a bucket with probability 1 - (1 - s**rows)**bands.
+RELATED_BANDING = (64, 2)       # Finds papers from s ~ 0.15 (50% chance at s = 0.10).
+DUPLICATE_BANDING = (32, 4)     # Only near-duplicates collide (50% chance at s = 0.39).
+# On word 3-grams, changing 5% of the words already lowers the similarity to about 0.7.
+DUPLICATE_THRESHOLD = 0.5
+# Words per shingle. Near-duplicates are compared on word 3-grams, so papers that merely share a
+# vocabulary do not look alike; related papers share topic words but rarely whole phrases.
+DUPLICATE_SHINGLE = 3
+RELATED_SHINGLE = 1
+
+# Largest prime below 2**32: a * x + b with a, b, x < _PRIME always fits in 64 bits.
+_PRIME = np.uint64(4294967291)
+
+
+def _permutations(num_perm: int = NUM_PERM, seed: int = SEED) -> Tuple[np.ndarray, np.ndarray]:
+    # Universal hashing (a * x + b) mod p, one (a, b) pair per permutation.
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingles(paper: Dict[str, Any], size: int = DUPLICATE_SHINGLE) -> np.ndarray:
+    """
+    32-bit hashes of the distinct runs of `size` consecutive content words of a paper's title and abstract.
+
+    A text shorter than `size` words is a single shingle; one without words has none.
+    """
+    words = tokenize(f"{paper.get('title') or ''} {paper.get('abstract') or ''}")
+    grams = {' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))} if words else set()
+    return np.array(sorted(zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64) % _PRIME
+
+
+def minhash(hashes: np.ndarray, permutations: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """
+    MinHash signature (uint32, one value per permutation) of a set of shingle hashes.
+    """
+    a, b = permutations
+    if len(hashes) == 0:
+        return np.full(len(a), _PRIME, dtype=np.uint32)
+    return ((np.outer(hashes, a) + b) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+def band_keys(signatures: np.ndarray, banding: Tuple[int, int]) -> np.ndarray:
+    """
+    One 64-bit bucket key per (paper, band), shape (papers, bands).
+    """
+    bands, rows = banding
+    blocks = signatures.reshape(len(signatures), bands, rows).astype(np.uint64)
+    keys = np.zeros(blocks.shape[:2], dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for row in range(rows):
+            # FNV-style mixing; wrap-around is intended.
+            keys = (keys ^ blocks[:, :, row]) * np.uint64(0x100000001B3)
+    return keys
+
+
+class _Buckets:
+    """
+    Sorted band keys of one banding, so the papers sharing a bucket are found by binary search.
+    """
+
+    def __init__(self, signatures: np.ndarray, banding: Tuple[int, int]):
+        self.banding = banding
+        keys = band_keys(signatures, banding)
+        self.order = np.argsort(keys, axis=0, kind='stable')
+        self.sorted_keys = np.take_along_axis(keys, self.order, axis=0)
+
+    def candidates(self, signature: np.ndarray) -> np.ndarray:
+        """
+        Papers that share at least one bucket with a signature.
+        """
+        keys = band_keys(signature[None, :], self.banding)[0]
+        found = []
+        for band, key in enumerate(keys):
+            column = self.sorted_keys[:, band]
+            start, end = np.searchsorted(column, key, 'left'), np.searchsorted(column, key, 'right')
+            found.append(self.order[start:end, band])
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+    def groups(self) -> Iterable[np.ndarray]:
+        """
+        Papers of every bucket holding more than one paper.
+        """
+        for band in range(self.sorted_keys.shape[1]):
+            column = self.sorted_keys[:, band]
+            boundaries = np.flatnonzero(column[1:] != column[:-1]) + 1
+            starts = np.concatenate(([0], boundaries))
+            ends = np.concatenate((boundaries, [len(column)]))
+            for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+                yield self.order[start:end, band]
+
+
+class SimilarityIndex:
+    """
+    MinHash signatures of paper titles and abstracts, indexed with LSH banding.
+
+    Each paper becomes a set of shingles; the fraction of equal MinHash values
+    between two signatures estimates the Jaccard similarity of those sets.
+    Near-duplicates are found with word 3-gram shingles, related papers with
+    single words (see DUPLICATE_SHINGLE). Banding the signatures into buckets
+    finds similar papers by looking only at papers that share a bucket, instead
+    of comparing all pairs.
+
+    Files in the index directory:
+        signatures.npy       uint32 array (papers x NUM_PERM) of word 3-gram signatures
+        word_signatures.npy  the same for single words
+        papers.jsonl         paper_url, title, conference and year of each row
+        meta.json            settings the signatures were made with, and the number of papers
+
+        index = SimilarityIndex(SIMILARITY_DIR)
+        index.add(read_papers("cvf_papers.csv"))
+        index.save()
+        index.related(paper_url, k=10)
+    """
+
+    def __init__(self, path: Path = SIMILARITY_DIR, num_perm: int = NUM_PERM, seed: int = SEED):
+        self.path = Path(path)
+        self.num_perm = num_perm
+        self.seed = seed
+        self.permutations = _permutations(num_perm, seed)
+        self.papers: List[Dict[str, Any]] = []
+        self.signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self.word_signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        if (self.path / "meta.json").exists():
+            meta = json.loads((self.path / "meta.json").read_text())
+            settings = (meta['num_perm'], meta['seed'], meta['shingle'])
+            if settings != (num_perm, seed, DUPLICATE_SHINGLE):
+                raise ValueError(f"{self.path} holds signatures made with num_perm={settings[0]}, "
+                                 f"seed={settings[1]}, shingle={settings[2]}; rebuild it or use the same settings.")
+            self.signatures = np.load(self.path / "signatures.npy")
+            self.word_signatures = np.load(self.path / "word_signatures.npy")
+            with (self.path / "papers.jsonl").open(encoding='utf-8') as f:
+                self.papers = [json.loads(line) for line in f]
+            if not len(self.papers) == len(self.signatures) == len(self.word_signatures) == meta['papers']:
+                raise ValueError(f"{self.path} was only partly saved; rebuild it.")
+        self.positions = {paper['paper_url']: i for i, paper in enumerate(self.papers)}
+        self._buckets: Dict[Tuple[str, Tuple[int, int]], _Buckets] = {}
+
+    def __len__(self) -> int:
+        return len(self.papers)
+
+    def add(self, papers: Iterable[Dict[str, Any]]) -> int:
+        """
+        Compute signatures for papers not in the index yet; returns how many were added.
+        """
+        new_papers, new_signatures, new_word_signatures = [], [], []
+        for paper in papers:
+            url = paper.get('paper_url')
+            if not url or url in self.positions:
+                continue
+            hashes = shingles(paper)
+            if len(hashes) == 0:
+                continue
+            self.positions[url] = len(self.papers) + len(new_papers)
+            new_papers.append({field: paper.get(field) for field in ('paper_url', 'title', 'conference', 'year')})
+            new_signatures.append(minhash(hashes, self.permutations))
+            new_word_signatures.append(minhash(shingles(paper, RELATED_SHINGLE), self.permutations))
+        if new_papers:
+            self.papers += new_papers
+            self.signatures = np.vstack([self.signatures, np.array(new_signatures, dtype=np.uint32)])
+            self.word_signatures = np.vstack([self.word_signatures, np.array(new_word_signatures, dtype=np.uint32)])
+            self._buckets = {}
+        return len(new_papers)
+
+    def save(self) -> None:
+        """
+        Write the index files next to the old ones, then swap each into place.
+
+        A crash while writing leaves the previous index intact; one between the
+        swaps leaves files whose sizes disagree with meta.json, which loading reports.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        names = ["signatures.npy", "word_signatures.npy", "papers.jsonl", "meta.json"]
+        temporary = {name: self.path / f"{name}.tmp" for name in names}
+        with temporary["signatures.npy"].open('wb') as f:
+            np.save(f, self.signatures)
+        with temporary["word_signatures.npy"].open('wb') as f:
+            np.save(f, self.word_signatures)
+        with temporary["papers.jsonl"].open('w', encoding='utf-8') as f:
+            for paper in self.papers:
+                f.write(json.dumps(paper, ensure_ascii=False) + '\n')
+        temporary["meta.json"].write_text(json.dumps({'num_perm': self.num_perm, 'seed': self.seed,
+                                                      'shingle': DUPLICATE_SHINGLE, 'papers': len(self.papers)}))
+        for name in names:
+            temporary[name].replace(self.path / name)
+
+    def _bucket_index(self, signatures: str, banding: Tuple[int, int]) -> _Buckets:
+        # Built on first use; sorting the band keys takes well under a second for 100k papers.
+        if (signatures, banding) not in self._buckets:
+            self._buckets[signatures, banding] = _Buckets(getattr(self, signatures), banding)
+        return self._buckets[signatures, banding]
+
+    def similarity(self, i: int, others: np.ndarray) -> np.ndarray:
+        """
+        Estimated Jaccard similarity of the word 3-grams of paper i and each of `others`.
+        """
+        return (self.signatures[others] == self.signatures[i]).mean(axis=1)
+
+    def related(self, paper_url: str, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Up to k papers most similar to an indexed paper, best first, each with its 'similarity'.
+        """
+        i = self.positions[paper_url]
+        return self._rank(self.word_signatures[i], k, exclude=i)
+
+    def related_to(self, paper: Dict[str, Any], k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Like related(), for a paper (title and abstract) that need not be in the index.
+        """
+        exclude = self.positions.get(paper.get('paper_url'))
+        return self._rank(minhash(shingles(paper, RELATED_SHINGLE), self.permutations), k, exclude)
+
+    def _rank(self, signature: np.ndarray, k: int, exclude: Optional[int]) -> List[Dict[str, Any]]:
+        if len(self) == 0:
+            return []
+        candidates = self._bucket_index('word_signatures', RELATED_BANDING).candidates(signature)
+        candidates = candidates[candidates != exclude] if exclude is not None else candidates
+        scores = (self.word_signatures[candidates] == signature).mean(axis=1)
+        best = np.argsort(-scores, kind='stable')[:k]
+        return [dict(self.papers[candidates[j]], similarity=float(scores[j])) for j in best]
+
+    def duplicate_clusters(self, threshold: float = DUPLICATE_THRESHOLD) -> List[List[Dict[str, Any]]]:
+        """
+        Groups of papers whose estimated similarity is at least `threshold` (linked transitively).
+        """
+        parent = list(range(len(self)))
+
+        def root(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for group in self._bucket_index('signatures', DUPLICATE_BANDING).groups():
+            for position, i in enumerate(group[:-1]):
+                others = group[position + 1:]
+                for j in others[self.similarity(i, others) >= threshold]:
+                    parent[root(int(j))] = root(int(i))
+
+        clusters: Dict[int, List[int]] = {}
+        for i in range(len(self)):
+            clusters.setdefault(root(i), []).append(i)
+        return [[self.papers[i] for i in members] for members in clusters.values() if len(members) > 1]
+
+
+def _describe(paper: Dict[str, Any]) -> str:
+    venue = f" [{paper['conference']} {paper['year']}]" if paper.get('conference') else ""
+    return f"{paper.get('title') or '(untitled)'}{venue}\n      {paper['paper_url']}"
+
+
+def build_command(args) -> None:
+    index = SimilarityIndex(args.index)
+    for path in args.inputs:
+        added = index.add(read_papers(path))
+        logging.info(f"Added {added} new papers from {path} ({len(index)} papers).")
+    index.save()
+
+
+def related_command(args) -> None:
+    index = SimilarityIndex(args.index)
+    paper_url = args.paper
+    if paper_url not in index.positions:
+        # Accept a piece of the title as well as the URL.
+        matches = [paper['paper_url'] for paper in index.papers
+                   if args.paper.lower() in (paper.get('title') or '').lower()]
+        if not matches:
+            logging.error(f"No indexed paper matches {args.paper!r}.")
+            return
+        paper_url = matches[0]
+    print(_describe(index.papers[index.positions[paper_url]]))
+    for rank, paper in enumerate(index.related(paper_url, args.k), 1):
+        print(f"{rank:>3}. {paper['similarity']:.2f}  {_describe(paper)}")
+
+
+def duplicates_command(args) -> None:
+    index = SimilarityIndex(args.index)
+    clusters = index.duplicate_clusters(args.threshold)
+    for number, cluster in enumerate(clusters, 1):
+        print(f"Cluster {number} ({len(cluster)} papers):")
+        for paper in cluster:
+            print(f"    {_describe(paper)}")
+    print(f"{len(clusters)} clusters of near-duplicates among {len(index)} papers.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate and related papers with MinHash/LSH.")
+    parser.add_argument('--index', type=Path, default=SIMILARITY_DIR, help="Directory of the stored signatures")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help="Add the papers of scraper output files to the index")
+    build_parser.add_argument('inputs', nargs='*', type=Path, default=[DEFAULT_INPUT],
+                              help="Output files of cvpr_scrapper.py (.csv, .jsonl, .sqlite or .parquet)")
+    build_parser.set_defaults(handler=build_command)
+
+    related_parser = commands.add_parser('related', help="Papers similar to a given one")
+    related_parser.add_argument('paper', help="Paper URL or part of its title")
+    related_parser.add_argument('-k', type=int, default=10, help="Number of results")
+    related_parser.set_defaults(handler=related_command)
+
+    duplicates_parser = commands.add_parser('duplicates', help="List clusters of near-duplicate papers")
+    duplicates_parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD,
+                                   help="Minimum estimated Jaccard similarity")
+    duplicates_parser.set_defaults(handler=duplicates_command)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
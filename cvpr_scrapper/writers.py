@@ -0,0 +1,338 @@
+import csv
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Set
+
+FIELDNAMES = ['title', 'authors', 'abstract', 'paper_url', 'pdf_link', 'supplemental_link']
+# Columns of multi-conference datasets (see scheduler.py).
+DATASET_FIELDNAMES = FIELDNAMES + ['conference', 'year']
+# Columns that are not stored as text.
+INTEGER_FIELDS = {'year'}
+FLUSH_EVERY = 50        # Rows written between flushes to disk.
+FLUSH_SECONDS = 5.0     # ...or seconds, whichever comes first.
+BATCH_SIZE = 500        # Rows per insert batch / Parquet row group.
+TAIL_CHUNK = 64 * 1024  # Bytes read at a time when looking for the last complete row.
+
+
+class _FileWriter:
+    """
+    Shared flush policy for the line-based writers: flush after FLUSH_EVERY rows or FLUSH_SECONDS.
+
+    The file is only created (and an existing one replaced) when the first paper
+    arrives, so a crawl that fails outright leaves earlier results untouched.
+    With `append` (used when resuming an interrupted crawl) an existing file is
+    kept: a row cut off by the crash is dropped, new rows are appended after the
+    complete ones, and papers whose paper_url is already in the file are skipped.
+    """
+
+    # Bytes that end a row; a file not ending in them was cut off mid-row.
+    row_end = b'\n'
+
+    def __init__(self, path: Path, flush_every: int = FLUSH_EVERY, flush_seconds: float = FLUSH_SECONDS,
+                 fieldnames: List[str] = FIELDNAMES, append: bool = False):
+        self.path = Path(path)
+        self.fieldnames = fieldnames
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.append = append
+        self.file = None
+        self.rows = 0
+        self.written: Set[str] = set()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def _ensure_open(self) -> None:
+        if self.file is not None:
+            return
+        resumed = self.append and self.path.exists() and self._can_append()
+        if resumed:
+            _truncate_partial_row(self.path, self.row_end)
+            self.written = {paper.get('paper_url') for paper in read_papers(self.path)}
+            logging.info(f"Appending to {self.path}, which already holds {len(self.written)} papers")
+        has_rows = resumed and self.path.stat().st_size > 0
+        self.file = self.path.open('a' if resumed else 'w', newline='', encoding='utf-8')
+        self._opened(has_rows)
+
+    def _can_append(self) -> bool:
+        return True
+
+    def _opened(self, has_rows: bool) -> None:
+        pass
+
+    def write(self, paper: Dict[str, Any]) -> None:
+        self._ensure_open()
+        if paper.get('paper_url') in self.written:
+            return
+        self._write_row(paper)
+        self.rows += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def _write_row(self, paper: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        if self.file is not None:
+            self.file.flush()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _truncate_partial_row(path: Path, row_end: bytes) -> None:
+    """
+    Cut a file back to the end of its last complete row (a crash can leave half a row behind).
+    """
+    with path.open('rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - TAIL_CHUNK)
+            f.seek(start)
+            # Overlap by the terminator length so one split across chunks is still found.
+            chunk = f.read(min(end, position + len(row_end) - 1) - start)
+            index = chunk.rfind(row_end)
+            if index >= 0:
+                f.truncate(start + index + len(row_end))
+                return
+            position = start
+        f.truncate(0)
+
+
+class CsvWriter(_FileWriter):
+    """
+    Write papers to a CSV file one row at a time; the file is readable while the crawl runs.
+    """
+
+    # csv ends rows with \r\n, while abstracts may contain bare \n inside quoted fields.
+    row_end = b'\r\n'
+
+    def _can_append(self) -> bool:
+        with self.path.open(newline='', encoding='utf-8') as f:
+            header = next(csv.reader(f), None)
+        if header is None or header == self.fieldnames:
+            return True
+        logging.warning(f"{self.path} has different columns; replacing it instead of appending")
+        return False
+
+    def _opened(self, has_rows: bool) -> None:
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames)
+        if not has_rows:
+            self.writer.writeheader()
+
+    def _write_row(self, paper: Dict[str, Any]) -> None:
+        self.writer.writerow(paper)
+
+
+class JsonlWriter(_FileWriter):
+    """
+    Write papers as JSON Lines, one object per line.
+    """
+
+    def _write_row(self, paper: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(paper, ensure_ascii=False) + '\n')
+
+
+class SqliteWriter:
+    """
+    Insert papers into a SQLite table in batches; committed batches are visible to readers immediately.
+    """
+
+    def __init__(self, path: Path, batch_size: int = BATCH_SIZE, table: str = 'papers',
+                 fieldnames: List[str] = FIELDNAMES):
+        self.path = Path(path)
+        self.fieldnames = fieldnames
+        self.batch_size = batch_size
+        self.table = table
+        self.rows = 0
+        self._batch: List[tuple] = []
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        columns = ', '.join(f"{name} {'INTEGER' if name in INTEGER_FIELDS else 'TEXT'}"
+                            for name in fieldnames if name != 'paper_url')
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (paper_url TEXT PRIMARY KEY, {columns})")
+        self.connection.commit()
+
+    def write(self, paper: Dict[str, Any]) -> None:
+        self._batch.append(tuple(paper.get(name) for name in self.fieldnames))
+        self.rows += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        placeholders = ', '.join('?' for _ in self.fieldnames)
+        # Re-scraped papers replace their earlier row.
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO {self.table} ({', '.join(self.fieldnames)}) VALUES ({placeholders})", self._batch)
+        self.connection.commit()
+        self._batch = []
+
+    def close(self) -> None:
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ParquetWriter:
+    """
+    Write papers to Parquet, one row group per batch.
+
+    Unlike the other writers, a Parquet file can only be read after close(),
+    when its footer is written.
+    """
+
+    def __init__(self, path: Path, batch_size: int = BATCH_SIZE, fieldnames: List[str] = FIELDNAMES):
+        import pyarrow as pa
+
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.fieldnames = fieldnames
+        self.rows = 0
+        self._batch: List[Dict[str, Any]] = []
+        self._schema = pa.schema([(name, pa.int64() if name in INTEGER_FIELDS else pa.string())
+                                  for name in fieldnames])
+        self._writer = None
+        self._closed = False
+
+    def write(self, paper: Dict[str, Any]) -> None:
+        self._batch.append(paper)
+        self.rows += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self._batch:
+            return
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(str(self.path), self._schema)
+        columns = {name: [paper.get(name) for paper in self._batch] for name in self.fieldnames}
+        self._writer.write_table(pa.Table.from_pydict(columns, schema=self._schema))
+        self._batch = []
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class MultiWriter:
+    """
+    Send every paper to several writers.
+    """
+
+    def __init__(self, writers: List[Any]):
+        self.writers = writers
+
+    @property
+    def rows(self) -> int:
+        return self.writers[0].rows if self.writers else 0
+
+    def write(self, paper: Dict[str, Any]) -> None:
+        for writer in self.writers:
+            writer.write(paper)
+
+    def flush(self) -> None:
+        for writer in self.writers:
+            writer.flush()
+
+    def close(self) -> None:
+        for writer in self.writers:
+            writer.close()
+            logging.info(f"Wrote {writer.rows} papers to {writer.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_writer(path: Path, append: bool = False, **options: Any):
+    """
+    Open the writer matching a file's extension: .csv, .jsonl/.ndjson, .sqlite/.db or .parquet.
+
+    `append` keeps the rows of an existing CSV or JSON Lines file (see _FileWriter).
+    SQLite output always keeps its rows and replaces re-scraped papers; Parquet
+    cannot be appended to and is rewritten.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        return CsvWriter(path, append=append, **options)
+    if suffix in ('.jsonl', '.ndjson'):
+        return JsonlWriter(path, append=append, **options)
+    if suffix in ('.sqlite', '.db'):
+        return SqliteWriter(path, **options)
+    if suffix == '.parquet':
+        return ParquetWriter(path, **options)
+    raise ValueError(f"Unsupported output format: {path} (use .csv, .jsonl, .sqlite or .parquet)")
+
+
+def open_writers(paths: List[Optional[Path]], **options: Any) -> MultiWriter:
+    """
+    One MultiWriter over every given output path (None entries are skipped); `options` go to each writer.
+    """
+    return MultiWriter([open_writer(path, **options) for path in paths if path])
+
+
+def read_papers(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the papers stored in an output file written by one of the writers above.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        with path.open(newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+    elif suffix in ('.jsonl', '.ndjson'):
+        with path.open(encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif suffix in ('.sqlite', '.db'):
+        connection = sqlite3.connect(str(path))
+        connection.row_factory = sqlite3.Row
+        try:
+            for row in connection.execute("SELECT * FROM papers"):
+                yield dict(row)
+        finally:
+            connection.close()
+    elif suffix == '.parquet':
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(str(path)).iter_batches():
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported input format: {path} (use .csv, .jsonl, .sqlite or .parquet)")
@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Parallel downloads; also the size of the session's connection pool.
+WORKERS = 8
+# Global request rate shared by all workers, replacing the old sleep(1) after every image.
+REQUESTS_PER_SECOND = 4.0
+BURST = 4
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 1.0
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = (10, 30)  # (connect, read) seconds.
+# Statuses worth another attempt; anything else (404, 403, ...) fails at once.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Failures without a response worth another attempt; a bad URL (InvalidURL, MissingSchema, ...) fails at once.
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+# Longest Retry-After honoured, so one throttled image cannot stall its worker for minutes.
+MAX_RETRY_AFTER = 60.0
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/90.0.4430.93 Safari/537.36"
+    )
+}
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: on average `rate` acquisitions per second, at most `burst` at once.
+    """
+
+    def __init__(self, rate: float = REQUESTS_PER_SECOND, burst: int = BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # Waiting while holding the lock queues the other workers behind this one, which is the point.
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1.0
+                self.updated = time.monotonic()
+            self.tokens -= 1
+
+
+def create_session(workers: int = WORKERS) -> requests.Session:
+    """
+    Session whose connection pool keeps one reusable connection per worker and host.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _retry_delay(response: Optional[requests.Response], attempt: int) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_AFTER)
+    return BACKOFF_SECONDS * 2 ** attempt
+
+
+def download_file(session: requests.Session, url: str, path: Path, limiter: Optional[RateLimiter] = None,
+                  max_retries: int = MAX_RETRIES) -> Optional[Dict[str, Any]]:
+    """
+    Stream a URL to `path` in chunks, retrying transient failures.
+
+    The body goes to a hidden temporary file next to `path` that is renamed into
+    place only once complete, so an interrupted run never leaves a truncated image.
+
+    Returns:
+        {'size': bytes written, 'sha256': hex digest of the content}, or None if the download
+        failed (including local errors such as a full disk).
+    """
+    path = Path(path)
+    for attempt in range(max_retries + 1):
+        if limiter:
+            limiter.acquire()
+        temp_name = None
+        try:
+            fd, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".part", dir=path.parent)
+            with os.fdopen(fd, "wb") as f, session.get(url, stream=True, timeout=TIMEOUT) as response:
+                response.raise_for_status()
+                digest = hashlib.sha256()
+                size = 0
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            os.replace(temp_name, path)
+            return {'size': size, 'sha256': digest.hexdigest()}
+        except requests.RequestException as e:
+            if e.response is not None:
+                retryable = e.response.status_code in RETRY_STATUSES
+            else:
+                retryable = isinstance(e, RETRY_EXCEPTIONS)
+            if not retryable or attempt == max_retries:
+                logging.error(f"Failed to download {url}: {e}")
+                return None
+            delay = _retry_delay(e.response, attempt)
+            logging.warning(f"Retrying {url} in {delay:.1f}s ({e}).")
+            time.sleep(delay)
+        except OSError as e:
+            # Writing locally failed (disk full, permissions, ...); retrying would not help.
+            logging.error(f"Failed to save {url} to {path}: {e}")
+            return None
+        finally:
+            if temp_name and os.path.exists(temp_name):
+                os.remove(temp_name)
+    return None
+
+
+def iter_downloads(jobs: List[Tuple[str, str]], folder: Path, workers: int = WORKERS,
+                   requests_per_second: float = REQUESTS_PER_SECOND,
+                   session: Optional[requests.Session] = None) -> Iterator[Tuple[str, Path, Optional[Dict[str, Any]]]]:
+    """
+    Download (url, file name) pairs into `folder` with a bounded pool of worker threads.
+
+    All workers share one pooled session and one rate limit. Yields
+    (url, path, download_file result) in completion order, in the calling thread.
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    own_session = session is None
+    session = session or create_session(workers)
+    limiter = RateLimiter(requests_per_second, burst=min(BURST, workers))
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(download_file, session, url, folder / file_name, limiter): (url, folder / file_name)
+                       for url, file_name in jobs}
+            try:
+                for future in as_completed(futures):
+                    url, path = futures[future]
+                    yield url, path, future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+    finally:
+        if own_session:
+            session.close()
+
+
+def download_all(jobs: List[Tuple[str, str]], folder: Path, **options: Any) -> Dict[str, int]:
+    """
+    Download (url, file name) pairs into `folder`; see iter_downloads for the options.
+
+    Returns:
+        Counts of 'downloaded' and 'failed' images, plus the 'bytes' written.
+    """
+    counts = {'downloaded': 0, 'failed': 0, 'bytes': 0}
+    for done, (url, path, result) in enumerate(iter_downloads(jobs, folder, **options), 1):
+        if result is None:
+            counts['failed'] += 1
+        else:
+            counts['downloaded'] += 1
+            counts['bytes'] += result['size']
+            logging.info(f"Downloaded image: {path.name} ({done}/{len(jobs)})")
+    return counts
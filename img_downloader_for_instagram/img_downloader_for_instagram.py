@@ -1,11 +1,15 @@
+import argparse
 import time
-import requests
 import logging
 from pathlib import Path
+from typing import List, Set
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 
+from downloads import create_session, download_file, download_all
+from sync import Media, MediaManifest, post_id_from_href, media_id_from_url, sync_media
+
 # Configure logging for detailed output.
 logging.basicConfig(
     level=logging.INFO,
@@ -14,6 +18,16 @@ logging.basicConfig(
 
 # URL for the public Instagram account.
 INSTAGRAM_URL = "https://www.instagram.com/grapeot/"
+# Known posts to pass before a sync stops scrolling; more than the (up to three) pinned posts at the top.
+KNOWN_POSTS_TO_STOP = 12
+
+# Post links on the grid with the image shown for each, read in one round trip to the browser.
+POST_IMAGES_SCRIPT = """
+return Array.from(document.querySelectorAll("a[href*='/p/'], a[href*='/reel/']")).map(a => {
+    const img = a.querySelector('img');
+    return [a.getAttribute('href'), img ? (img.currentSrc || img.src) : null];
+});
+"""
 
 def setup_driver() -> webdriver.Chrome:
     """
@@ -70,6 +84,50 @@ def extract_image_urls(driver: webdriver.Chrome) -> list:
             image_urls.add(src)
     return list(image_urls)
 
+def extract_post_media(driver: webdriver.Chrome) -> List[Media]:
+    """
+    Extracts the post shortcode and image URL of every post currently on the profile grid.
+    """
+    media = []
+    for href, src in driver.execute_script(POST_IMAGES_SCRIPT):
+        post_id = post_id_from_href(href)
+        if post_id and src:
+            media.append(Media(post_id, media_id_from_url(src), src))
+    return media
+
+def scroll_until_known_posts(driver: webdriver.Chrome, known_posts: Set[str], pause_time: float = 2.0,
+                             max_attempts: int = 5, known_to_stop: int = KNOWN_POSTS_TO_STOP) -> List[Media]:
+    """
+    Scrolls down the profile collecting post images until enough already synced posts show up.
+
+    The grid lists posts newest first, so once `known_to_stop` known posts have
+    been seen everything further down was synced by an earlier run. Without
+    known posts this scrolls to the end like scroll_until_no_new_images.
+    
+    Returns:
+        The post images found, in page order.
+    """
+    found = {}
+    attempts = 0
+    while attempts < max_attempts:
+        previous = len(found)
+        for item in extract_post_media(driver):
+            found.setdefault(item.post_id, item)
+        known = sum(post_id in known_posts for post_id in found)
+        logging.info(f"Found {len(found)} posts so far, {known} already synced.")
+        if known_posts and known >= min(known_to_stop, len(known_posts)):
+            logging.info("Reached posts synced by an earlier run; scrolling complete.")
+            return list(found.values())
+        if len(found) == previous:
+            attempts += 1
+            logging.info(f"No new posts loaded; attempt {attempts} of {max_attempts}.")
+        else:
+            attempts = 0  # Reset counter if new posts are loaded.
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(pause_time)
+    logging.info("No new posts loaded after several attempts; scrolling complete.")
+    return list(found.values())
+
 def download_image(url: str, folder: Path, file_name: str) -> None:
     """
     Downloads a single image from the given URL and saves it to the specified folder with the provided file name.
@@ -79,35 +137,53 @@ def download_image(url: str, folder: Path, file_name: str) -> None:
         folder: The folder path where the image will be saved.
         file_name: The name to save the image as.
     """
+    with create_session(workers=1) as session:
+        if download_file(session, url, folder / file_name) is not None:
+            logging.info(f"Downloaded image: {file_name}")
+
+def sync_profile(driver: webdriver.Chrome, output_folder: Path) -> None:
+    """
+    Downloads only the posts added since the last sync into the content-addressed folder.
+    """
+    manifest = MediaManifest(output_folder)
     try:
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/90.0.4430.93 Safari/537.36"
-            )
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        image_path = folder / file_name
-        with open(image_path, "wb") as f:
-            f.write(response.content)
-        logging.info(f"Downloaded image: {file_name}")
-    except Exception as e:
-        logging.error(f"Failed to download {url}: {e}")
+        known_posts = manifest.known_posts()
+        logging.info(f"{len(known_posts)} posts synced by earlier runs.")
+        media = scroll_until_known_posts(driver, known_posts, pause_time=2)
+        driver.quit()
+
+        start = time.perf_counter()
+        counts = sync_media(media, manifest)
+    finally:
+        manifest.close()
+    logging.info(f"{counts['downloaded']} new images, {counts['duplicates']} duplicates of stored images, "
+                 f"{counts['skipped']} already synced, {counts['failed']} failed; "
+                 f"{counts['bytes'] / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s.")
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Download the images of a public Instagram profile.")
+    parser.add_argument('--url', default=INSTAGRAM_URL, help="Profile URL")
+    parser.add_argument('--output', type=Path, default=Path(__file__).parent / "img", help="Folder for the images")
+    parser.add_argument('--sync', action='store_true',
+                        help="Only fetch posts newer than the last sync; images are named by content hash "
+                             "and recorded in manifest.sqlite")
+    args = parser.parse_args()
+
     # Set up the output directory.
-    output_folder = Path(__file__).parent / "img"
+    output_folder = args.output
     output_folder.mkdir(parents=True, exist_ok=True)
     logging.info(f"Images will be saved to: {output_folder.resolve()}")
 
     # Set up Selenium and load the Instagram page.
     driver = setup_driver()
-    logging.info(f"Navigating to {INSTAGRAM_URL}")
-    driver.get(INSTAGRAM_URL)
+    logging.info(f"Navigating to {args.url}")
+    driver.get(args.url)
     time.sleep(5)  # Allow time for the page to initially load.
 
+    if args.sync:
+        sync_profile(driver, output_folder)
+        return
+
     # Scroll down until no new images are loaded.
     logging.info("Scrolling through the page to load images...")
     scroll_until_no_new_images(driver, pause_time=2)
@@ -119,13 +195,16 @@ def main() -> None:
 
     driver.quit()
 
-    # Download each image.
+    # Download the images in parallel over one pooled session.
+    jobs = []
     for idx, url in enumerate(image_urls, start=1):
         # Attempt to determine the file extension from the URL.
         file_extension = url.split("?")[0].split(".")[-1]
-        file_name = f"img_{idx:03d}.{file_extension}"
-        download_image(url, output_folder, file_name)
-        time.sleep(1)  # Brief delay between downloads.
+        jobs.append((url, f"img_{idx:03d}.{file_extension}"))
+    start = time.perf_counter()
+    counts = download_all(jobs, output_folder)
+    logging.info(f"{counts['downloaded']} images downloaded, {counts['failed']} failed; "
+                 f"{counts['bytes'] / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,142 @@
+import logging
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set, Tuple, NamedTuple
+from urllib.parse import urlsplit
+
+from downloads import WORKERS, REQUESTS_PER_SECOND, iter_downloads
+
+MANIFEST_NAME = "manifest.sqlite"
+INCOMING_DIR = ".incoming"
+DEFAULT_EXTENSION = ".jpg"
+
+
+class Media(NamedTuple):
+    """
+    One image of a post on the profile grid.
+    """
+    post_id: str    # Shortcode from the post link, e.g. "C1a2B3c4D5e" in /p/C1a2B3c4D5e/.
+    media_id: str   # Canonical ID of the image, the same whatever size or signature the URL carries.
+    url: str
+
+
+def post_id_from_href(href: str) -> Optional[str]:
+    """
+    Shortcode of a post or reel link such as "/grapeot/p/C1a2B3c4D5e/", or None for other links.
+    """
+    match = re.search(r'/(?:p|reel)/([^/?#]+)', href or "")
+    return match.group(1) if match else None
+
+
+def media_id_from_url(url: str) -> str:
+    """
+    Canonical media ID of an Instagram CDN URL.
+
+    The query string (signature, expiry, requested size) changes between page
+    loads, but the file name in the path identifies the image,
+    e.g. ".../t51.29350-15/123_456_789_n.jpg?stp=...&oe=..." -> "123_456_789_n".
+    """
+    parts = urlsplit(url)
+    stem = Path(parts.path).stem
+    return stem or f"{parts.netloc}{parts.path}"
+
+
+class MediaManifest:
+    """
+    Record of every image synced into a folder, kept in <folder>/manifest.sqlite.
+
+    Each image is stored once under the SHA-256 of its content
+    (<folder>/<sha256>.jpg), so file names never change between runs and the
+    same picture posted twice takes the space of one.
+    """
+
+    def __init__(self, folder: Path):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.folder / MANIFEST_NAME))
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS media ("
+            " media_id TEXT PRIMARY KEY,"
+            " post_id TEXT NOT NULL,"
+            " source_url TEXT NOT NULL,"
+            " sha256 TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " downloaded_at REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS media_sha256 ON media (sha256)")
+        self.connection.commit()
+
+    def known_posts(self) -> Set[str]:
+        return {row[0] for row in self.connection.execute("SELECT DISTINCT post_id FROM media")}
+
+    def lookup(self, media_id: str) -> Optional[Path]:
+        """
+        Local file of an image synced earlier, or None if it is unknown or was deleted.
+        """
+        row = self.connection.execute("SELECT path FROM media WHERE media_id = ?", (media_id,)).fetchone()
+        if row is None or not (self.folder / row[0]).exists():
+            return None
+        return self.folder / row[0]
+
+    def add(self, media: Media, incoming: Path, sha256: str, size: int) -> Tuple[Path, bool]:
+        """
+        Move a finished download into the folder under its content hash and record it.
+
+        Returns:
+            (local path, True if the same content was already stored and the download was dropped).
+        """
+        row = self.connection.execute("SELECT path FROM media WHERE sha256 = ?", (sha256,)).fetchone()
+        duplicate = row is not None and (self.folder / row[0]).exists()
+        if duplicate:
+            relative = row[0]
+            incoming.unlink()
+        else:
+            relative = f"{sha256}{incoming.suffix}"
+            incoming.replace(self.folder / relative)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO media (media_id, post_id, source_url, sha256, path, size, downloaded_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (media.media_id, media.post_id, media.url, sha256, relative, size, time.time()))
+        self.connection.commit()
+        return self.folder / relative, duplicate
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def sync_media(media: List[Media], manifest: MediaManifest, workers: int = WORKERS,
+               requests_per_second: float = REQUESTS_PER_SECOND) -> Dict[str, int]:
+    """
+    Download the images that are not in the manifest yet (or whose file went missing).
+
+    Returns:
+        Counts of 'downloaded', 'duplicates' (content already stored), 'skipped'
+        (already synced) and 'failed' images, plus the 'bytes' transferred.
+    """
+    counts = {'downloaded': 0, 'duplicates': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+    pending: Dict[str, Media] = {}
+    for item in media:
+        if item.media_id in pending or manifest.lookup(item.media_id):
+            counts['skipped'] += 1
+        else:
+            pending[item.media_id] = item
+    logging.info(f"{len(media)} images found, {counts['skipped']} already synced, {len(pending)} to download.")
+    if not pending:
+        return counts
+
+    by_url = {item.url: item for item in pending.values()}
+    jobs = [(item.url, f"{item.media_id}{Path(urlsplit(item.url).path).suffix.lower() or DEFAULT_EXTENSION}")
+            for item in pending.values()]
+    for url, path, result in iter_downloads(jobs, manifest.folder / INCOMING_DIR, workers=workers,
+                                            requests_per_second=requests_per_second):
+        if result is None:
+            counts['failed'] += 1
+            continue
+        counts['bytes'] += result['size']
+        local_path, duplicate = manifest.add(by_url[url], path, result['sha256'], result['size'])
+        counts['duplicates' if duplicate else 'downloaded'] += 1
+        logging.info(f"Synced image {by_url[url].media_id} -> {local_path.name}")
+    return counts